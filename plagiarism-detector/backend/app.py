@@ -1,34 +1,122 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
 import re
-import nltk
-from nltk.tokenize import sent_tokenize
+import json
 import os
-import uuid
 from werkzeug.utils import secure_filename
-import docx
-import PyPDF2
-import textract
-import requests  # Untuk komunikasi dengan Ollama API
+from werkzeug.exceptions import RequestEntityTooLarge
+import time
 import logging 
+from ollama_client import OllamaClient, DeadlineExceeded  # Untuk komunikasi dengan Ollama API
+from verdict_cache import VerdictCache
+from jobs import JobManager, JobStore, QueueFull
+from similarity import lexical_similarity_matrix, select_llm_candidates
+from corpus import SPAN_KGRAM_SIZE, SourceCorpus, fingerprint_text, overlap_spans
+from embeddings import OllamaEmbedder, HashingEmbedder, VectorStore, delete_source_from_stores, top_k_cosine
+from ingest import TextCache, get_process_pool, read_file, spool_upload
+from cohort import find_suspicious_pairs
+from history import CheckHistory, diff_paragraphs, paragraph_hash
+from runtime_state import RuntimeState
+from metrics import (REGISTRY, HTTP_REQUESTS, HTTP_REQUEST_SECONDS, MetricsStore, RequestTimings,
+                     configure_logging, record_llm_call)
+# Semua konfigurasi dibaca dari environment (lihat config.py)
+from config import (UPLOAD_FOLDER, ALLOWED_EXTENSIONS, MAX_CONTENT_LENGTH, INGEST_WORKERS,
+                    TEXT_CACHE_ENTRIES, CORPUS_FOLDER, VECTOR_FOLDER, EMBEDDING_BACKEND,
+                    EMBEDDING_MODEL, EMBEDDING_BATCH_SIZE, SEMANTIC_TOP_K, SEMANTIC_THRESHOLD,
+                    OLLAMA_BASE_URL, OLLAMA_MODEL, OLLAMA_ENABLED, OLLAMA_NUM_PARALLEL,
+                    OLLAMA_TIMEOUT, OLLAMA_REQUEST_DEADLINE, OLLAMA_MAX_RETRIES, OLLAMA_NUM_CTX,
+                    OLLAMA_MAX_BATCH_SIZE, OLLAMA_KEEP_ALIVE, BATCH_PROMPT_TOKENS,
+                    BATCH_OUTPUT_TOKENS_PER_SOURCE, PROMPT_VERSION, CACHE_FOLDER,
+                    CACHE_MEMORY_ITEMS, CACHE_DISK_ITEMS, CACHE_TTL, HISTORY_MAX_AGE,
+                    MIN_PARAGRAPH_WORDS, MATCH_THRESHOLD, LEXICAL_COPY_THRESHOLD,
+                    LEXICAL_UNRELATED_THRESHOLD, LEXICAL_AMBIGUITY_BAND, LLM_TOP_K,
+                    COHORT_MAX_DOCUMENTS, COHORT_MIN_SIMILARITY, COHORT_TOP_PAIRS,
+                    COHORT_EVIDENCE_PAIRS, JOB_MAX_RUNNING, JOB_MAX_QUEUED, JOB_RETENTION,
+                    JOB_KEEPALIVE_INTERVAL, JOB_STALE_AFTER, RUNTIME_DB, RUNTIME_REFRESH_INTERVAL,
+                    WARMUP_TIMEOUT, LOG_LEVEL, METRICS_DB, METRICS_FLUSH_INTERVAL)
 
 app = Flask(__name__)
 CORS(app)
 
-# Konfigurasi upload file
-UPLOAD_FOLDER = 'uploads'
-ALLOWED_EXTENSIONS = {'txt', 'pdf', 'docx'}
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+app.config['MAX_CONTENT_LENGTH'] = MAX_CONTENT_LENGTH
 
-# Konfigurasi Ollama
-OLLAMA_BASE_URL = "http://localhost:11434"
-OLLAMA_MODEL = "llama3"  # Ganti dengan model yang Anda inginkan
-OLLAMA_ENABLED = True  # Set False untuk nonaktifkan Ollama
+logger = configure_logging('plagiarism', LOG_LEVEL)
+
+# Metrik Prometheus dijumlahkan dari semua worker lewat SQLite
+metrics_store = MetricsStore(METRICS_DB)
+REGISTRY.share(metrics_store, flush_interval=METRICS_FLUSH_INTERVAL)
 
 # Buat folder uploads jika belum ada
 if not os.path.exists(UPLOAD_FOLDER):
     os.makedirs(UPLOAD_FOLDER)
 
+# Riwayat hasil per paragraf untuk pemeriksaan ulang dokumen revisi
+check_history = CheckHistory(os.path.join(CACHE_FOLDER, 'history.db'), max_age=HISTORY_MAX_AGE)
+
+# Cache teks hasil ekstraksi upload, per hash isi file
+text_cache = TextCache(os.path.join(CACHE_FOLDER, 'text'), max_entries=TEXT_CACHE_ENTRIES)
+
+# Korpus sumber yang sudah diindeks (fingerprint + MinHash-LSH)
+source_corpus = SourceCorpus(CORPUS_FOLDER)
+
+# State runtime yang dibagi semua worker (model aktif, generasi cache vonis)
+runtime_state = RuntimeState(RUNTIME_DB, refresh_interval=RUNTIME_REFRESH_INTERVAL)
+
+# Cache vonis LLM (LRU di memori + SQLite yang dibagi semua worker)
+verdict_cache = VerdictCache(
+    os.path.join(CACHE_FOLDER, 'verdicts.db'),
+    max_memory_items=CACHE_MEMORY_ITEMS,
+    max_disk_items=CACHE_DISK_ITEMS,
+    ttl=CACHE_TTL,
+    generation=lambda model: get_cache_generation(model)
+)
+
+# Antrean job pemeriksaan asinkron; status dan event job disimpan bersama agar
+# bisa dipantau dari worker mana pun
+job_manager = JobManager(
+    max_running=JOB_MAX_RUNNING,
+    max_queued=JOB_MAX_QUEUED,
+    retention=JOB_RETENTION,
+    store=JobStore(RUNTIME_DB),
+    stale_after=JOB_STALE_AFTER
+)
+
+# Klien Ollama bersama (session HTTP di-pool, paralelisme terbatas)
+ollama_client = OllamaClient(
+    OLLAMA_BASE_URL,
+    num_parallel=OLLAMA_NUM_PARALLEL,
+    timeout=OLLAMA_TIMEOUT,
+    max_retries=OLLAMA_MAX_RETRIES
+)
+
+# Embedder untuk mode semantik; fallback hashing dipakai jika Ollama dinonaktifkan
+if EMBEDDING_BACKEND == 'ollama' and OLLAMA_ENABLED:
+    embedder = OllamaEmbedder(ollama_client, EMBEDDING_MODEL, batch_size=EMBEDDING_BATCH_SIZE)
+else:
+    embedder = HashingEmbedder()
+
+# Penyimpanan vektor per embedder dan dimensi (dibuat saat pertama dipakai)
+vector_stores = {}
+
+# Context window per model (dibaca dari /api/show saat pertama dipakai)
+model_context_windows = {}
+
+# Fungsi untuk mendapatkan model Ollama yang aktif (bisa diubah dari worker mana pun)
+def get_active_model():
+    return runtime_state.get('ollama_model', OLLAMA_MODEL)
+
+# Fungsi untuk membuang model yang dipilih lewat /api/change-model bila OLLAMA_MODEL
+# diset eksplisit di environment, sehingga restart dengan model baru benar-benar memakainya
+def apply_configured_model():
+    if os.environ.get('OLLAMA_MODEL', '').strip():
+        runtime_state.delete('ollama_model')
+
+# Fungsi untuk mendapatkan generasi cache vonis sebuah model; dinaikkan saat vonis
+# model dibatalkan sehingga semua worker berhenti memakai vonis lama
+def get_cache_generation(model):
+    return runtime_state.get(f'verdict_generation:{model}', 0)
+
 # Preprocessing teks sederhana
 def preprocess_text(text):
     if not text:
@@ -50,34 +138,128 @@ def split_into_paragraphs(text):
     
     return paragraphs
 
-# Fungsi untuk membaca berbagai jenis file
-def read_file(file_path, filename):
-    if filename.endswith('.txt'):
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            return f.read()
-    elif filename.endswith('.docx'):
-        doc = docx.Document(file_path)
-        return '\n\n'.join([paragraph.text for paragraph in doc.paragraphs if paragraph.text.strip()])
-    elif filename.endswith('.pdf'):
-        with open(file_path, 'rb') as f:
-            pdf_reader = PyPDF2.PdfReader(f)
-            text = ''
-            for page in pdf_reader.pages:
-                text += page.extract_text() + '\n\n'
-            return text
-    else:
-        # Fallback menggunakan textract
+# Fungsi untuk memisahkan sumber menjadi paragraf yang cukup panjang untuk dibandingkan
+def split_source_paragraphs(source_text):
+    return [
+        (j, paragraph) for j, paragraph in enumerate(split_into_paragraphs(source_text))
+        if len(paragraph.split()) >= MIN_PARAGRAPH_WORDS
+    ]
+
+# Fungsi untuk membuat daftar rentang teks yang sama persis
+def describe_spans(text, spans):
+    return [{'start': start, 'end': end, 'text': text[start:end]} for start, end in spans]
+
+# Fungsi untuk mendapatkan penyimpanan vektor yang sesuai dengan embedder aktif
+def get_vector_store(dim):
+    key = (embedder.name, dim)
+    if key not in vector_stores:
+        store_name = re.sub(r'[^\w.-]', '_', f"{embedder.name}-{dim}")
+        vector_stores[key] = VectorStore(VECTOR_FOLDER, store_name, dim)
+    return vector_stores[key]
+
+# Fungsi untuk meng-embed paragraf korpus yang belum punya vektor (penambahan inkremental).
+# Dengan deadline, pengindeksan berhenti saat waktu habis; sisanya dilanjutkan nanti.
+def index_missing_paragraphs(dim=None, deadline=None):
+    if dim is None:
+        dim = embedder.embed(['probe'], deadline=deadline).shape[1]
+    store = get_vector_store(dim)
+    store.append_missing(
+        source_corpus.get_unindexed_paragraphs,
+        lambda texts: embedder.embed(texts, deadline=deadline),
+        deadline=deadline
+    )
+    return store
+
+# Fungsi untuk memperkirakan jumlah token (sekitar 4 karakter per token)
+def estimate_tokens(text):
+    return len(text) // 4 + 1
+
+# Fungsi untuk mendapatkan context window yang dipakai untuk model (dibatasi OLLAMA_NUM_CTX).
+# Nilai yang sama dikirim di setiap panggilan agar Ollama tidak memuat ulang model.
+def get_context_window(model, deadline=None):
+    if model not in model_context_windows:
+        context_length = None
         try:
-            return textract.process(file_path).decode('utf-8', errors='ignore')
-        except:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                return f.read()
+            response = ollama_client.post("/api/show", deadline=deadline, json={"model": model})
+            if response.status_code == 200:
+                model_info = response.json().get('model_info', {})
+                context_length = next(
+                    (value for key, value in model_info.items() if key.endswith('.context_length')), None
+                )
+        except DeadlineExceeded:
+            # Jangan disimpan: nilai sebenarnya dibaca lagi pada panggilan berikutnya
+            return OLLAMA_NUM_CTX
+        except Exception as e:
+            logger.warning('context_window_lookup_failed', extra={'fields': {'model': model, 'error': str(e)}})
+        model_context_windows[model] = min(OLLAMA_NUM_CTX, context_length) if context_length else OLLAMA_NUM_CTX
+    return model_context_windows[model]
 
-# Fungsi untuk menganalisis teks dengan Ollama API
-def analyze_with_ollama(text, source_text):
-    if not OLLAMA_ENABLED:
-        return {"analysis": "Ollama analysis disabled", "score": 0}
-    
+# Fungsi untuk mengirim prompt ke Ollama dengan output JSON; mengembalikan teks respons.
+# Durasi dan jumlah token yang dilaporkan Ollama dicatat ke metrik (kind: 'single' / 'batch').
+def generate_json(model, prompt, deadline=None, timings=None, kind='single'):
+    options = {"num_ctx": get_context_window(model, deadline=deadline), "temperature": 0}
+    start = time.perf_counter()
+    data = None
+    try:
+        response = ollama_client.post(
+            "/api/generate",
+            deadline=deadline,
+            json={
+                "model": model,
+                "prompt": prompt,
+                "format": "json",
+                "stream": False,
+                "options": options
+            }
+        )
+        if response.status_code != 200:
+            raise ValueError(f"Ollama API returned status {response.status_code}")
+        data = response.json()
+    finally:
+        record_llm_call(kind, time.perf_counter() - start, data, timings)
+    return data.get('response', '')
+
+# Fungsi untuk membaca vonis satu pasangan dari respons model. Respons JSON
+# {"score", "analysis"} diutamakan; jika bukan JSON, hanya angka di awal respons
+# yang dipakai (bukan angka sembarang di dalam teks paragraf).
+def parse_single_verdict(response_text):
+    try:
+        data = json.loads(response_text)
+        score = max(0, min(100, float(data['score'])))
+        analysis = str(data.get('analysis', '')).strip()
+    except (ValueError, TypeError, KeyError):
+        score_match = re.match(r'\s*(\d{1,3})\b', response_text)
+        score = max(0, min(100, int(score_match.group(1)))) if score_match else 0
+        analysis = response_text[score_match.end():].strip() if score_match else response_text.strip()
+
+    if not analysis:
+        analysis = "Tidak ada analisis yang dihasilkan oleh model."
+    return {"analysis": analysis, "score": score / 100}  # Convert ke decimal
+
+# Fungsi untuk membaca vonis batch. Mengembalikan dict source_id -> vonis hanya
+# untuk item yang valid; id yang hilang atau rusak dianalisis ulang satu per satu.
+def parse_batch_verdicts(response_text, expected_ids):
+    data = json.loads(response_text)
+    items = data.get('results', []) if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        raise ValueError("Respons batch bukan array")
+
+    verdicts = {}
+    for item in items:
+        try:
+            source_id = int(item['source_id'])
+            score = float(item['score'])
+        except (ValueError, TypeError, KeyError):
+            continue
+        if source_id not in expected_ids or source_id in verdicts or not 0 <= score <= 100:
+            continue
+        analysis = str(item.get('analysis', '')).strip() or "Tidak ada analisis yang dihasilkan oleh model."
+        verdicts[source_id] = {"analysis": analysis, "score": score / 100}
+    return verdicts
+
+# Fungsi untuk meminta vonis satu pasangan ke model (tanpa memeriksa cache)
+def request_single_verdict(model, text, source_text, deadline=None, timings=None):
+    cache_status = "miss"
     try:
         # Siapkan prompt yang jelas untuk Ollama
         prompt = f"""
@@ -91,151 +273,729 @@ def analyze_with_ollama(text, source_text):
         TEKS 2 (Sumber):
         {source_text}
         
-        FORMAT OUTPUT:
-        - Berikan hanya angka antara 0-100 yang merepresentasikan persentase kemiripan
-        - Setelah angka, berikan analisis singkat 1-2 kalimat
+        FORMAT OUTPUT (JSON):
+        {{"score": <angka 0-100 persentase kemiripan>, "analysis": "<analisis singkat 1-2 kalimat>"}}
         
         CONTOH OUTPUT:
-        75
-        Teks menunjukkan kemiripan struktur dan ide utama tetapi menggunakan kosakata yang berbeda dalam beberapa bagian.
+        {{"score": 75, "analysis": "Teks menunjukkan kemiripan struktur dan ide utama tetapi menggunakan kosakata yang berbeda dalam beberapa bagian."}}
         """
         
-        # Kirim request ke Ollama API
-        response = requests.post(
-            f"{OLLAMA_BASE_URL}/api/generate",
-            json={
-                "model": OLLAMA_MODEL,
-                "prompt": prompt,
-                "stream": False
-            }
-        )
-        
-        
-        print(response, flush=True)
-            
-        if response.status_code != 200:
-            return {
-                "analysis": f"Error: Ollama API returned status {response.status_code}",
-                "score": 0
-            }
-        
-        result = response.json()
-        response_text = result.get('response', '')
-        
-        # Ekstrak skor numerik dari respons
-        score_match = re.search(r'(\d{1,3})', response_text)
-        if score_match:
-            score = int(score_match.group(1))
-            # Pastikan score antara 0-100
-            score = max(0, min(100, score))
-        else:
-            score = 0
-        
-        # Ekstrak analisis (ambil teks setelah angka)
-        analysis = response_text.replace(str(score), '').strip()
-        if not analysis or analysis == "":
-            analysis = "Tidak ada analisis yang dihasilkan oleh model."
-        
-        return {
-            "analysis": analysis,
-            "score": score / 100  # Convert ke decimal
-        }
+        verdict = parse_single_verdict(generate_json(model, prompt, deadline=deadline, timings=timings))
+        verdict_cache.put(model, PROMPT_VERSION, text, source_text, verdict)
+        return {**verdict, "cache": cache_status}
+    except DeadlineExceeded:
+        return failed_verdict('timeout', "Error: batas waktu analisis terlampaui")
     except Exception as e:
-        print(f"Error in Ollama analysis: {e}")
-        return {
-            "analysis": f"Error dalam analisis: {str(e)}",
-            "score": 0
-        }
+        logger.error('ollama_analysis_failed', extra={'fields': {'model': model, 'error': str(e)}})
+        return failed_verdict('failed', f"Error dalam analisis: {str(e)}")
 
-# Fungsi untuk memeriksa plagiarisme dalam dokumen
-def check_document_plagiarism(text, sources):
-    # Pisahkan teks menjadi paragraf
-    paragraphs = split_into_paragraphs(text)
-    results = []
-    
-    # Untuk setiap paragraf, periksa similarity dengan semua sumber
-    for i, paragraph in enumerate(paragraphs):
-        if len(paragraph.split()) < 5:  # Abaikan paragraf terlalu pendek
+# Fungsi untuk membuat vonis pengganti ketika analisis model tidak selesai.
+# error bernilai 'timeout' (deadline habis) atau 'failed'; vonis seperti ini tidak
+# disimpan di cache dan pemanggil memakai skor leksikal sebagai gantinya.
+def failed_verdict(error, analysis):
+    return {"analysis": analysis, "score": 0, "cache": None, "error": error}
+
+# Fungsi untuk membagi sumber menjadi batch yang muat di context window model
+def plan_batches(text, source_texts, context_window):
+    budget = context_window - BATCH_PROMPT_TOKENS - estimate_tokens(text)
+    batches = []
+    current, used = [], 0
+    for index, source_text in enumerate(source_texts):
+        # Setiap sumber memakan token input ditambah cadangan untuk jawabannya
+        cost = estimate_tokens(source_text) + BATCH_OUTPUT_TOKENS_PER_SOURCE
+        if current and (used + cost > budget or len(current) >= OLLAMA_MAX_BATCH_SIZE):
+            batches.append(current)
+            current, used = [], 0
+        current.append(index)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+# Fungsi untuk menganalisis teks dengan Ollama API: satu paragraf terhadap beberapa
+# sumber sekaligus dalam prompt batch, dengan fallback satu pasangan per prompt.
+# Mengembalikan (daftar vonis sesuai urutan source_texts, jumlah panggilan LLM).
+def analyze_with_ollama(text, source_texts, deadline=None, timings=None):
+    if not OLLAMA_ENABLED:
+        return [failed_verdict('failed', "Ollama analysis disabled") for _ in source_texts], 0
+
+    model = get_active_model()
+    verdicts = [None] * len(source_texts)
+    llm_calls = 0
+
+    # Ambil dari cache dulu; hanya pasangan yang belum ada yang dikirim ke model
+    pending = []
+    for index, source_text in enumerate(source_texts):
+        cached, cache_status = verdict_cache.get(model, PROMPT_VERSION, text, source_text)
+        if cached is not None:
+            verdicts[index] = {**cached, "cache": cache_status}
+        else:
+            pending.append(index)
+
+    fallback = []
+    context_window = get_context_window(model, deadline=deadline)
+    for batch in plan_batches(text, [source_texts[i] for i in pending], context_window):
+        batch = [pending[i] for i in batch]
+        if len(batch) == 1:
+            fallback.extend(batch)
             continue
-            
-        paragraph_results = []
+
+        sources_block = "\n\n".join(
+            f"SUMBER {number}:\n{source_texts[index]}" for number, index in enumerate(batch, start=1)
+        )
+        prompt = f"""ANALISIS KEMIRIPAN TEKS
+Bandingkan TEKS UTAMA dengan setiap SUMBER. Untuk setiap sumber berikan skor kemiripan 0-100 dan analisis singkat 1 kalimat.
+Jawab hanya dengan JSON: {{"results": [{{"source_id": <nomor sumber>, "score": <0-100>, "analysis": "<analisis>"}}]}}
+
+TEKS UTAMA:
+{text}
+
+{sources_block}"""
+
+        try:
+            llm_calls += 1
+            batch_verdicts = parse_batch_verdicts(
+                generate_json(model, prompt, deadline=deadline, timings=timings, kind='batch'),
+                set(range(1, len(batch) + 1))
+            )
+        except DeadlineExceeded:
+            for index in batch:
+                verdicts[index] = failed_verdict('timeout', "Error: batas waktu analisis terlampaui")
+            continue
+        except Exception as e:
+            logger.warning('batch_verdict_invalid', extra={'fields': {
+                'model': model, 'sources': len(batch), 'error': str(e)
+            }})
+            batch_verdicts = {}
+
+        for number, index in enumerate(batch, start=1):
+            if number in batch_verdicts:
+                verdict = batch_verdicts[number]
+                verdict_cache.put(model, PROMPT_VERSION, text, source_texts[index], verdict)
+                verdicts[index] = {**verdict, "cache": "miss"}
+            else:
+                fallback.append(index)
+
+    # Sumber yang tidak muat dalam batch atau tidak terjawab dengan valid
+    for index in fallback:
+        verdicts[index] = request_single_verdict(model, text, source_texts[index], deadline=deadline, timings=timings)
+        llm_calls += 1
+
+    return verdicts, llm_calls
+
+# Fungsi untuk membuat analisis bagi pasangan yang diputuskan tanpa LLM
+def describe_lexical_decision(lexical_score):
+    percent = round(lexical_score * 100, 2)
+    if lexical_score >= LEXICAL_COPY_THRESHOLD:
+        return f"Diputuskan secara leksikal: teks hampir identik dengan sumber (kemiripan leksikal {percent}%)."
+    return f"Diputuskan secara leksikal tanpa analisis model (kemiripan leksikal {percent}%)."
+
+# Fungsi untuk membuat analisis bagi pasangan yang analisis modelnya gagal
+def describe_lexical_fallback(lexical_score, error):
+    percent = round(lexical_score * 100, 2)
+    reason = "batas waktu analisis terlampaui" if error == 'timeout' else "analisis model gagal"
+    return f"Skor leksikal dipakai karena {reason} (kemiripan leksikal {percent}%)."
+
+# Fungsi untuk memilih paragraf dokumen yang cukup panjang untuk diperiksa.
+# include (opsional) membatasi ke nomor paragraf tertentu (indeks dari 0).
+def split_document_paragraphs(text, include=None):
+    return [
+        (i, paragraph) for i, paragraph in enumerate(split_into_paragraphs(text))
+        if len(paragraph.split()) >= MIN_PARAGRAPH_WORDS and (include is None or i in include)
+    ]
+
+# Fungsi untuk menyusun hasil satu paragraf, kecocokan diurutkan dari similarity tertinggi
+def build_paragraph_result(i, paragraph, paragraph_results):
+    paragraph_results.sort(key=lambda x: x['similarity'], reverse=True)
+    return {
+        'paragraph_number': i + 1,
+        'paragraph_text': paragraph[:300] + "..." if len(paragraph) > 300 else paragraph,
+        'matches': paragraph_results
+    }
+
+# Fungsi untuk menghitung pasangan yang tidak pernah dibandingkan karena paragraf
+# dokumen atau paragraf sumber lebih pendek dari MIN_PARAGRAPH_WORDS
+def count_length_skipped_pairs(text, sources, paragraphs, source_paragraphs):
+    document_total = len(paragraphs) + sum(
+        1 for paragraph in split_into_paragraphs(text) if len(paragraph.split()) < MIN_PARAGRAPH_WORDS
+    )
+    inline_kept = sum(1 for *_, source_id in source_paragraphs if source_id is None)
+    inline_total = sum(len(split_into_paragraphs(source_text)) for source_text in sources.values())
+    source_total = len(source_paragraphs) - inline_kept + inline_total
+    return document_total * source_total - len(paragraphs) * len(source_paragraphs)
+
+# Fungsi untuk memeriksa plagiarisme dalam dokumen paragraf demi paragraf.
+# Hasil setiap paragraf (juga yang tanpa kecocokan) dikembalikan segera setelah
+# selesai; statistik pipeline diisi ke dict `pipeline` milik pemanggil dan waktu
+# per tahap ke `timings` (RequestTimings, opsional).
+def iter_document_plagiarism(text, sources, pipeline, source_ids=None, use_corpus=False, include=None,
+                             timings=None):
+    timings = timings or RequestTimings()
+    with timings.stage('paragraph_splitting'):
+        # Pisahkan teks menjadi paragraf, abaikan paragraf terlalu pendek
+        paragraphs = split_document_paragraphs(text, include)
+
+        # Pisahkan setiap sumber inline menjadi paragraf sekali saja per request
+        source_paragraphs = []
         for source_name, source_text in sources.items():
-            # Pisahkan sumber menjadi paragraf juga
-            source_paragraphs = split_into_paragraphs(source_text)
-            
-            # Untuk setiap paragraf dalam sumber, hitung similarity dengan Ollama
-            for j, source_paragraph in enumerate(source_paragraphs):
-                if len(source_paragraph.split()) < 5:  # Abaikan paragraf terlalu pendek
-                    continue
-                    
-                # Analisis dengan Ollama untuk setiap pasangan paragraf
-                ollama_analysis = analyze_with_ollama(paragraph, source_paragraph)
-                similarity = ollama_analysis['score']
-                
-                if similarity > 0.3:  # Hanya tampilkan jika similarity > 30%
+            for j, source_paragraph in split_source_paragraphs(source_text):
+                source_paragraphs.append((source_name, j, source_paragraph, None))
+
+    with timings.stage('candidate_generation'):
+        # Sumber terdaftar sudah tersimpan per paragraf di korpus
+        if use_corpus:
+            source_paragraphs.extend(source_corpus.find_candidates([p for _, p in paragraphs]))
+        elif source_ids:
+            source_paragraphs.extend(source_corpus.get_paragraphs(source_ids=source_ids))
+
+        # Tahap 1: skor leksikal semua pasangan sekaligus
+        similarity_matrix = lexical_similarity_matrix(
+            [paragraph for _, paragraph in paragraphs],
+            [source_paragraph for _, _, source_paragraph, _ in source_paragraphs]
+        )
+        needs_llm = select_llm_candidates(
+            similarity_matrix,
+            top_k=LLM_TOP_K,
+            copy_threshold=LEXICAL_COPY_THRESHOLD,
+            unrelated_threshold=LEXICAL_UNRELATED_THRESHOLD,
+            ambiguity_band=LEXICAL_AMBIGUITY_BAND
+        )
+        if not OLLAMA_ENABLED:
+            needs_llm[:] = False
+
+    pipeline.update({
+        'paragraphs_total': len(paragraphs),
+        'pairs_total': int(similarity_matrix.size),
+        'pairs_llm': int(needs_llm.sum()),
+        'pairs_lexical': int(similarity_matrix.size - needs_llm.sum())
+    })
+    timings.count('pairs_considered', pipeline['pairs_total'])
+    timings.count('pairs_skipped_length', count_length_skipped_pairs(
+        text, sources, paragraphs, source_paragraphs
+    ))
+    timings.count('pairs_llm', pipeline['pairs_llm'])
+    timings.count('pairs_lexical', pipeline['pairs_lexical'])
+
+    # Tahap 2: kandidat LLM setiap paragraf dianalisis dalam prompt batch. Semua
+    # paragraf langsung dijadwalkan paralel dengan satu deadline bersama; hasil
+    # diambil per paragraf sesuai urutan dokumen
+    deadline = time.monotonic() + OLLAMA_REQUEST_DEADLINE
+    timeout_verdict = failed_verdict('timeout', "Error: batas waktu analisis terlampaui")
+    llm_columns = {row: needs_llm[row].nonzero()[0] for row in range(len(paragraphs)) if needs_llm[row].any()}
+    llm_futures = {
+        row: ollama_client.submit(
+            analyze_with_ollama, paragraphs[row][1],
+            [source_paragraphs[col][2] for col in columns], deadline=deadline, timings=timings
+        )
+        for row, columns in llm_columns.items()
+    }
+    cache_statuses = []
+    llm_calls = 0
+    llm_failures = {'timeout': 0, 'failed': 0}
+
+    try:
+        for row, (i, paragraph) in enumerate(paragraphs):
+            llm_verdicts = {}
+            if row in llm_futures:
+                columns = llm_columns[row]
+                with timings.stage('llm'):
+                    verdicts, calls = ollama_client.result(
+                        llm_futures[row], deadline=deadline, default=([timeout_verdict] * len(columns), 0)
+                    )
+                llm_verdicts = dict(zip(columns, verdicts))
+                llm_calls += calls
+
+            aggregation_start = time.perf_counter()
+            paragraph_results = []
+            paragraph_failures = 0
+            paragraph_fingerprint = fingerprint_text(paragraph, SPAN_KGRAM_SIZE)
+
+            # Hanya pasangan kandidat LLM atau yang lolos ambang leksikal
+            candidate_columns = (needs_llm[row] | (similarity_matrix[row] > MATCH_THRESHOLD)).nonzero()[0]
+            for col in candidate_columns:
+                source_name, j, source_paragraph, source_id = source_paragraphs[col]
+                lexical_score = float(similarity_matrix[row, col])
+
+                if needs_llm[row, col] and llm_verdicts[col].get('error'):
+                    # Model tidak memberi vonis: pakai skor leksikal yang sudah dihitung
+                    error = llm_verdicts[col]['error']
+                    llm_failures[error] += 1
+                    paragraph_failures += 1
+                    similarity = lexical_score
+                    analysis = describe_lexical_fallback(lexical_score, error)
+                    tier = 'lexical_fallback'
+                elif needs_llm[row, col]:
+                    ollama_analysis = llm_verdicts[col]
+                    cache_statuses.append(ollama_analysis.get('cache'))
+                    similarity = ollama_analysis['score']
+                    analysis = ollama_analysis['analysis']
+                    tier = 'llm'
+                else:
+                    similarity = lexical_score
+                    analysis = describe_lexical_decision(lexical_score)
+                    tier = 'lexical'
+
+                if similarity > MATCH_THRESHOLD:
+                    paragraph_spans, source_spans = overlap_spans(
+                        paragraph, source_paragraph, text_fingerprint=paragraph_fingerprint
+                    )
                     paragraph_results.append({
                         'source_name': source_name,
+                        'source_id': source_id,
                         'source_paragraph': j + 1,
                         'similarity': round(similarity * 100, 2),
+                        'lexical_similarity': round(lexical_score * 100, 2),
+                        'tier': tier,
                         'matched_text': source_paragraph[:200] + "..." if len(source_paragraph) > 200 else source_paragraph,
-                        'ai_analysis': ollama_analysis['analysis'],
+                        'matched_spans': describe_spans(source_paragraph, source_spans),
+                        'paragraph_spans': describe_spans(paragraph, paragraph_spans),
+                        'ai_analysis': analysis,
                     })
-        
-        # Urutkan hasil berdasarkan similarity tertinggi
-        paragraph_results.sort(key=lambda x: x['similarity'], reverse=True)
-        
-        if paragraph_results:
-            results.append({
-                'paragraph_number': i + 1,
-                'paragraph_text': paragraph[:300] + "..." if len(paragraph) > 300 else paragraph,
-                'matches': paragraph_results
+
+            result = build_paragraph_result(i, paragraph, paragraph_results)
+            if paragraph_failures:
+                # Hasil sementara: tidak dipakai ulang oleh pemeriksaan revisi berikutnya
+                result['llm_failures'] = paragraph_failures
+            timings.add_stage('aggregation', time.perf_counter() - aggregation_start)
+            yield result
+    finally:
+        # Pemeriksaan dibatalkan atau selesai: jangan jalankan analisis yang tersisa
+        for future in llm_futures.values():
+            future.cancel()
+
+    pipeline['llm_calls'] = llm_calls
+    pipeline['llm_timeouts'] = llm_failures['timeout']
+    pipeline['llm_errors'] = llm_failures['failed']
+    timings.count('pairs_llm_timeout', llm_failures['timeout'])
+    timings.count('pairs_llm_failed', llm_failures['failed'])
+    timings.count('cache_hits', sum(status in ('memory', 'disk') for status in cache_statuses))
+    timings.count('cache_misses', cache_statuses.count('miss'))
+    pipeline['cache'] = {
+        'hits': sum(status in ('memory', 'disk') for status in cache_statuses),
+        'memory_hits': cache_statuses.count('memory'),
+        'disk_hits': cache_statuses.count('disk'),
+        'misses': cache_statuses.count('miss'),
+        'process_totals': verdict_cache.get_stats()
+    }
+
+# Fungsi untuk memeriksa plagiarisme secara semantik (embedding + pencarian top-k cosine).
+# Protokolnya sama dengan iter_document_plagiarism.
+def iter_document_semantic(text, sources, pipeline, source_ids=None, use_corpus=False, include=None,
+                           timings=None):
+    timings = timings or RequestTimings()
+    with timings.stage('paragraph_splitting'):
+        paragraphs = split_document_paragraphs(text, include)
+        inline_paragraphs = [
+            (source_name, j, source_paragraph, None)
+            for source_name, source_text in sources.items()
+            for j, source_paragraph in split_source_paragraphs(source_text)
+        ]
+    pipeline.update({'paragraphs_total': len(paragraphs), 'pairs_total': 0, 'pairs_semantic': 0,
+                     'embedder': embedder.name})
+    if not paragraphs:
+        return
+
+    with timings.stage('candidate_generation'):
+        query_vectors = embedder.embed([paragraph for _, paragraph in paragraphs])
+        candidates = [[] for _ in paragraphs]
+
+        # Sumber inline di-embed per request lalu dicari dengan cara yang sama
+        if inline_paragraphs:
+            inline_vectors = embedder.embed([p for _, _, p, _ in inline_paragraphs])
+            indices, scores = top_k_cosine(query_vectors, inline_vectors, SEMANTIC_TOP_K)
+            for row in range(len(paragraphs)):
+                candidates[row].extend(
+                    (inline_paragraphs[col], float(score)) for col, score in zip(indices[row], scores[row])
+                )
+
+        # Sumber terdaftar dicari di matriks vektor yang di-memmap
+        if use_corpus or source_ids:
+            store = index_missing_paragraphs(query_vectors.shape[1])
+            hits = store.search(query_vectors, SEMANTIC_TOP_K, source_ids=None if use_corpus else source_ids)
+            corpus_paragraphs = source_corpus.get_paragraphs_by_id({p for row in hits for p, _ in row})
+            for row, row_hits in enumerate(hits):
+                candidates[row].extend(
+                    (corpus_paragraphs[p], score) for p, score in row_hits if p in corpus_paragraphs
+                )
+
+    pipeline['pairs_total'] = pipeline['pairs_semantic'] = sum(len(c) for c in candidates)
+    timings.count('pairs_considered', pipeline['pairs_total'])
+
+    for row, (i, paragraph) in enumerate(paragraphs):
+        aggregation_start = time.perf_counter()
+        paragraph_results = []
+        paragraph_fingerprint = fingerprint_text(paragraph, SPAN_KGRAM_SIZE)
+        for (source_name, j, source_paragraph, source_id), score in candidates[row]:
+            if score < SEMANTIC_THRESHOLD:
+                continue
+            paragraph_spans, source_spans = overlap_spans(
+                paragraph, source_paragraph, text_fingerprint=paragraph_fingerprint
+            )
+            paragraph_results.append({
+                'source_name': source_name,
+                'source_id': source_id,
+                'source_paragraph': j + 1,
+                'similarity': round(min(score, 1.0) * 100, 2),
+                'tier': 'semantic',
+                'matched_text': source_paragraph[:200] + "..." if len(source_paragraph) > 200 else source_paragraph,
+                'matched_spans': describe_spans(source_paragraph, source_spans),
+                'paragraph_spans': describe_spans(paragraph, paragraph_spans),
+                'ai_analysis': f"Kemiripan semantik (cosine embedding {embedder.name}).",
             })
+
+        result = build_paragraph_result(i, paragraph, paragraph_results)
+        timings.add_stage('aggregation', time.perf_counter() - aggregation_start)
+        yield result
+
+# Fungsi untuk memilih iterator pemeriksaan sesuai mode
+def iter_check(mode, text, sources, pipeline, source_ids=None, use_corpus=False, include=None, timings=None):
+    if mode == 'semantic':
+        return iter_document_semantic(text, sources, pipeline, source_ids=source_ids,
+                                      use_corpus=use_corpus, include=include, timings=timings)
+    return iter_document_plagiarism(text, sources, pipeline, source_ids=source_ids,
+                                    use_corpus=use_corpus, include=include, timings=timings)
+
+# Fungsi untuk menghitung skor keseluruhan dan status dari akumulasi similarity
+# paragraf yang sudah selesai (bisa dipanggil berulang selama pemeriksaan berjalan)
+def summarize_score(total_similarity, total_paragraphs):
+    overall_score = round(total_similarity / total_paragraphs, 2) if total_paragraphs > 0 else 0
     
-    return results
+    # Tentukan status plagiarisme
+    if overall_score >= 70:
+        status = "Tinggi (Kemungkinan Plagiarisme Tinggi)"
+    elif overall_score >= 40:
+        status = "Sedang (Perlu Pemeriksaan Lebih Lanjut)"
+    else:
+        status = "Rendah (Kemungkinan Original)"
+
+    return {
+        'overall_score': overall_score,
+        'status': status,
+        'total_paragraphs': total_paragraphs,
+        'details': f"Tingkat kesamaan keseluruhan adalah {overall_score}% dari {total_paragraphs} paragraf yang dianalisis"
+    }
+
+# Fungsi untuk membaca dan memvalidasi parameter pemeriksaan dari body JSON
+def parse_check_request(data):
+    data = data or {}
+    params = {
+        'text': data.get('text', ''),
+        'sources': data.get('sources', {}),
+        'source_ids': data.get('source_ids'),
+        'use_corpus': bool(data.get('use_corpus', False)),
+        'mode': data.get('mode', 'staged'),
+        'previous_check': None,
+        'timings': bool(data.get('timings', False))
+    }
+    if not params['text']:
+        raise ValueError('Teks harus diisi')
+    if params['mode'] not in ('staged', 'semantic'):
+        raise ValueError(f"Mode {params['mode']} tidak dikenal")
+
+    # Versi dokumen sebelumnya (opsional) untuk pemeriksaan ulang inkremental
+    previous_check_id = data.get('previous_check_id')
+    if previous_check_id:
+        params['previous_check'] = check_history.get(previous_check_id)
+        if params['previous_check'] is None:
+            raise ValueError('Pemeriksaan sebelumnya tidak ditemukan atau sudah kedaluwarsa')
+    return params
+
+# Fungsi untuk membuat kunci konfigurasi pemeriksaan. Hasil lama hanya dipakai
+# ulang jika sumber, model, prompt dan ambang yang dipakai sama persis.
+def check_config_key(params):
+    config = {
+        'mode': params['mode'],
+        'sources': {name: paragraph_hash(text) for name, text in params['sources'].items()},
+        'source_ids': sorted(params['source_ids'] or []),
+        'corpus': [source['id'] for source in source_corpus.list_sources()] if params['use_corpus'] else None,
+        'model': get_active_model(),
+        'cache_generation': get_cache_generation(get_active_model()),
+        'prompt_version': PROMPT_VERSION,
+        'embedder': embedder.name if params['mode'] == 'semantic' else None,
+        'thresholds': [MIN_PARAGRAPH_WORDS, MATCH_THRESHOLD, LEXICAL_COPY_THRESHOLD,
+                       LEXICAL_UNRELATED_THRESHOLD, list(LEXICAL_AMBIGUITY_BAND), LLM_TOP_K,
+                       SEMANTIC_TOP_K, SEMANTIC_THRESHOLD]
+    }
+    return paragraph_hash(json.dumps(config, sort_keys=True))
+
+# Fungsi untuk memakai ulang hasil paragraf lama pada posisi barunya
+def remap_paragraph_result(stored, i, paragraph, exact_hash):
+    result = build_paragraph_result(i, paragraph, [dict(match) for match in stored['result']['matches']])
+    if stored['exact_hash'] != exact_hash:
+        # Teks hanya berbeda huruf besar/spasi: rentang karakter lama tidak lagi tepat
+        for match in result['matches']:
+            match['paragraph_spans'] = []
+    result['reused_from_paragraph'] = stored['result']['paragraph_number']
+    return result
+
+# Fungsi untuk menjalankan pemeriksaan dan mengakumulasi skor paragraf demi paragraf.
+# on_paragraph(result, summary, done, total) dipanggil setiap paragraf selesai dan
+# boleh mengembalikan False untuk menghentikan pemeriksaan.
+def run_check(params, on_paragraph=None):
+    pipeline = {}
+    results = []
+    total_similarity = 0
+    completed = True
+    timings = RequestTimings()
+
+    with timings.stage('paragraph_splitting'):
+        paragraphs = split_document_paragraphs(params['text'])
+        hashes = [paragraph_hash(preprocess_text(paragraph)) for _, paragraph in paragraphs]
+        exact_hashes = [paragraph_hash(paragraph) for _, paragraph in paragraphs]
+    config_key = check_config_key(params)
+
+    # Paragraf yang tidak berubah sejak pemeriksaan sebelumnya tidak dianalisis lagi
+    reused = {}
+    diff = None
+    previous = params['previous_check']
+    if previous is not None:
+        diff, unchanged = diff_paragraphs([p['hash'] for p in previous['paragraphs']], hashes)
+        diff['previous_check_id'] = previous['id']
+        diff['config_changed'] = previous['config_key'] != config_key
+        if not diff['config_changed']:
+            # Paragraf yang analisis modelnya gagal/terpotong deadline dianalisis ulang
+            reused = {
+                new: previous['paragraphs'][old] for new, old in unchanged.items()
+                if not previous['paragraphs'][old].get('failed')
+            }
+
+    iterator = iter_check(
+        params['mode'], params['text'], params['sources'], pipeline,
+        source_ids=params['source_ids'], use_corpus=params['use_corpus'],
+        include={i for k, (i, _) in enumerate(paragraphs) if k not in reused},
+        timings=timings
+    )
+    stored = []
+    try:
+        for k, (i, paragraph) in enumerate(paragraphs):
+            if k in reused:
+                with timings.stage('aggregation'):
+                    result = remap_paragraph_result(reused[k], i, paragraph, exact_hashes[k])
+            else:
+                result = next(iterator)
+            stored.append({'hash': hashes[k], 'exact_hash': exact_hashes[k], 'result': result,
+                           'failed': bool(result.get('llm_failures'))})
+
+            if result['matches']:
+                results.append(result)
+                total_similarity += result['matches'][0]['similarity']
+            if on_paragraph is not None:
+                summary = summarize_score(total_similarity, len(results))
+                if on_paragraph(result, summary, k + 1, len(paragraphs)) is False:
+                    completed = False
+                    break
+        else:
+            # Habiskan iterator agar statistik pipeline di akhir ikut terisi
+            for _ in iterator:
+                pass
+    finally:
+        iterator.close()
+
+    response = summarize_score(total_similarity, len(results))
+    response.update({
+        'results': results,
+        'ollama_enabled': OLLAMA_ENABLED,
+        'mode': params['mode'],
+        'pipeline': pipeline,
+        'diff': diff,
+        'reuse': {
+            'paragraphs_total': len(paragraphs),
+            'paragraphs_reused': len(reused),
+            'paragraphs_analyzed': len(paragraphs) - len(reused),
+            'reused_ratio': round(len(reused) / len(paragraphs), 4) if paragraphs else 0
+        }
+    })
+    if completed:
+        with timings.stage('aggregation'):
+            response['check_id'] = check_history.save(config_key, stored)
+
+    timings.count('paragraphs_reused', len(reused))
+    timing_report = timings.finish()
+    if params['timings']:
+        response['timings'] = timing_report
+    logger.info('check_finished', extra={'fields': {
+        'mode': params['mode'],
+        'completed': completed,
+        'paragraphs': len(paragraphs),
+        'overall_score': response['overall_score'],
+        **timing_report
+    }})
+    return response, completed
 
 # API endpoint untuk deteksi plagiarisme
 @app.route('/api/check-plagiarism', methods=['POST'])
 def check_plagiarism():
     try:
-        data = request.get_json()
-        text = data.get('text', '')
-        sources = data.get('sources', {})
-        
-        if not text:
-            return jsonify({'error': 'Teks harus diisi'}), 00
+        try:
+            params = parse_check_request(request.get_json())
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         # Periksa plagiarisme
-        results = check_document_plagiarism(text, sources)
-        
-        # Hitung overall similarity score
-        total_similarity = 0
-        total_paragraphs = len(results)
-        
-        for result in results:
-            if result['matches']:
-                total_similarity += result['matches'][0]['similarity']
-        
-        overall_score = round(total_similarity / total_paragraphs, 2) if total_paragraphs > 0 else 0
-        
-        # Tentukan status plagiarisme
-        if overall_score >= 70:
-            status = "Tinggi (Kemungkinan Plagiarisme Tinggi)"
-        elif overall_score >= 40:
-            status = "Sedang (Perlu Pemeriksaan Lebih Lanjut)"
-        else:
-            status = "Rendah (Kemungkinan Original)"
-        
+        response, _ = run_check(params)
+        return jsonify(response)
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# Fungsi yang dijalankan worker latar belakang untuk satu job pemeriksaan
+def run_check_job(job, params):
+    job.progress = {'done': 0, 'total': len(split_document_paragraphs(params['text']))}
+    job.publish('started', {'progress': job.progress})
+
+    def on_paragraph(result, summary, done, total):
+        if job.cancel_requested:
+            return False
+        job.progress = {'done': done, 'total': total}
+        job.summary = summary
+        if result['matches']:
+            job.results.append(result)
+        job.publish('paragraph', {'progress': job.progress, 'summary': summary, 'result': result})
+        return True
+
+    response, completed = run_check(params, on_paragraph)
+    if not completed:
+        job.finish('cancelled', 'cancelled', {'progress': job.progress, 'summary': job.summary})
+        return
+    job.result = response
+    job.summary = {key: response[key] for key in ('overall_score', 'status', 'total_paragraphs', 'details')}
+    job.finish('completed', 'completed', response)
+
+# API endpoint untuk membuat job pemeriksaan asinkron
+@app.route('/api/jobs', methods=['POST'])
+def create_job():
+    try:
+        try:
+            params = parse_check_request(request.get_json())
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        try:
+            job = job_manager.submit(lambda job: run_check_job(job, params))
+        except QueueFull as e:
+            return jsonify({'error': str(e)}), 429
+
+        return jsonify({
+            'job_id': job.id,
+            'status': job.status,
+            'status_url': f'/api/jobs/{job.id}',
+            'events_url': f'/api/jobs/{job.id}/events'
+        }), 202
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# API endpoint untuk melihat status, progres dan hasil sementara sebuah job
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job tidak ditemukan'}), 404
+    return jsonify(job.to_dict())
+
+# API endpoint untuk membatalkan job
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return jsonify({'error': 'Job tidak ditemukan'}), 404
+    return jsonify({'success': True, 'job_id': job.id, 'status': job.status})
+
+# API endpoint untuk mengikuti hasil per paragraf secara streaming.
+# Format: Server-Sent Events (default) atau NDJSON (?format=ndjson).
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+def stream_job_events(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job tidak ditemukan'}), 404
+
+    stream_format = request.args.get('format', 'sse')
+    if stream_format not in ('sse', 'ndjson'):
+        return jsonify({'error': f'Format {stream_format} tidak dikenal'}), 400
+
+    # Klien SSE yang tersambung ulang mengirim Last-Event-ID
+    last_event_id = request.headers.get('Last-Event-ID')
+    try:
+        start = int(last_event_id) + 1 if last_event_id is not None else int(request.args.get('from', 0))
+    except ValueError:
+        return jsonify({'error': 'Last-Event-ID dan from harus berupa bilangan bulat'}), 400
+    if start < 0:
+        return jsonify({'error': 'Last-Event-ID dan from tidak boleh negatif'}), 400
+
+    def generate():
+        index = start
+        while True:
+            events = job.wait_events(index, timeout=JOB_KEEPALIVE_INTERVAL)
+            if not events:
+                if job.finished:
+                    return
+                # Jaga koneksi tetap hidup selama paragraf panjang dianalisis
+                yield ': keep-alive\n\n' if stream_format == 'sse' else '\n'
+                continue
+            for event in events:
+                if stream_format == 'sse':
+                    yield f"id: {event['id']}\nevent: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+                else:
+                    yield json.dumps(event) + '\n'
+            index += len(events)
+            if job.finished and index >= len(job.events):
+                return
+
+    mimetype = 'text/event-stream' if stream_format == 'sse' else 'application/x-ndjson'
+    return Response(generate(), mimetype=mimetype, headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+# Fungsi untuk mengubah daftar dokumen kohort menjadi dict nama -> teks. Nama yang
+# sama (misalnya banyak kiriman bernama essay.docx) diberi akhiran " (2)", " (3)", ...
+# agar tidak saling menimpa.
+def unique_document_names(documents):
+    named = {}
+    for i, doc in enumerate(documents):
+        base = doc.get('name') or f'Dokumen {i + 1}'
+        name, counter = base, 1
+        while name in named:
+            counter += 1
+            name = f"{base} ({counter})"
+        named[name] = doc.get('text', '')
+    return named
+
+# API endpoint untuk mendeteksi kolusi antar banyak kiriman sekaligus
+@app.route('/api/cohort-check', methods=['POST'])
+def cohort_check():
+    try:
+        data = request.get_json() or {}
+        documents = data.get('documents', {})
+        if isinstance(documents, list):
+            documents = unique_document_names(documents)
+
+        if len(documents) < 2:
+            return jsonify({'error': 'Minimal dua dokumen harus diisi'}), 400
+        if len(documents) > COHORT_MAX_DOCUMENTS:
+            return jsonify({'error': f'Maksimal {COHORT_MAX_DOCUMENTS} dokumen per pemeriksaan'}), 400
+
+        min_similarity = float(data.get('min_similarity', COHORT_MIN_SIMILARITY))
+        timings = RequestTimings()
+        with timings.stage('paragraph_splitting'):
+            split_documents = [(name, split_document_paragraphs(text)) for name, text in documents.items()]
+        with timings.stage('candidate_generation'):
+            pairs, stats = find_suspicious_pairs(
+                split_documents,
+                min_similarity=min_similarity,
+                top_pairs=int(data.get('top_pairs', COHORT_TOP_PAIRS)),
+                evidence_pairs=COHORT_EVIDENCE_PAIRS
+            )
+        timings.count('pairs_considered', stats['candidate_paragraph_pairs'])
+        timing_report = timings.finish()
+
         response = {
-            'overall_score': overall_score,
-            'status': status,
-            'total_paragraphs': total_paragraphs,
-            'results': results,
-            'ollama_enabled': OLLAMA_ENABLED,
-            'details': f"Tingkat kesamaan keseluruhan adalah {overall_score}% dari {total_paragraphs} paragraf yang dianalisis"
+            'pairs': pairs,
+            'stats': stats,
+            'details': f"Ditemukan {stats.get('suspicious_pairs', 0)} pasangan dokumen mencurigakan dari {stats['documents']} dokumen"
         }
-        
+        if data.get('timings'):
+            response['timings'] = timing_report
         return jsonify(response)
-    
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -252,27 +1012,121 @@ def upload_file():
         
         if file and allowed_file(file.filename):
             filename = secure_filename(file.filename)
-            file_id = str(uuid.uuid4())
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{file_id}_{filename}")
-            file.save(file_path)
-            
-            # Baca isi file
-            content = read_file(file_path, filename)
-            
-            # Hapus file setelah dibaca
-            os.remove(file_path)
-            
-            return jsonify({
+            extension = filename.rsplit('.', 1)[1].lower()
+            timings = RequestTimings()
+
+            with timings.stage('upload_parse'):
+                # Salin stream upload ke disk per chunk sambil menghitung hash isinya
+                file_path, file_hash = spool_upload(file.stream, app.config['UPLOAD_FOLDER'], suffix=f".{extension}")
+                try:
+                    # File yang sama sudah pernah diekstrak: pakai hasil cache
+                    content = text_cache.get(file_hash, extension)
+                    cached = content is not None
+                    if not cached:
+                        content = read_file(file_path, filename, executor=get_process_pool(INGEST_WORKERS))
+                        text_cache.put(file_hash, extension, content)
+                    file_size = os.path.getsize(file_path)
+                finally:
+                    # Hapus file setelah dibaca
+                    os.remove(file_path)
+
+            timings.count('upload_bytes', file_size)
+            timings.count('text_cache_hits' if cached else 'text_cache_misses')
+            timing_report = timings.finish()
+            logger.info('upload_parsed', extra={'fields': {
+                'extension': extension, 'cached': cached, **timing_report
+            }})
+
+            response = {
                 'success': True,
                 'content': content,
-                'filename': filename
-            })
+                'filename': filename,
+                'sha256': file_hash,
+                'cached': cached
+            }
+            if request.form.get('timings', '').lower() in ('1', 'true'):
+                response['timings'] = timing_report
+            return jsonify(response)
         
         return jsonify({'error': 'Tipe file tidak diizinkan'}), 400
     
+    except RequestEntityTooLarge:
+        return file_too_large(None)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Metrik latensi dan status untuk setiap request HTTP
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    REGISTRY.ensure_flusher()
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        HTTP_REQUESTS.inc(endpoint=endpoint, method=request.method, status=response.status_code)
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint, method=request.method)
+    return response
+
+# Endpoint metrik dalam format teks Prometheus
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+# Respons untuk upload yang melebihi MAX_CONTENT_LENGTH
+@app.errorhandler(RequestEntityTooLarge)
+def file_too_large(e):
+    limit_mb = app.config['MAX_CONTENT_LENGTH'] // (1024 * 1024)
+    return jsonify({'error': f'Ukuran file melebihi batas {limit_mb} MB'}), 413
+
+# API endpoint untuk mendaftarkan sumber referensi ke korpus
+@app.route('/api/sources', methods=['POST'])
+def add_source():
+    try:
+        data = request.get_json()
+        name = (data.get('name') or '').strip()
+        text = data.get('text', '')
+
+        if not name or not text.strip():
+            return jsonify({'error': 'Nama sumber dan teks sumber harus diisi'}), 400
+
+        paragraphs = split_source_paragraphs(text)
+        if not paragraphs:
+            return jsonify({'error': 'Sumber tidak memiliki paragraf yang cukup panjang'}), 400
+
+        source = source_corpus.add_source(name, paragraphs)
+
+        # Tambahkan vektor paragraf baru ke indeks semantik (boleh gagal, akan dilengkapi saat query)
+        try:
+            index_missing_paragraphs()
+        except Exception as e:
+            logger.warning('source_embedding_failed', extra={'fields': {'source_id': source['id'], 'error': str(e)}})
+
+        return jsonify({'success': True, 'source': source}), 201
+    except Exception as e:
+        return jsonify({'error': f'Gagal menambahkan sumber: {str(e)}'}), 500
+
+# API endpoint untuk melihat daftar sumber di korpus
+@app.route('/api/sources', methods=['GET'])
+def list_sources():
+    try:
+        return jsonify({'sources': source_corpus.list_sources()})
+    except Exception as e:
+        return jsonify({'error': f'Gagal mengambil daftar sumber: {str(e)}'}), 500
+
+# API endpoint untuk menghapus sumber dari korpus
+@app.route('/api/sources/<source_id>', methods=['DELETE'])
+def delete_source(source_id):
+    try:
+        if not source_corpus.delete_source(source_id):
+            return jsonify({'error': 'Sumber tidak ditemukan'}), 404
+        delete_source_from_stores(VECTOR_FOLDER, source_id)
+        return jsonify({'success': True, 'message': 'Sumber dihapus'})
+    except Exception as e:
+        return jsonify({'error': f'Gagal menghapus sumber: {str(e)}'}), 500
+
 # API endpoint untuk mendapatkan model Ollama yang tersedia
 @app.route('/api/ollama-models', methods=['GET'])
 def get_ollama_models():
@@ -280,12 +1134,12 @@ def get_ollama_models():
         if not OLLAMA_ENABLED:
             return jsonify({'error': 'Ollama tidak diaktifkan'}), 400
             
-        response = requests.get(f"{OLLAMA_BASE_URL}/api/tags")
+        response = ollama_client.get("/api/tags")
         if response.status_code != 200:
             return jsonify({'error': f'Ollama API error: {response.status_code}'}), 500
             
         data = response.json()
-        return jsonify({'models': data.get('models', [])})
+        return jsonify({'models': data.get('models', []), 'active_model': get_active_model()})
     except Exception as e:
         return jsonify({'error': f'Gagal mengambil model Ollama: {str(e)}'}), 500
 
@@ -298,12 +1152,13 @@ def change_ollama_model():
             
         data = request.get_json()
         model_name = data.get('model_name')
+        invalidate_cache = data.get('invalidate_cache', True)
         
         if not model_name:
             return jsonify({'error': 'Nama model harus disediakan'}), 400
             
         # Cek apakah model tersedia
-        response = requests.get(f"{OLLAMA_BASE_URL}/api/tags")
+        response = ollama_client.get("/api/tags")
         if response.status_code != 200:
             return jsonify({'error': f'Ollama API error: {response.status_code}'}), 500
             
@@ -313,22 +1168,77 @@ def change_ollama_model():
         if model_name not in available_models:
             return jsonify({'error': f'Model {model_name} tidak tersedia'}), 400
             
-        global OLLAMA_MODEL
-        OLLAMA_MODEL = model_name
+        runtime_state.set('ollama_model', model_name)
+
+        # Vonis lama milik model ini bisa berasal dari versi model sebelumnya.
+        # Generasi dinaikkan dulu agar LRU di semua worker tidak memakainya lagi,
+        # lalu baris lama di disk dihapus.
+        invalidated = 0
+        if invalidate_cache:
+            runtime_state.increment(f'verdict_generation:{model_name}')
+            invalidated = verdict_cache.invalidate_model(model_name)
         
-        return jsonify({'success': True, 'message': f'Model diubah menjadi {model_name}'})
+        return jsonify({
+            'success': True,
+            'message': f'Model diubah menjadi {model_name}',
+            'cache_invalidated': invalidated
+        })
     except Exception as e:
         return jsonify({'error': f'Gagal mengubah model: {str(e)}'}), 500
 
+# Fungsi pemanasan sebelum menerima trafik: muat library dan indeks lokal,
+# lengkapi indeks vektor korpus, baca context window dan muat model di Ollama.
+# Setiap langkah boleh gagal tanpa menghentikan server; hasilnya dicatat di log.
+def warm_up():
+    report = {}
+    start = time.perf_counter()
+
+    # Jalankan pipeline leksikal sekali agar import dan inisialisasi pertama tidak
+    # dibayar oleh request pertama
+    lexical_similarity_matrix(['pemanasan server'], ['pemanasan server'])
+    report['corpus_sources'] = len(source_corpus.list_sources())
+
+    # Seluruh langkah yang memanggil Ollama dibatasi WARMUP_TIMEOUT agar server
+    # tidak tertahan saat Ollama lambat atau korpus besar belum diindeks
+    deadline = time.monotonic() + WARMUP_TIMEOUT
+    if OLLAMA_ENABLED:
+        model = get_active_model()
+        report['model'] = model
+        try:
+            context_window = get_context_window(model, deadline=deadline)
+            report['context_window'] = context_window
+            # Request tanpa prompt hanya memuat model ke memori Ollama; num_ctx sama
+            # dengan panggilan analisis agar model tidak dimuat ulang
+            response = ollama_client.post(
+                "/api/generate", deadline=deadline,
+                json={"model": model, "keep_alive": OLLAMA_KEEP_ALIVE, "options": {"num_ctx": context_window}}
+            )
+            report['model_loaded'] = response.status_code == 200
+        except Exception as e:
+            report['model_loaded'] = False
+            report['model_error'] = str(e)
+
+    # Sisa waktu dipakai untuk mengindeks vektor korpus; yang belum selesai
+    # diindeks oleh pemeriksaan semantik pertama
+    try:
+        store = index_missing_paragraphs(deadline=deadline)
+        report['vector_rows'] = len(store.paragraph_ids())
+        report['vector_timed_out'] = time.monotonic() >= deadline
+    except DeadlineExceeded:
+        report['vector_timed_out'] = True
+    except Exception as e:
+        report['vector_error'] = str(e)
+
+    report['duration_ms'] = round((time.perf_counter() - start) * 1000, 2)
+    logger.info('warm_up_finished', extra={'fields': report})
+    return report
+
 def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 if __name__ == '__main__':
-    # Download NLTK data jika belum ada
-    try:
-        nltk.data.find('tokenizers/punkt')
-    except LookupError:
-        nltk.download('punkt')
-    
+    # Server pengembangan; untuk produksi jalankan: gunicorn -c gunicorn.conf.py wsgi:app
+    metrics_store.clear()
+    apply_configured_model()
     app.run(debug=True, port=5000)
@@ -0,0 +1,231 @@
+import argparse
+import json
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Pola untuk membaca teks dari prompt analisis di app.py
+SINGLE_PROMPT = re.compile(
+    r'TEKS 1 \(Yang Dicek\):\s*(.*?)\s*TEKS 2 \(Sumber\):\s*(.*?)\s*FORMAT OUTPUT', re.DOTALL
+)
+BATCH_MAIN_TEXT = re.compile(r'TEKS UTAMA:\n(.*?)\n\nSUMBER 1:\n', re.DOTALL)
+BATCH_SOURCE = re.compile(r'SUMBER (\d+):\n(.*?)(?=\n\nSUMBER \d+:\n|\Z)', re.DOTALL)
+WORD = re.compile(r'\w+')
+
+
+# Fungsi untuk menghitung skor kemiripan deterministik (Jaccard kata, 0-100)
+def jaccard_score(text_a, text_b):
+    words_a = set(WORD.findall(text_a.lower()))
+    words_b = set(WORD.findall(text_b.lower()))
+    if not words_a or not words_b:
+        return 0
+    return round(100 * len(words_a & words_b) / len(words_a | words_b))
+
+
+# Fungsi untuk membuat embedding deterministik (bag-of-words yang di-hash)
+def hash_embedding(text, dim):
+    vector = [0.0] * dim
+    for word in WORD.findall(text.lower()):
+        vector[zlib.crc32(word.encode('utf-8')) % dim] += 1.0
+    norm = sum(value * value for value in vector) ** 0.5 or 1.0
+    return [value / norm for value in vector]
+
+
+# Server pengganti Ollama untuk benchmark dan test: jawaban deterministik, latensi
+# dan jumlah slot paralel bisa diatur, dan setiap panggilan dihitung. Untuk test,
+# jawaban batch bisa dibuat rusak/tidak lengkap (batch_mode) dan beberapa POST
+# berikutnya bisa dibuat gagal sementara (fail_next).
+class FakeOllama:
+    def __init__(self, latency=0.05, latency_per_token=0.0, score_mode='jaccard', fixed_score=50,
+                 num_parallel=4, context_length=8192, embedding_dim=256, models=('llama3',),
+                 batch_mode='valid'):
+        self.latency = latency
+        self.latency_per_token = latency_per_token
+        self.score_mode = score_mode
+        self.fixed_score = fixed_score
+        self.context_length = context_length
+        self.embedding_dim = embedding_dim
+        self.models = list(models)
+        self.batch_mode = batch_mode  # 'valid', 'invalid' (bukan JSON) atau 'partial' (sumber terakhir hilang)
+        self._failures = []
+        # Seperti Ollama, permintaan di atas num_parallel menunggu slot kosong
+        self._slots = threading.Semaphore(num_parallel)
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {
+                'generate_calls': 0,
+                'batch_calls': 0,
+                'pairs_scored': 0,
+                'prompt_tokens': 0,
+                'embed_calls': 0,
+                'embed_inputs': 0,
+                'failed_calls': 0
+            }
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def _count(self, **values):
+        with self._lock:
+            for key, value in values.items():
+                self._stats[key] += value
+
+    # Jawab count POST berikutnya dengan status (misalnya 503) tanpa memprosesnya
+    def fail_next(self, count, status=503):
+        with self._lock:
+            self._failures.extend([status] * count)
+
+    def clear_failures(self):
+        with self._lock:
+            self._failures = []
+
+    def _next_failure(self):
+        with self._lock:
+            return self._failures.pop(0) if self._failures else None
+
+    def score(self, text, source_text):
+        if self.score_mode == 'fixed':
+            return self.fixed_score
+        return jaccard_score(text, source_text)
+
+    # Jawaban /api/generate untuk prompt batch ("TEKS UTAMA" + "SUMBER n") atau satu pasangan
+    def generate(self, prompt):
+        prompt_tokens = len(prompt) // 4 + 1
+        with self._slots:
+            time.sleep(self.latency + self.latency_per_token * prompt_tokens)
+
+        main_text = BATCH_MAIN_TEXT.search(prompt)
+        if main_text:
+            results = [
+                {'source_id': int(number), 'score': self.score(main_text.group(1), source_text),
+                 'analysis': 'Analisis sintetis (batch).'}
+                for number, source_text in BATCH_SOURCE.findall(prompt)
+            ]
+            if self.batch_mode == 'partial':
+                results = results[:-1]
+            self._count(generate_calls=1, batch_calls=1, pairs_scored=len(results), prompt_tokens=prompt_tokens)
+            content = {'results': results}
+        else:
+            texts = SINGLE_PROMPT.search(prompt)
+            score = self.score(texts.group(1), texts.group(2)) if texts else 0
+            self._count(generate_calls=1, pairs_scored=1, prompt_tokens=prompt_tokens)
+            content = {'score': score, 'analysis': 'Analisis sintetis.'}
+
+        response = json.dumps(content)
+        if main_text and self.batch_mode == 'invalid':
+            response = 'Berikut hasilnya: ' + response[:len(response) // 2]
+        duration = int((self.latency + self.latency_per_token * prompt_tokens) * 1e9)
+        return {
+            'response': response,
+            'done': True,
+            'total_duration': duration,
+            'prompt_eval_count': prompt_tokens,
+            'eval_count': len(response) // 4 + 1,
+            'eval_duration': duration // 2
+        }
+
+    def embed(self, inputs):
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        with self._slots:
+            time.sleep(self.latency)
+        self._count(embed_calls=1, embed_inputs=len(inputs))
+        return [hash_embedding(text, self.embedding_dim) for text in inputs]
+
+    def handle(self, method, path, body):
+        if method == 'POST':
+            status = self._next_failure()
+            if status is not None:
+                self._count(failed_calls=1)
+                return status, {'error': 'kegagalan sementara (disimulasikan)'}
+        if method == 'GET' and path == '/api/tags':
+            return 200, {'models': [{'name': f"{name}:latest", 'model': f"{name}:latest"} for name in self.models]}
+        if method == 'GET' and path == '/_stats':
+            return 200, self.stats()
+        if method == 'POST' and path == '/api/generate':
+            return 200, self.generate(body.get('prompt', ''))
+        if method == 'POST' and path == '/api/embed':
+            return 200, {'embeddings': self.embed(body.get('input', []))}
+        if method == 'POST' and path == '/api/embeddings':
+            return 200, {'embedding': self.embed(body.get('prompt', ''))[0]}
+        if method == 'POST' and path == '/api/show':
+            return 200, {'model_info': {'llama.context_length': self.context_length}}
+        return 404, {'error': f"path {path} tidak dikenal"}
+
+    def start(self, host='127.0.0.1', port=0):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Header dan body ditulis terpisah; tanpa ini Nagle + delayed ACK menambah ~40 ms
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _respond(self, method):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = json.loads(self.rfile.read(length)) if length else {}
+                status, content = fake.handle(method, self.path, body)
+                payload = json.dumps(content).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                try:
+                    self.wfile.write(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    # Klien sudah menyerah (timeout/deadline) sebelum jawaban selesai
+                    self.close_connection = True
+
+            def do_GET(self):
+                self._respond('GET')
+
+            def do_POST(self):
+                self._respond('POST')
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return f"http://{host}:{self._server.server_address[1]}"
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Server pengganti Ollama yang deterministik untuk benchmark")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=11434)
+    parser.add_argument('--latency', type=float, default=0.05, help="Latensi dasar per panggilan (detik)")
+    parser.add_argument('--latency-per-token', type=float, default=0.0, help="Tambahan latensi per token prompt (detik)")
+    parser.add_argument('--score-mode', choices=['jaccard', 'fixed'], default='jaccard')
+    parser.add_argument('--fixed-score', type=int, default=50)
+    parser.add_argument('--num-parallel', type=int, default=4)
+    parser.add_argument('--context-length', type=int, default=8192)
+    parser.add_argument('--batch-mode', choices=['valid', 'invalid', 'partial'], default='valid')
+    args = parser.parse_args()
+
+    fake = FakeOllama(
+        latency=args.latency, latency_per_token=args.latency_per_token, score_mode=args.score_mode,
+        fixed_score=args.fixed_score, num_parallel=args.num_parallel, context_length=args.context_length,
+        batch_mode=args.batch_mode
+    )
+    url = fake.start(args.host, args.port)
+    print(f"Fake Ollama berjalan di {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        fake.stop()
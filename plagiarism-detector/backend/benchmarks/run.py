@@ -0,0 +1,285 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.fake_ollama import FakeOllama  # noqa: E402
+from benchmarks.synthetic import UPLOAD_WRITERS, Vocabulary, build_check_case, build_paragraphs  # noqa: E402
+
+# Benchmark end-to-end backend terhadap server pengganti Ollama yang deterministik.
+# Contoh (dari folder backend):
+#   python -m benchmarks.run --sizes 10,100,1000 --output hasil.json
+#   python -m benchmarks.run --compare hasil_lama.json --output hasil_baru.json
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+# Fungsi untuk menjalankan fungsi sekali dan mengukur durasinya dan (opsional)
+# puncak alokasi memori Python. tracemalloc memperlambat eksekusi, jadi memori
+# diukur di putaran terpisah dari latensi.
+def measure(run, track_memory=False):
+    if track_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = run()
+    finally:
+        elapsed = time.perf_counter() - start
+        peak = None
+        if track_memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    return result, elapsed, peak
+
+
+class Benchmark:
+    def __init__(self, args):
+        self.args = args
+        self.workdir = tempfile.mkdtemp(prefix='plagiarism-bench-')
+        self.fake = FakeOllama(
+            latency=args.latency, latency_per_token=args.latency_per_token,
+            score_mode=args.score_mode, num_parallel=args.num_parallel,
+            context_length=args.context_length
+        )
+        self.base_url = self.fake.start()
+        self.vocabulary = Vocabulary(seed=args.seed)
+
+        # app membuat folder uploads/corpus/cache relatif terhadap cwd saat diimpor
+        os.chdir(self.workdir)
+        import app
+        from embeddings import OllamaEmbedder
+        from ollama_client import OllamaClient
+        self.app = app
+        app.OLLAMA_BASE_URL = self.base_url
+        app.OLLAMA_NUM_PARALLEL = args.num_parallel
+        app.ollama_client = OllamaClient(
+            self.base_url, num_parallel=args.num_parallel,
+            timeout=app.OLLAMA_TIMEOUT, max_retries=app.OLLAMA_MAX_RETRIES
+        )
+        if isinstance(app.embedder, OllamaEmbedder):
+            app.embedder = OllamaEmbedder(app.ollama_client, app.EMBEDDING_MODEL, batch_size=app.EMBEDDING_BATCH_SIZE)
+        self.client = app.app.test_client()
+        self._cache_generation = 0
+
+    # Ganti cache vonis dan cache teks dengan yang kosong agar setiap putaran "dingin"
+    def reset_caches(self):
+        from ingest import TextCache
+        from verdict_cache import VerdictCache
+        self._cache_generation += 1
+        folder = os.path.join(self.workdir, f"cache-{self._cache_generation}")
+        self.app.verdict_cache = VerdictCache(
+            os.path.join(folder, 'verdicts.db'),
+            max_memory_items=self.app.CACHE_MEMORY_ITEMS,
+            max_disk_items=self.app.CACHE_DISK_ITEMS,
+            ttl=self.app.CACHE_TTL
+        )
+        self.app.text_cache = TextCache(os.path.join(folder, 'text'))
+        self.app.model_context_windows.clear()
+
+    def post_check(self, case, mode):
+        response = self.client.post('/api/check-plagiarism', json={
+            'text': case['text'], 'sources': case['sources'], 'mode': mode, 'timings': True
+        })
+        data = response.get_json()
+        if response.status_code != 200:
+            raise RuntimeError(f"check-plagiarism gagal ({response.status_code}): {data}")
+        return data
+
+    def check_scenario(self, size, mode, warm):
+        case = build_check_case(
+            size, source_paragraphs=min(size, self.args.max_source_paragraphs),
+            seed=self.args.seed + size, vocabulary=self.vocabulary
+        )
+        self.reset_caches()
+        if warm:
+            self.post_check(case, mode)
+
+        self.fake.reset_stats()
+        data, elapsed, _ = measure(lambda: self.post_check(case, mode))
+        stats = self.fake.stats()
+
+        peak = None
+        if self.args.memory:
+            self.reset_caches()
+            if warm:
+                self.post_check(case, mode)
+            _, _, peak = measure(lambda: self.post_check(case, mode), track_memory=True)
+
+        pipeline = data.get('pipeline', {})
+        pairs = pipeline.get('pairs_total', 0)
+        return {
+            'scenario': f"check-{mode}-{'warm' if warm else 'cold'}",
+            'endpoint': '/api/check-plagiarism',
+            'paragraphs': size,
+            'source_paragraphs': min(size, self.args.max_source_paragraphs),
+            'latency_s': round(elapsed, 4),
+            'pairs_total': pairs,
+            'pairs_per_second': round(pairs / elapsed, 1) if elapsed else None,
+            'llm_calls': stats['generate_calls'],
+            'llm_calls_per_document': stats['generate_calls'],
+            'llm_pairs_scored': stats['pairs_scored'],
+            'embed_calls': stats['embed_calls'],
+            'prompt_tokens': stats['prompt_tokens'],
+            'peak_memory_mb': round(peak / 2 ** 20, 2) if peak is not None else None,
+            'overall_score': data.get('overall_score'),
+            'matched_paragraphs': len(data.get('results', [])),
+            'stages_ms': data.get('timings', {}).get('stages_ms'),
+            'pipeline': pipeline
+        }
+
+    def upload_scenario(self, size, extension):
+        paragraphs = build_paragraphs(size, seed=self.args.seed + size, vocabulary=self.vocabulary)
+        path = os.path.join(self.workdir, f"bench-{size}.{extension}")
+        UPLOAD_WRITERS[extension](path, paragraphs)
+        file_size = os.path.getsize(path)
+
+        def upload():
+            with open(path, 'rb') as f:
+                response = self.client.post(
+                    '/api/upload', data={'file': (f, os.path.basename(path))},
+                    content_type='multipart/form-data'
+                )
+            data = response.get_json()
+            if response.status_code != 200:
+                raise RuntimeError(f"upload gagal ({response.status_code}): {data}")
+            return data
+
+        self.reset_caches()
+        data, elapsed, _ = measure(upload)
+        # Unggahan kedua dengan isi yang sama dilayani dari cache teks
+        _, cached_elapsed, _ = measure(upload)
+
+        peak = None
+        if self.args.memory:
+            self.reset_caches()
+            _, _, peak = measure(upload, track_memory=True)
+
+        return {
+            'scenario': f"upload-{extension}",
+            'endpoint': '/api/upload',
+            'paragraphs': size,
+            'file_bytes': file_size,
+            'latency_s': round(elapsed, 4),
+            'cached_latency_s': round(cached_elapsed, 4),
+            'throughput_mb_s': round(file_size / 2 ** 20 / elapsed, 3) if elapsed else None,
+            'paragraphs_per_second': round(size / elapsed, 1) if elapsed else None,
+            'extracted_chars': len(data['content']),
+            'peak_memory_mb': round(peak / 2 ** 20, 2) if peak is not None else None
+        }
+
+    def run(self):
+        results = []
+        for size in self.args.sizes:
+            for mode in self.args.modes:
+                for warm in (False, True):
+                    print(f"check {mode} {'warm' if warm else 'cold'} {size} paragraf...", file=sys.stderr)
+                    results.append(self.check_scenario(size, mode, warm))
+            for extension in self.args.upload_formats:
+                print(f"upload {extension} {size} paragraf...", file=sys.stderr)
+                results.append(self.upload_scenario(size, extension))
+        return results
+
+    def close(self):
+        self.fake.stop()
+
+
+# Fungsi untuk membandingkan latensi dengan hasil benchmark sebelumnya
+def compare(previous, results):
+    old = {(r['scenario'], r['paragraphs']): r for r in previous['results']}
+    rows = []
+    for result in results:
+        before = old.get((result['scenario'], result['paragraphs']))
+        if before is None or not before.get('latency_s'):
+            continue
+        rows.append({
+            'scenario': result['scenario'],
+            'paragraphs': result['paragraphs'],
+            'latency_before_s': before['latency_s'],
+            'latency_after_s': result['latency_s'],
+            'latency_ratio': round(result['latency_s'] / before['latency_s'], 3),
+            'llm_calls_before': before.get('llm_calls'),
+            'llm_calls_after': result.get('llm_calls')
+        })
+    return {'commit': previous.get('commit'), 'rows': rows}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark pipeline deteksi plagiarisme")
+    parser.add_argument('--sizes', default='10,100,1000',
+                        help="Jumlah paragraf dokumen, dipisah koma (10 sampai 10000)")
+    parser.add_argument('--max-source-paragraphs', type=int, default=1000,
+                        help="Batas jumlah paragraf sumber per kasus")
+    parser.add_argument('--modes', default='staged', help="Mode pemeriksaan: staged, semantic")
+    parser.add_argument('--upload-formats', default='txt,docx,pdf')
+    parser.add_argument('--latency', type=float, default=0.05, help="Latensi fake Ollama per panggilan (detik)")
+    parser.add_argument('--latency-per-token', type=float, default=0.0)
+    parser.add_argument('--score-mode', choices=['jaccard', 'fixed'], default='jaccard')
+    parser.add_argument('--num-parallel', type=int, default=4)
+    parser.add_argument('--context-length', type=int, default=8192)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-memory', dest='memory', action='store_false',
+                        help="Lewati putaran pengukuran memori")
+    parser.add_argument('--output', default='benchmark-results.json')
+    parser.add_argument('--compare', help="File hasil sebelumnya untuk dibandingkan")
+    args = parser.parse_args(argv)
+    args.sizes = [int(size) for size in args.sizes.split(',') if size]
+    args.modes = [mode for mode in args.modes.split(',') if mode]
+    args.upload_formats = [ext for ext in args.upload_formats.split(',') if ext]
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    output = os.path.abspath(args.output)
+    previous = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+
+    benchmark = Benchmark(args)
+    try:
+        results = benchmark.run()
+    finally:
+        benchmark.close()
+
+    report = {
+        'commit': git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {
+            key: value for key, value in vars(args).items() if key not in ('output', 'compare')
+        },
+        'results': results
+    }
+    if previous is not None:
+        report['comparison'] = compare(previous, results)
+
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Hasil benchmark disimpan di {output}", file=sys.stderr)
+
+    if previous is not None:
+        for row in report['comparison']['rows']:
+            print(f"{row['scenario']:<24} {row['paragraphs']:>6} paragraf  "
+                  f"{row['latency_before_s']:.3f}s -> {row['latency_after_s']:.3f}s "
+                  f"(x{row['latency_ratio']})", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
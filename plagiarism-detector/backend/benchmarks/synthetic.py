@@ -0,0 +1,158 @@
+import random
+import textwrap
+
+import docx
+
+SYLLABLES = [
+    'ba', 'ka', 'da', 'ma', 'na', 'pa', 'ra', 'sa', 'ta', 'ja', 'la', 'ga',
+    'be', 'ke', 'de', 'me', 'ne', 'pe', 're', 'se', 'te', 'le', 'ge', 'ri',
+    'bi', 'ki', 'di', 'mi', 'ni', 'pi', 'si', 'ti', 'li', 'gu', 'ru', 'su',
+    'bu', 'ku', 'du', 'mu', 'nu', 'pu', 'tu', 'lu', 'ngan', 'kan', 'an', 'ran'
+]
+PARAGRAPH_KINDS = ('verbatim', 'paraphrase', 'unrelated')
+
+
+# Kosakata kata semu yang deterministik. Kata berindeks genap dan ganjil yang
+# berdampingan dipakai sebagai pasangan sinonim saat membuat parafrase.
+class Vocabulary:
+    def __init__(self, size=4000, seed=0):
+        rng = random.Random(seed)
+        words = set()
+        while len(words) < size:
+            words.add(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+        self.words = sorted(words)
+        rng.shuffle(self.words)
+        self.synonyms = {}
+        for i in range(0, len(self.words) - 1, 2):
+            self.synonyms[self.words[i]] = self.words[i + 1]
+            self.synonyms[self.words[i + 1]] = self.words[i]
+
+    def sentence(self, rng, min_words=8, max_words=16):
+        words = rng.choices(self.words, k=rng.randint(min_words, max_words))
+        return ' '.join(words).capitalize() + '.'
+
+    def paragraph(self, rng, min_sentences=3, max_sentences=6):
+        return ' '.join(self.sentence(rng) for _ in range(rng.randint(min_sentences, max_sentences)))
+
+
+# Fungsi untuk membuat parafrase: sebagian kata diganti sinonim dan urutan
+# kalimat ditukar, sehingga mirip secara makna tetapi tidak identik
+def paraphrase(paragraph, vocabulary, rng, rate=0.35):
+    sentences = []
+    for sentence in paragraph.split('. '):
+        words = sentence.rstrip('.').lower().split()
+        words = [
+            vocabulary.synonyms.get(word, word) if rng.random() < rate else word
+            for word in words
+        ]
+        sentences.append(' '.join(words).capitalize() + '.')
+    if len(sentences) > 1:
+        i = rng.randrange(len(sentences) - 1)
+        sentences[i], sentences[i + 1] = sentences[i + 1], sentences[i]
+    return ' '.join(sentences)
+
+
+# Fungsi untuk membuat satu kasus pemeriksaan: dokumen berisi n_paragraphs
+# paragraf (campuran salinan verbatim, parafrase dan teks tidak terkait) dan
+# sumber-sumber yang memuat paragraf aslinya di antara paragraf pengisi.
+def build_check_case(n_paragraphs, source_paragraphs=None, num_sources=5,
+                     mix=(0.2, 0.3, 0.5), seed=0, vocabulary=None):
+    rng = random.Random(seed)
+    vocabulary = vocabulary or Vocabulary(seed=seed)
+    source_paragraphs = source_paragraphs or n_paragraphs
+
+    document = []
+    labels = []
+    originals = []
+    for _ in range(n_paragraphs):
+        kind = rng.choices(PARAGRAPH_KINDS, weights=mix)[0]
+        if kind == 'unrelated' or len(originals) >= source_paragraphs:
+            kind = 'unrelated'
+            document.append(vocabulary.paragraph(rng))
+        else:
+            original = vocabulary.paragraph(rng)
+            originals.append(original)
+            document.append(original if kind == 'verbatim' else paraphrase(original, vocabulary, rng))
+        labels.append(kind)
+
+    # Sumber diisi paragraf asli ditambah pengisi sampai jumlah source_paragraphs
+    pool = originals + [vocabulary.paragraph(rng) for _ in range(source_paragraphs - len(originals))]
+    rng.shuffle(pool)
+    sources = {
+        f"sumber_{i + 1}": '\n\n'.join(pool[i::num_sources])
+        for i in range(min(num_sources, len(pool)))
+    }
+    return {
+        'text': '\n\n'.join(document),
+        'sources': sources,
+        'labels': labels,
+        'paragraphs': document
+    }
+
+
+# Fungsi untuk membuat daftar paragraf acak (dipakai untuk file upload)
+def build_paragraphs(n_paragraphs, seed=0, vocabulary=None):
+    rng = random.Random(seed)
+    vocabulary = vocabulary or Vocabulary(seed=seed)
+    return [vocabulary.paragraph(rng) for _ in range(n_paragraphs)]
+
+
+def write_txt(path, paragraphs):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n\n'.join(paragraphs))
+
+
+def write_docx(path, paragraphs):
+    document = docx.Document()
+    for paragraph in paragraphs:
+        document.add_paragraph(paragraph)
+    document.save(path)
+
+
+def _pdf_escape(line):
+    return line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+# Fungsi untuk menulis PDF teks sederhana (font standar Helvetica) tanpa
+# dependensi tambahan. Setiap paragraf dibungkus per baris dan dipisah baris kosong.
+def write_pdf(path, paragraphs, lines_per_page=50, chars_per_line=95):
+    lines = []
+    for paragraph in paragraphs:
+        lines.extend(textwrap.wrap(paragraph, chars_per_line))
+        lines.append('')
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+
+    objects = []
+    page_ids = []
+    for page_lines in pages:
+        text_ops = ' T* '.join(f"({_pdf_escape(line)}) Tj" for line in page_lines)
+        stream = f"BT /F1 10 Tf 12 TL 40 800 Td {text_ops} ET".encode('latin-1', errors='replace')
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects) + 3
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects) + 3)
+
+    kids = ' '.join(f"{page_id} 0 R" for page_id in page_ids).encode('ascii')
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % len(page_ids),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"
+    ] + objects
+
+    with open(path, 'wb') as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+        xref = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            f.write(b"%010d 00000 n \n" % offset)
+        f.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+
+
+UPLOAD_WRITERS = {'txt': write_txt, 'docx': write_docx, 'pdf': write_pdf}
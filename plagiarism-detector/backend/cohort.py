@@ -0,0 +1,115 @@
+from collections import defaultdict
+from itertools import combinations
+
+import numpy as np
+
+from corpus import fingerprint_text, lsh_buckets, minhash_signature, overlap_spans
+
+# Bucket LSH yang berisi paragraf dari lebih banyak dokumen dari ini dianggap
+# teks umum (misalnya soal tugas yang disalin semua mahasiswa) dan dilewati
+MAX_BUCKET_DOCUMENTS = 50
+
+
+# Fungsi untuk mencari pasangan dokumen yang mencurigakan dalam satu kelompok
+# kiriman. documents adalah daftar (nama, [(nomor_paragraf, teks), ...]).
+# Kandidat paragraf didapat dari join MinHash-LSH sehingga biaya sebanding dengan
+# jumlah pasangan kandidat, bukan kuadrat jumlah dokumen.
+def find_suspicious_pairs(documents, min_similarity=0.5, top_pairs=50, evidence_pairs=10,
+                          evidence_per_pair=5, max_bucket_documents=MAX_BUCKET_DOCUMENTS):
+    entries = []  # (indeks dokumen, nomor paragraf, teks)
+    signatures = []
+    buckets = defaultdict(list)
+    for doc_index, (_, paragraphs) in enumerate(documents):
+        for paragraph_number, paragraph in paragraphs:
+            entry = len(entries)
+            entries.append((doc_index, paragraph_number, paragraph))
+            signature = minhash_signature(fingerprint_text(paragraph)['hashes'])
+            signatures.append(signature)
+            for key in lsh_buckets(signature):
+                buckets[key].append(entry)
+
+    # Join: pasangan paragraf dari dokumen berbeda yang berbagi bucket
+    candidates = set()
+    skipped_buckets = 0
+    for members in buckets.values():
+        if len(members) < 2:
+            continue
+        if len({entries[e][0] for e in members}) > max_bucket_documents:
+            skipped_buckets += 1
+            continue
+        for a, b in combinations(members, 2):
+            if entries[a][0] != entries[b][0]:
+                candidates.add((a, b) if a < b else (b, a))
+
+    stats = {
+        'documents': len(documents),
+        'paragraphs': len(entries),
+        'candidate_paragraph_pairs': len(candidates),
+        'common_buckets_skipped': skipped_buckets
+    }
+    if not candidates:
+        return [], stats
+
+    # Verifikasi kandidat sekaligus: estimasi Jaccard dari kesamaan signature MinHash
+    pairs = np.array(sorted(candidates), dtype=np.int64)
+    signature_matrix = np.vstack(signatures)
+    similarity = (signature_matrix[pairs[:, 0]] == signature_matrix[pairs[:, 1]]).mean(axis=1)
+    keep = similarity >= min_similarity
+
+    # Kumpulkan kecocokan paragraf per pasangan dokumen
+    matches = defaultdict(list)
+    for (a, b), score in zip(pairs[keep], similarity[keep]):
+        doc_a, doc_b = entries[a][0], entries[b][0]
+        if doc_a > doc_b:
+            a, b, doc_a, doc_b = b, a, doc_b, doc_a
+        matches[(doc_a, doc_b)].append((a, b, float(score)))
+
+    report = []
+    for (doc_a, doc_b), paragraph_matches in matches.items():
+        # Skor = rata-rata similarity terbaik per paragraf pada dokumen yang lebih pendek
+        best_a = defaultdict(float)
+        best_b = defaultdict(float)
+        for a, b, score in paragraph_matches:
+            best_a[a] = max(best_a[a], score)
+            best_b[b] = max(best_b[b], score)
+        size_a = len(documents[doc_a][1])
+        size_b = len(documents[doc_b][1])
+        best = best_a if size_a <= size_b else best_b
+        score = sum(best.values()) / min(size_a, size_b)
+
+        report.append({
+            'document_a': documents[doc_a][0],
+            'document_b': documents[doc_b][0],
+            'score': round(score * 100, 2),
+            'matched_paragraphs': len(best),
+            'paragraphs_a': size_a,
+            'paragraphs_b': size_b,
+            '_matches': paragraph_matches
+        })
+
+    report.sort(key=lambda item: (item['score'], item['matched_paragraphs']), reverse=True)
+    report = report[:top_pairs]
+    stats['suspicious_pairs'] = len(matches)
+
+    # Bukti tingkat paragraf (dengan rentang teks yang sama) hanya untuk pasangan teratas
+    for rank, item in enumerate(report):
+        paragraph_matches = item.pop('_matches')
+        if rank >= evidence_pairs:
+            continue
+        paragraph_matches.sort(key=lambda match: match[2], reverse=True)
+        evidence = []
+        for a, b, score in paragraph_matches[:evidence_per_pair]:
+            text_a, text_b = entries[a][2], entries[b][2]
+            spans_a, spans_b = overlap_spans(text_a, text_b)
+            evidence.append({
+                'paragraph_a': entries[a][1] + 1,
+                'paragraph_b': entries[b][1] + 1,
+                'similarity': round(score * 100, 2),
+                'text_a': text_a[:300] + "..." if len(text_a) > 300 else text_a,
+                'text_b': text_b[:300] + "..." if len(text_b) > 300 else text_b,
+                'spans_a': [{'start': s, 'end': e, 'text': text_a[s:e]} for s, e in spans_a],
+                'spans_b': [{'start': s, 'end': e, 'text': text_b[s:e]} for s, e in spans_b]
+            })
+        item['evidence'] = evidence
+
+    return report, stats
@@ -0,0 +1,97 @@
+import os
+
+# Semua pengaturan bisa diganti lewat environment variable dengan nama yang
+# sama, misalnya OLLAMA_BASE_URL=http://ollama:11434 atau OLLAMA_ENABLED=false.
+
+
+def _env(name, default, cast=str):
+    value = os.environ.get(name)
+    if value is None or value.strip() == '':
+        return default
+    return cast(value.strip())
+
+
+def _bool(value):
+    return value.lower() in ('1', 'true', 'yes', 'on')
+
+
+def _float_pair(value):
+    low, high = (float(part) for part in value.split(','))
+    return low, high
+
+
+# Konfigurasi upload file
+UPLOAD_FOLDER = _env('UPLOAD_FOLDER', 'uploads')
+ALLOWED_EXTENSIONS = {'txt', 'pdf', 'docx'}
+MAX_CONTENT_LENGTH = _env('MAX_CONTENT_LENGTH', 50 * 1024 * 1024, int)  # Batas ukuran upload (50 MB)
+INGEST_WORKERS = _env('INGEST_WORKERS', None, int)  # Jumlah proses ekstraksi PDF paralel (None = jumlah CPU)
+TEXT_CACHE_ENTRIES = _env('TEXT_CACHE_ENTRIES', 5000, int)  # Jumlah teks hasil ekstraksi yang disimpan di cache
+
+# Konfigurasi korpus sumber persisten
+CORPUS_FOLDER = _env('CORPUS_FOLDER', 'corpus')
+
+# Konfigurasi mode semantik (embedding)
+VECTOR_FOLDER = _env('VECTOR_FOLDER', os.path.join(CORPUS_FOLDER, 'vectors'))
+EMBEDDING_BACKEND = _env('EMBEDDING_BACKEND', 'ollama')  # 'ollama' atau 'hashing' (deterministik, tanpa server model)
+EMBEDDING_MODEL = _env('EMBEDDING_MODEL', 'nomic-embed-text')
+EMBEDDING_BATCH_SIZE = _env('EMBEDDING_BATCH_SIZE', 32, int)
+SEMANTIC_TOP_K = _env('SEMANTIC_TOP_K', 5, int)  # Jumlah paragraf sumber terdekat per paragraf
+SEMANTIC_THRESHOLD = _env('SEMANTIC_THRESHOLD', 0.6, float)  # Cosine minimal agar dilaporkan sebagai kecocokan
+
+# Konfigurasi Ollama
+OLLAMA_BASE_URL = _env('OLLAMA_BASE_URL', "http://localhost:11434")
+# Model awal; pilihan dari /api/change-model disimpan di RUNTIME_DB dan bertahan setelah
+# restart, kecuali OLLAMA_MODEL diset eksplisit di environment (pilihan tersimpan dibuang)
+OLLAMA_MODEL = _env('OLLAMA_MODEL', "llama3")
+OLLAMA_ENABLED = _env('OLLAMA_ENABLED', True, _bool)  # Set False untuk nonaktifkan Ollama
+OLLAMA_NUM_PARALLEL = _env('OLLAMA_NUM_PARALLEL', 4, int)  # Samakan dengan OLLAMA_NUM_PARALLEL di server Ollama
+OLLAMA_TIMEOUT = _env('OLLAMA_TIMEOUT', 120, float)  # Timeout per panggilan (detik)
+OLLAMA_REQUEST_DEADLINE = _env('OLLAMA_REQUEST_DEADLINE', 600, float)  # Batas waktu seluruh analisis LLM per request (detik)
+OLLAMA_MAX_RETRIES = _env('OLLAMA_MAX_RETRIES', 3, int)  # Jumlah retry untuk kegagalan sementara
+OLLAMA_NUM_CTX = _env('OLLAMA_NUM_CTX', 8192, int)  # Context window maksimum yang diminta ke model
+OLLAMA_MAX_BATCH_SIZE = _env('OLLAMA_MAX_BATCH_SIZE', 8, int)  # Jumlah sumber maksimum per panggilan batch
+OLLAMA_KEEP_ALIVE = _env('OLLAMA_KEEP_ALIVE', '30m')  # Lama model tetap dimuat setelah pemanasan
+BATCH_PROMPT_TOKENS = 200  # Perkiraan token instruksi prompt batch
+BATCH_OUTPUT_TOKENS_PER_SOURCE = 80  # Cadangan token jawaban per sumber
+PROMPT_VERSION = 'v2'  # Naikkan jika prompt analisis diubah agar cache lama tidak dipakai
+
+# Konfigurasi cache vonis LLM
+CACHE_FOLDER = _env('CACHE_FOLDER', 'cache')
+CACHE_MEMORY_ITEMS = _env('CACHE_MEMORY_ITEMS', 10000, int)  # Jumlah entri LRU di memori per proses
+CACHE_DISK_ITEMS = _env('CACHE_DISK_ITEMS', 500000, int)  # Jumlah entri maksimum di SQLite
+CACHE_TTL = _env('CACHE_TTL', 30 * 24 * 3600, int)  # Umur entri cache (detik)
+HISTORY_MAX_AGE = _env('HISTORY_MAX_AGE', 30 * 24 * 3600, int)  # Lama riwayat pemeriksaan disimpan untuk pemeriksaan ulang (detik)
+
+# Konfigurasi pipeline bertingkat (penyaringan leksikal sebelum Ollama)
+MIN_PARAGRAPH_WORDS = _env('MIN_PARAGRAPH_WORDS', 5, int)  # Paragraf lebih pendek dari ini diabaikan
+MATCH_THRESHOLD = _env('MATCH_THRESHOLD', 0.3, float)  # Hanya tampilkan kecocokan dengan similarity > 30%
+LEXICAL_COPY_THRESHOLD = _env('LEXICAL_COPY_THRESHOLD', 0.85, float)  # Di atas ini dianggap jelas disalin, tanpa LLM
+LEXICAL_UNRELATED_THRESHOLD = _env('LEXICAL_UNRELATED_THRESHOLD', 0.15, float)  # Di bawah ini dianggap jelas tidak terkait, tanpa LLM
+LEXICAL_AMBIGUITY_BAND = _env('LEXICAL_AMBIGUITY_BAND', (0.35, 0.85), _float_pair)  # Pasangan di rentang ini selalu dikirim ke LLM
+LLM_TOP_K = _env('LLM_TOP_K', 3, int)  # Jumlah kandidat teratas per paragraf yang dikirim ke LLM
+
+# Konfigurasi mode kohort (deteksi kolusi antar kiriman)
+COHORT_MAX_DOCUMENTS = _env('COHORT_MAX_DOCUMENTS', 1000, int)  # Jumlah dokumen maksimum per request
+COHORT_MIN_SIMILARITY = _env('COHORT_MIN_SIMILARITY', 0.5, float)  # Estimasi Jaccard minimal agar paragraf dianggap cocok
+COHORT_TOP_PAIRS = _env('COHORT_TOP_PAIRS', 50, int)  # Jumlah pasangan dokumen dalam laporan
+COHORT_EVIDENCE_PAIRS = _env('COHORT_EVIDENCE_PAIRS', 10, int)  # Jumlah pasangan teratas yang disertai bukti paragraf
+
+# Konfigurasi job pemeriksaan asinkron
+JOB_MAX_RUNNING = _env('JOB_MAX_RUNNING', 2, int)  # Job yang boleh berjalan bersamaan per worker
+JOB_MAX_QUEUED = _env('JOB_MAX_QUEUED', 20, int)  # Job yang boleh menunggu; lebih dari ini ditolak (429)
+JOB_RETENTION = _env('JOB_RETENTION', 3600, int)  # Lama hasil job disimpan setelah selesai (detik)
+JOB_KEEPALIVE_INTERVAL = _env('JOB_KEEPALIVE_INTERVAL', 15, int)  # Interval keep-alive stream (detik)
+JOB_STALE_AFTER = _env('JOB_STALE_AFTER', 900, int)  # Job tanpa kabar selama ini dianggap mati (worker berhenti)
+
+# Konfigurasi state bersama antar worker (model aktif, job)
+RUNTIME_DB = _env('RUNTIME_DB', os.path.join(CACHE_FOLDER, 'runtime.db'))
+RUNTIME_REFRESH_INTERVAL = _env('RUNTIME_REFRESH_INTERVAL', 1.0, float)  # Maksimal umur nilai yang dibaca ulang (detik)
+
+# Konfigurasi server produksi
+WARMUP_ENABLED = _env('WARMUP_ENABLED', True, _bool)  # Pemanasan model dan indeks sebelum menerima trafik
+WARMUP_TIMEOUT = _env('WARMUP_TIMEOUT', 30, float)  # Batas waktu seluruh pemanasan: model dan indeks vektor (detik)
+
+# Konfigurasi observabilitas
+LOG_LEVEL = _env('LOG_LEVEL', 'INFO')  # Log aplikasi ditulis sebagai JSON satu baris per event
+METRICS_DB = _env('METRICS_DB', os.path.join(CACHE_FOLDER, 'metrics.db'))  # Metrik semua worker digabung lewat file ini
+METRICS_FLUSH_INTERVAL = _env('METRICS_FLUSH_INTERVAL', 5.0, float)  # Interval tiap worker menulis metriknya (detik)
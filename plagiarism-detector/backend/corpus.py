@@ -0,0 +1,376 @@
+import hashlib
+import math
+import os
+import time
+import uuid
+import zlib
+from collections import Counter, defaultdict
+
+import numpy as np
+
+import db
+
+# Parameter fingerprint (winnowing) dan MinHash-LSH
+KGRAM_SIZE = 5  # Panjang k-gram karakter untuk MinHash (setelah normalisasi)
+SPAN_KGRAM_SIZE = 10  # Panjang k-gram benih untuk rentang kecocokan
+MIN_SPAN_LENGTH = 20  # Rentang yang lebih pendek (karakter alfanumerik, sekitar 3-4 kata) dianggap kebetulan
+FINGERPRINT_KGRAM_SIZE = 30  # Panjang k-gram fingerprint di indeks; k-gram pendek terlalu sering muncul kebetulan
+WINNOW_WINDOW = 8  # Ukuran jendela winnowing (salinan >= 37 karakter pasti terdeteksi)
+NUM_PERMUTATIONS = 64  # Panjang signature MinHash
+LSH_BANDS = 16  # NUM_PERMUTATIONS harus habis dibagi LSH_BANDS
+MIN_SHARED_FINGERPRINTS = 2  # Minimal fingerprint yang sama agar jadi kandidat
+MIN_SHARED_FRACTION = 0.03  # ... dan minimal bagian ini dari fingerprint paragraf yang diperiksa
+MAX_FINGERPRINT_PARAGRAPHS = 50  # Fingerprint yang muncul di lebih banyak paragraf dianggap boilerplate dan diabaikan
+INDEX_VERSION = 2  # Naikkan jika cara menghitung fingerprint diubah agar indeks dibangun ulang
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_rng = np.random.RandomState(42)
+_PERM_A = _rng.randint(1, 1 << 31, NUM_PERMUTATIONS).astype(np.uint64)
+_PERM_B = _rng.randint(0, 1 << 31, NUM_PERMUTATIONS).astype(np.uint64)
+
+# Batas parameter per query SQLite
+_SQL_CHUNK = 900
+
+
+# Fungsi untuk menormalkan teks (huruf kecil, hanya alfanumerik) sambil
+# menyimpan posisi setiap karakter di teks asli
+def normalize_with_offsets(text):
+    chars = []
+    offsets = []
+    for index, char in enumerate(text):
+        if char.isalnum():
+            chars.append(char.lower())
+            offsets.append(index)
+    return ''.join(chars), offsets
+
+
+# Fungsi untuk menghitung hash semua k-gram (hash stabil antar proses)
+def kgram_hashes(normalized, k=KGRAM_SIZE):
+    return [
+        zlib.crc32(normalized[i:i + k].encode('utf-8'))
+        for i in range(len(normalized) - k + 1)
+    ]
+
+
+# Fungsi winnowing: pilih hash minimum di setiap jendela sebagai fingerprint.
+# Mengembalikan daftar (hash, posisi k-gram pada teks yang dinormalkan).
+def winnow(hashes, window=WINNOW_WINDOW):
+    if len(hashes) <= window:
+        return [(h, i) for i, h in enumerate(hashes)]
+
+    fingerprints = []
+    last_position = -1
+    for start in range(len(hashes) - window + 1):
+        # Pilih minimum paling kanan agar jendela berikutnya bisa memakai ulang
+        window_hashes = hashes[start:start + window]
+        minimum = min(window_hashes)
+        position = start + window - 1 - window_hashes[::-1].index(minimum)
+        if position != last_position:
+            fingerprints.append((minimum, position))
+            last_position = position
+    return fingerprints
+
+
+# Fungsi untuk menghitung hash k-gram sebuah paragraf (untuk MinHash dan rentang kecocokan)
+def fingerprint_text(text, k=KGRAM_SIZE):
+    normalized, offsets = normalize_with_offsets(text)
+    return {
+        'hashes': kgram_hashes(normalized, k),
+        'offsets': offsets
+    }
+
+
+# Fungsi untuk menghitung himpunan fingerprint winnowing yang disimpan di indeks korpus
+def index_fingerprints(text, k=FINGERPRINT_KGRAM_SIZE, window=WINNOW_WINDOW):
+    normalized, _ = normalize_with_offsets(text)
+    return {h for h, _ in winnow(kgram_hashes(normalized, k), window)}
+
+
+# Fungsi untuk menghitung signature MinHash dari himpunan hash k-gram
+def minhash_signature(hashes):
+    if not hashes:
+        return np.full(NUM_PERMUTATIONS, _MAX_HASH, dtype=np.uint64)
+    values = np.unique(np.asarray(hashes, dtype=np.uint64))
+    permuted = (values[:, None] * _PERM_A + _PERM_B) % _MERSENNE_PRIME & _MAX_HASH
+    return permuted.min(axis=0)
+
+
+# Fungsi untuk memecah signature menjadi bucket LSH per band
+def lsh_buckets(signature, bands=LSH_BANDS):
+    rows = len(signature) // bands
+    buckets = []
+    for band in range(bands):
+        digest = hashlib.blake2b(signature[band * rows:(band + 1) * rows].tobytes(), digest_size=8).digest()
+        # SQLite INTEGER bertanda 64-bit, jadi gunakan 63 bit
+        buckets.append((band, int.from_bytes(digest, 'big') >> 1))
+    return buckets
+
+
+# Fungsi untuk mencari run k-gram yang bersambung di kedua teks sekaligus (satu
+# diagonal). Mengembalikan daftar (posisi di teks, posisi di sumber, panjang) pada
+# teks yang dinormalkan.
+def _aligned_runs(text_hashes, source_hashes, k):
+    source_positions = defaultdict(list)
+    for j, h in enumerate(source_hashes):
+        source_positions[h].append(j)
+
+    runs = []
+    active = {}  # selisih posisi (diagonal) -> [awal di teks, awal di sumber, k-gram terakhir di teks]
+    for i, h in enumerate(text_hashes):
+        for j in source_positions.get(h, ()):
+            run = active.get(i - j)
+            if run is not None and run[2] == i - 1:
+                run[2] = i
+            else:
+                run = [i, j, i]
+                active[i - j] = run
+                runs.append(run)
+    return [(start, source_start, last - start + k) for start, source_start, last in runs]
+
+
+# Fungsi untuk menandai karakter yang menjadi awal dan akhir kata di teks yang dinormalkan
+def _word_boundaries(text, offsets):
+    starts = [offset == 0 or not text[offset - 1].isalnum() for offset in offsets]
+    ends = [offset + 1 == len(text) or not text[offset + 1].isalnum() for offset in offsets]
+    return starts, ends
+
+
+# Fungsi untuk menggabungkan rentang yang bertumpuk menjadi rentang karakter pada teks asli
+def _merge_spans(intervals, offsets):
+    spans = []
+    for start, end in sorted(intervals):
+        if spans and start <= spans[-1][1]:
+            spans[-1][1] = max(spans[-1][1], end)
+        else:
+            spans.append([start, end])
+    return [[offsets[start], offsets[end - 1] + 1] for start, end in spans]
+
+
+# Fungsi untuk mencari rentang teks yang sama persis antara dua teks. Hanya run
+# yang cocok di kedua sisi (sejajar), dipotong ke batas kata, dan minimal
+# MIN_SPAN_LENGTH karakter yang dilaporkan; potongan pendek seperti "an yang"
+# muncul di hampir semua pasangan paragraf dan bukan bukti penyalinan.
+def overlap_spans(text, source_text, text_fingerprint=None, source_fingerprint=None,
+                  k=SPAN_KGRAM_SIZE, min_length=MIN_SPAN_LENGTH):
+    text_fingerprint = text_fingerprint or fingerprint_text(text, k)
+    source_fingerprint = source_fingerprint or fingerprint_text(source_text, k)
+    text_offsets = text_fingerprint['offsets']
+    source_offsets = source_fingerprint['offsets']
+    text_starts, text_ends = _word_boundaries(text, text_offsets)
+    source_starts, source_ends = _word_boundaries(source_text, source_offsets)
+
+    text_intervals = []
+    source_intervals = []
+    for i, j, length in _aligned_runs(text_fingerprint['hashes'], source_fingerprint['hashes'], k):
+        # Potong run agar mulai dan berakhir di batas kata pada kedua teks
+        first, last = 0, length
+        while first < last and not (text_starts[i + first] and source_starts[j + first]):
+            first += 1
+        while last > first and not (text_ends[i + last - 1] and source_ends[j + last - 1]):
+            last -= 1
+        if last - first >= min_length:
+            text_intervals.append((i + first, i + last))
+            source_intervals.append((j + first, j + last))
+
+    return _merge_spans(text_intervals, text_offsets), _merge_spans(source_intervals, source_offsets)
+
+
+# Korpus sumber persisten: paragraf, fingerprint winnowing dan indeks MinHash-LSH
+# disimpan di SQLite sehingga sumber cukup diunggah sekali.
+class SourceCorpus:
+    def __init__(self, folder):
+        self.folder = folder
+        self.db_path = os.path.join(folder, 'corpus.db')
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+        with self._connect() as conn:
+            conn.executescript("""
+                PRAGMA journal_mode=WAL;
+                CREATE TABLE IF NOT EXISTS sources (
+                    id TEXT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    paragraph_count INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS paragraphs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    source_id TEXT NOT NULL,
+                    paragraph_index INTEGER NOT NULL,
+                    text TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS fingerprints (
+                    hash INTEGER NOT NULL,
+                    paragraph_id INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS fingerprint_counts (
+                    hash INTEGER PRIMARY KEY,
+                    paragraphs INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS lsh (
+                    band INTEGER NOT NULL,
+                    bucket INTEGER NOT NULL,
+                    paragraph_id INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_paragraphs_source ON paragraphs (source_id);
+                CREATE INDEX IF NOT EXISTS idx_fingerprints_hash ON fingerprints (hash);
+                CREATE INDEX IF NOT EXISTS idx_fingerprints_paragraph ON fingerprints (paragraph_id);
+                CREATE INDEX IF NOT EXISTS idx_lsh_bucket ON lsh (band, bucket);
+                CREATE INDEX IF NOT EXISTS idx_lsh_paragraph ON lsh (paragraph_id);
+            """)
+            if conn.execute("PRAGMA user_version").fetchone()[0] < INDEX_VERSION:
+                self._rebuild_fingerprints(conn)
+                conn.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+
+    # Korpus adalah data pengguna: tetap fsync di setiap commit
+    def _connect(self):
+        return db.connect(self.db_path, synchronous='FULL')
+
+    # Bangun ulang tabel fingerprint dari teks paragraf (setelah INDEX_VERSION berubah)
+    def _rebuild_fingerprints(self, conn):
+        conn.execute("DELETE FROM fingerprints")
+        conn.execute("DELETE FROM fingerprint_counts")
+        for paragraph_id, text in conn.execute("SELECT id, text FROM paragraphs").fetchall():
+            self._insert_fingerprints(conn, paragraph_id, index_fingerprints(text))
+
+    def _insert_fingerprints(self, conn, paragraph_id, fingerprints):
+        conn.executemany(
+            "INSERT INTO fingerprints (hash, paragraph_id) VALUES (?, ?)",
+            [(h, paragraph_id) for h in fingerprints]
+        )
+        conn.executemany(
+            "INSERT INTO fingerprint_counts (hash, paragraphs) VALUES (?, 1) "
+            "ON CONFLICT (hash) DO UPDATE SET paragraphs = paragraphs + 1",
+            [(h,) for h in fingerprints]
+        )
+
+    # Tambahkan sumber baru; paragraf sudah dipisah oleh pemanggil
+    def add_source(self, name, paragraphs):
+        source_id = str(uuid.uuid4())
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO sources (id, name, created_at, paragraph_count) VALUES (?, ?, ?, ?)",
+                (source_id, name, time.time(), len(paragraphs))
+            )
+            for index, paragraph in paragraphs:
+                cursor = conn.execute(
+                    "INSERT INTO paragraphs (source_id, paragraph_index, text) VALUES (?, ?, ?)",
+                    (source_id, index, paragraph)
+                )
+                paragraph_id = cursor.lastrowid
+                self._insert_fingerprints(conn, paragraph_id, index_fingerprints(paragraph))
+                conn.executemany(
+                    "INSERT INTO lsh (band, bucket, paragraph_id) VALUES (?, ?, ?)",
+                    [(band, bucket, paragraph_id)
+                     for band, bucket in lsh_buckets(minhash_signature(fingerprint_text(paragraph)['hashes']))]
+                )
+        return self.get_source(source_id)
+
+    def get_source(self, source_id):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id, name, created_at, paragraph_count FROM sources WHERE id = ?",
+                (source_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {'id': row[0], 'name': row[1], 'created_at': row[2], 'paragraphs': row[3]}
+
+    def list_sources(self):
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, name, created_at, paragraph_count FROM sources ORDER BY created_at"
+            ).fetchall()
+        return [{'id': r[0], 'name': r[1], 'created_at': r[2], 'paragraphs': r[3]} for r in rows]
+
+    def delete_source(self, source_id):
+        with self._connect() as conn:
+            paragraph_ids = "SELECT id FROM paragraphs WHERE source_id = ?"
+            conn.execute(f"""
+                UPDATE fingerprint_counts SET paragraphs = paragraphs - (
+                    SELECT COUNT(*) FROM fingerprints f
+                    WHERE f.hash = fingerprint_counts.hash AND f.paragraph_id IN ({paragraph_ids})
+                )
+                WHERE hash IN (SELECT hash FROM fingerprints WHERE paragraph_id IN ({paragraph_ids}))
+            """, (source_id, source_id))
+            conn.execute("DELETE FROM fingerprint_counts WHERE paragraphs <= 0")
+            conn.execute(f"DELETE FROM fingerprints WHERE paragraph_id IN ({paragraph_ids})", (source_id,))
+            conn.execute(f"DELETE FROM lsh WHERE paragraph_id IN ({paragraph_ids})", (source_id,))
+            conn.execute("DELETE FROM paragraphs WHERE source_id = ?", (source_id,))
+            deleted = conn.execute("DELETE FROM sources WHERE id = ?", (source_id,)).rowcount
+        return deleted > 0
+
+    # Ambil baris paragraf (source_name, paragraph_index, text, source_id, paragraph_id)
+    def _select_paragraphs(self, source_ids=None, paragraph_ids=None):
+        query = """
+            SELECT s.name, p.paragraph_index, p.text, s.id, p.id
+            FROM paragraphs p JOIN sources s ON s.id = p.source_id
+        """
+        if source_ids is not None:
+            keys, column = list(source_ids), 's.id'
+        elif paragraph_ids is not None:
+            keys, column = list(paragraph_ids), 'p.id'
+        else:
+            keys, column = None, None
+
+        rows = []
+        with self._connect() as conn:
+            if keys is None:
+                rows = conn.execute(query).fetchall()
+            else:
+                for start in range(0, len(keys), _SQL_CHUNK):
+                    chunk = keys[start:start + _SQL_CHUNK]
+                    placeholders = ','.join('?' * len(chunk))
+                    rows.extend(conn.execute(
+                        query + f" WHERE {column} IN ({placeholders})", chunk
+                    ).fetchall())
+        rows.sort(key=lambda r: (r[3], r[1]))
+        return rows
+
+    # Ambil paragraf sumber sebagai daftar (source_name, paragraph_index, text, source_id)
+    def get_paragraphs(self, source_ids=None, paragraph_ids=None):
+        return [tuple(row[:4]) for row in self._select_paragraphs(source_ids, paragraph_ids)]
+
+    # Ambil paragraf sumber sebagai dict paragraph_id -> (source_name, paragraph_index, text, source_id)
+    def get_paragraphs_by_id(self, paragraph_ids):
+        return {row[4]: tuple(row[:4]) for row in self._select_paragraphs(paragraph_ids=paragraph_ids)}
+
+    # Ambil paragraf yang ditambahkan setelah last_id sebagai (paragraph_id, source_id, text).
+    # Id paragraf tidak pernah dipakai ulang (AUTOINCREMENT), jadi cukup membaca lewat primary key.
+    def get_unindexed_paragraphs(self, last_id=0):
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT id, source_id, text FROM paragraphs WHERE id > ? ORDER BY id", (last_id,)
+            ).fetchall()
+
+    # Cari paragraf kandidat di seluruh korpus untuk setiap paragraf yang diperiksa.
+    # Kandidat berasal dari tabrakan bucket LSH atau fingerprint winnowing yang sama,
+    # keduanya lewat indeks sehingga tidak perlu memindai seluruh korpus.
+    # Fingerprint boilerplate (muncul di lebih dari MAX_FINGERPRINT_PARAGRAPHS
+    # paragraf) dilewati agar jumlah baris yang dibaca per paragraf tetap terbatas.
+    def find_candidates(self, paragraphs):
+        candidate_ids = set()
+        with self._connect() as conn:
+            for paragraph in paragraphs:
+                for band, bucket in lsh_buckets(minhash_signature(fingerprint_text(paragraph)['hashes'])):
+                    candidate_ids.update(row[0] for row in conn.execute(
+                        "SELECT paragraph_id FROM lsh WHERE band = ? AND bucket = ?", (band, bucket)
+                    ))
+
+                hashes = list(index_fingerprints(paragraph))
+                required = max(MIN_SHARED_FINGERPRINTS, math.ceil(len(hashes) * MIN_SHARED_FRACTION))
+                shared = Counter()
+                for start in range(0, len(hashes), _SQL_CHUNK):
+                    chunk = hashes[start:start + _SQL_CHUNK]
+                    placeholders = ','.join('?' * len(chunk))
+                    shared.update(row[0] for row in conn.execute(
+                        f"""SELECT f.paragraph_id FROM fingerprint_counts c
+                            JOIN fingerprints f ON f.hash = c.hash
+                            WHERE c.hash IN ({placeholders}) AND c.paragraphs <= ?""",
+                        chunk + [MAX_FINGERPRINT_PARAGRAPHS]
+                    ))
+                candidate_ids.update(
+                    paragraph_id for paragraph_id, count in shared.items()
+                    if count >= required
+                )
+        return self.get_paragraphs(paragraph_ids=candidate_ids) if candidate_ids else []
@@ -0,0 +1,25 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+_local = threading.local()
+
+
+# Fungsi untuk memakai koneksi SQLite milik thread ini dalam satu transaksi.
+# Koneksi dipakai ulang, tidak ditutup setiap operasi: menutup koneksi terakhir
+# ke database WAL memicu checkpoint dan fsync (puluhan ms per operasi). Koneksi
+# dibuat ulang setelah fork agar worker tidak memakai koneksi milik proses induk.
+# synchronous=NORMAL dalam mode WAL tetap konsisten, hanya tidak fsync di setiap commit.
+@contextmanager
+def connect(db_path, synchronous='NORMAL'):
+    if getattr(_local, 'pid', None) != os.getpid():
+        _local.pid = os.getpid()
+        _local.connections = {}
+    conn = _local.connections.get(db_path)
+    if conn is None:
+        conn = sqlite3.connect(db_path, timeout=30)
+        conn.execute(f"PRAGMA synchronous={synchronous}")
+        _local.connections[db_path] = conn
+    with conn:
+        yield conn
@@ -0,0 +1,235 @@
+import os
+import threading
+import time
+
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+
+try:
+    import fcntl  # Kunci file antar worker (tidak tersedia di Windows)
+except ImportError:
+    fcntl = None
+
+# Jumlah baris matriks yang diproses sekaligus saat pencarian
+SEARCH_CHUNK_ROWS = 65536
+# Jumlah paragraf yang di-embed dan ditulis sekaligus saat mengindeks korpus
+INDEX_BATCH_ROWS = 256
+
+
+# Fungsi untuk menormalkan vektor (L2) agar perkalian titik = cosine
+def normalize_rows(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+# Embedder melalui endpoint embeddings Ollama, dikirim per batch
+class OllamaEmbedder:
+    def __init__(self, client, model, batch_size=32):
+        self.client = client
+        self.model = model
+        self.batch_size = batch_size
+        self.name = f"ollama-{model}"
+
+    def embed(self, texts, deadline=None):
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            response = self.client.post(
+                "/api/embed",
+                deadline=deadline,
+                json={"model": self.model, "input": texts[start:start + self.batch_size]}
+            )
+            response.raise_for_status()
+            vectors.extend(response.json()['embeddings'])
+        return normalize_rows(vectors)
+
+
+# Embedder deterministik tanpa server model (feature hashing n-gram karakter),
+# dipakai sebagai fallback dan untuk pengujian
+class HashingEmbedder:
+    def __init__(self, dim=512):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+        self._vectorizer = HashingVectorizer(
+            n_features=dim, analyzer='char_wb', ngram_range=(3, 5),
+            alternate_sign=False, norm=None
+        )
+
+    def embed(self, texts, deadline=None):
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return normalize_rows(self._vectorizer.transform(texts).toarray())
+
+
+# Fungsi untuk mencari top-k cosine dari setiap query terhadap sebuah matriks.
+# Mengembalikan (indeks, skor) berbentuk (jumlah query, k), urut menurun.
+def top_k_cosine(queries, matrix, k, row_mask=None):
+    queries = np.asarray(queries, dtype=np.float32)
+    n_rows = matrix.shape[0]
+    k = min(k, n_rows)
+    if k == 0 or len(queries) == 0:
+        return np.zeros((len(queries), 0), dtype=np.int64), np.zeros((len(queries), 0), dtype=np.float32)
+
+    best_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+    best_indices = np.zeros((len(queries), k), dtype=np.int64)
+    for start in range(0, n_rows, SEARCH_CHUNK_ROWS):
+        chunk = np.asarray(matrix[start:start + SEARCH_CHUNK_ROWS])
+        scores = queries @ chunk.T
+        if row_mask is not None:
+            scores[:, ~row_mask[start:start + len(chunk)]] = -np.inf
+
+        # Gabungkan kandidat terbaik sebelumnya dengan chunk ini
+        merged_scores = np.concatenate([best_scores, scores], axis=1)
+        merged_indices = np.concatenate(
+            [best_indices, np.broadcast_to(np.arange(start, start + len(chunk)), scores.shape)], axis=1
+        )
+        top = np.argpartition(-merged_scores, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(merged_scores, top, axis=1)
+        best_indices = np.take_along_axis(merged_indices, top, axis=1)
+
+    order = np.argsort(-best_scores, axis=1)
+    return np.take_along_axis(best_indices, order, axis=1), np.take_along_axis(best_scores, order, axis=1)
+
+
+# Penyimpanan vektor sumber: matriks float32 di file biner yang dibaca lewat
+# np.memmap (dibagi antar worker tanpa disalin) dan file sidecar berisi
+# (paragraph_id, source_id) per baris. Penambahan bersifat append-only;
+# penghapusan sumber dicatat di file tombstone.
+class VectorStore:
+    def __init__(self, folder, name, dim):
+        self.dim = dim
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+        base = os.path.join(folder, name)
+        self.vectors_path = base + '.f32'
+        self.ids_path = base + '.ids'
+        self.deleted_path = base + '.deleted'
+        self.lock_path = base + '.lock'
+        self._lock = threading.Lock()
+        self._index_lock = threading.Lock()
+        self._loaded_size = None
+        self._matrix = None
+        self._paragraph_ids = None
+        self._source_ids = None
+        self._active = None
+        for path in (self.vectors_path, self.ids_path, self.deleted_path):
+            if not os.path.exists(path):
+                open(path, 'a').close()
+
+    def _file_lock(self, handle):
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+
+    # Tambahkan vektor baru di akhir file (tanpa menulis ulang isi lama)
+    def append(self, paragraph_ids, source_ids, vectors):
+        vectors = self._check_vectors(vectors)
+        with self._lock, open(self.lock_path, 'a') as lock_handle:
+            self._file_lock(lock_handle)
+            self._write(paragraph_ids, source_ids, vectors)
+
+    # Embed dan tambahkan paragraf yang belum ada di store. fetch_missing(last_id)
+    # mengembalikan (paragraph_id, source_id, text) dengan id > last_id (id paragraf
+    # korpus selalu naik). Semuanya berjalan di bawah kunci file agar thread atau
+    # worker lain yang mengindeks bersamaan tidak menambah paragraf yang sama.
+    # Paragraf ditulis per batch sesuai urutan id; jika deadline habis, batch yang
+    # sudah ditulis tetap tersimpan dan sisanya diindeks pada panggilan berikutnya.
+    # Mengembalikan jumlah paragraf yang ditambahkan.
+    def append_missing(self, fetch_missing, embed, deadline=None):
+        added = 0
+        with self._index_lock, open(self.lock_path, 'a') as lock_handle:
+            self._file_lock(lock_handle)
+            with self._lock:
+                self._refresh()
+                last_id = int(self._paragraph_ids.max()) if len(self._paragraph_ids) else 0
+            missing = fetch_missing(last_id)
+            for start in range(0, len(missing), INDEX_BATCH_ROWS):
+                if deadline is not None and time.monotonic() >= deadline:
+                    break
+                batch = missing[start:start + INDEX_BATCH_ROWS]
+                vectors = self._check_vectors(embed([text for _, _, text in batch]))
+                with self._lock:
+                    self._write([p for p, _, _ in batch], [s for _, s, _ in batch], vectors)
+                added += len(batch)
+        return added
+
+    def _check_vectors(self, vectors):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if vectors.shape[1:] != (self.dim,):
+            raise ValueError(f"Dimensi vektor {vectors.shape[1:]} tidak sesuai dengan {self.dim}")
+        return vectors
+
+    # Tulis baris baru; pemanggil sudah memegang kunci file
+    def _write(self, paragraph_ids, source_ids, vectors):
+        with open(self.vectors_path, 'ab') as f:
+            f.write(vectors.tobytes())
+        with open(self.ids_path, 'a', encoding='utf-8') as f:
+            f.writelines(f"{p}\t{s}\n" for p, s in zip(paragraph_ids, source_ids))
+
+    def delete_source(self, source_id):
+        with self._lock, open(self.deleted_path, 'a', encoding='utf-8') as f:
+            f.write(f"{source_id}\n")
+
+    # Muat ulang memmap hanya jika file berubah (misalnya ditambah worker lain)
+    def _refresh(self):
+        size = (os.path.getsize(self.vectors_path), os.path.getsize(self.ids_path),
+                os.path.getsize(self.deleted_path))
+        if size == self._loaded_size:
+            return
+
+        with open(self.ids_path, encoding='utf-8') as f:
+            rows = [line.rstrip('\n').split('\t') for line in f if line.strip()]
+        with open(self.deleted_path, encoding='utf-8') as f:
+            deleted = {line.strip() for line in f if line.strip()}
+
+        # Baris yang vektornya belum selesai ditulis diabaikan
+        n_rows = min(len(rows), size[0] // (4 * self.dim))
+        rows = rows[:n_rows]
+        self._paragraph_ids = np.array([int(p) for p, _ in rows], dtype=np.int64)
+        self._source_ids = [s for _, s in rows]
+        self._active = np.array([s not in deleted for s in self._source_ids], dtype=bool)
+        self._matrix = (
+            np.memmap(self.vectors_path, dtype=np.float32, mode='r', shape=(n_rows, self.dim))
+            if n_rows else np.zeros((0, self.dim), dtype=np.float32)
+        )
+        self._loaded_size = size
+
+    def paragraph_ids(self):
+        with self._lock:
+            self._refresh()
+            return set(self._paragraph_ids[self._active].tolist())
+
+    # Cari top-k paragraf sumber untuk setiap vektor query.
+    # Mengembalikan per query daftar (paragraph_id, skor cosine).
+    def search(self, queries, k, source_ids=None):
+        with self._lock:
+            self._refresh()
+            matrix, paragraph_ids = self._matrix, self._paragraph_ids
+            mask = self._active
+            if source_ids is not None:
+                allowed = set(source_ids)
+                mask = mask & np.array([s in allowed for s in self._source_ids], dtype=bool)
+
+        indices, scores = top_k_cosine(queries, matrix, k, row_mask=mask)
+        return [
+            [(int(paragraph_ids[i]), float(score)) for i, score in zip(row_indices, row_scores)
+             if np.isfinite(score)]
+            for row_indices, row_scores in zip(indices, scores)
+        ]
+
+
+# Fungsi untuk mencatat penghapusan sumber di semua penyimpanan vektor dalam folder,
+# termasuk store embedder lain dan store yang belum pernah dibuka proses ini.
+# Instance VectorStore di worker mana pun membaca ulang file tombstone saat berubah.
+def delete_source_from_stores(folder, source_id):
+    if not os.path.isdir(folder):
+        return
+    for filename in sorted(os.listdir(folder)):
+        if not filename.endswith('.ids'):
+            continue
+        base = os.path.join(folder, filename[:-len('.ids')])
+        with open(base + '.lock', 'a') as lock_handle:
+            if fcntl is not None:
+                fcntl.flock(lock_handle.fileno(), fcntl.LOCK_EX)
+            with open(base + '.deleted', 'a', encoding='utf-8') as f:
+                f.write(f"{source_id}\n")
@@ -0,0 +1,49 @@
+import multiprocessing
+import os
+
+# Konfigurasi gunicorn untuk produksi: gunicorn -c gunicorn.conf.py wsgi:application
+# Semua nilai bisa diganti lewat environment variable.
+#
+# Catatan: cache LRU vonis dan kapasitas eksekusi job (JOB_MAX_RUNNING) per
+# worker. Model aktif, generasi cache vonis (pembatalan lewat /api/change-model
+# berlaku di semua worker), status job, metrik /metrics, cache vonis di disk,
+# korpus dan riwayat dibagi lewat SQLite.
+
+bind = os.environ.get('BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+
+# Thread per worker: request menunggu Ollama (I/O), dan stream SSE job menahan
+# satu thread selama job berjalan
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+
+# Aplikasi dimuat sekali di master sebelum fork, sehingga library dan indeks
+# yang sudah dipanaskan dibagi ke semua worker (copy-on-write)
+preload_app = True
+
+# Harus lebih panjang dari OLLAMA_REQUEST_DEADLINE agar request yang sedang
+# menunggu LLM tidak dibunuh di tengah jalan
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 660))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 60))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', None)
+loglevel = os.environ.get('LOG_LEVEL', 'info').lower()
+
+
+# Panaskan model dan indeks di master sebelum worker mulai menerima trafik.
+# Metrik dari proses server sebelumnya dibuang agar counter mulai dari nol, dan
+# OLLAMA_MODEL yang diset eksplisit menggantikan model pilihan dari /api/change-model.
+def when_ready(server):
+    import app
+    from config import WARMUP_ENABLED
+    app.metrics_store.clear()
+    app.apply_configured_model()
+    if WARMUP_ENABLED:
+        app.warm_up()
+
+
+# Session HTTP ke Ollama dan thread pool tidak boleh dibagi antar proses
+def post_fork(server, worker):
+    import app
+    app.ollama_client.reset()
@@ -0,0 +1,86 @@
+import hashlib
+import json
+import os
+import time
+import uuid
+from difflib import SequenceMatcher
+
+import db
+
+
+# Fungsi untuk menghitung hash paragraf yang sudah dinormalkan
+def paragraph_hash(normalized_paragraph):
+    return hashlib.sha256(normalized_paragraph.encode('utf-8')).hexdigest()
+
+
+# Fungsi untuk membandingkan daftar hash paragraf versi lama dan baru.
+# Mengembalikan (ringkasan diff, dict indeks_baru -> indeks_lama untuk paragraf
+# yang tidak berubah).
+def diff_paragraphs(old_hashes, new_hashes):
+    summary = {'added': 0, 'removed': 0, 'changed': 0, 'unchanged': 0}
+    unchanged = {}
+    matcher = SequenceMatcher(a=old_hashes, b=new_hashes, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            summary['unchanged'] += i2 - i1
+            unchanged.update(zip(range(j1, j2), range(i1, i2)))
+        elif tag == 'replace':
+            # Paragraf yang saling menggantikan dihitung berubah, sisanya tambah/hapus
+            changed = min(i2 - i1, j2 - j1)
+            summary['changed'] += changed
+            summary['removed'] += (i2 - i1) - changed
+            summary['added'] += (j2 - j1) - changed
+        elif tag == 'delete':
+            summary['removed'] += i2 - i1
+        elif tag == 'insert':
+            summary['added'] += j2 - j1
+    return summary, unchanged
+
+
+# Riwayat pemeriksaan: hasil per paragraf beserta hash-nya disimpan agar kiriman
+# revisi hanya perlu menganalisis paragraf yang berubah.
+class CheckHistory:
+    def __init__(self, db_path, max_age=30 * 24 * 3600):
+        self.db_path = db_path
+        self.max_age = max_age
+        folder = os.path.dirname(db_path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        with self._connect() as conn:
+            conn.executescript("""
+                PRAGMA journal_mode=WAL;
+                CREATE TABLE IF NOT EXISTS checks (
+                    id TEXT PRIMARY KEY,
+                    config_key TEXT NOT NULL,
+                    paragraphs TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_checks_created ON checks (created_at);
+            """)
+
+    def _connect(self):
+        return db.connect(self.db_path)
+
+    # Simpan pemeriksaan; paragraphs adalah daftar {'hash', 'result'} sesuai urutan dokumen
+    def save(self, config_key, paragraphs):
+        check_id = str(uuid.uuid4())
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO checks (id, config_key, paragraphs, created_at) VALUES (?, ?, ?, ?)",
+                (check_id, config_key, json.dumps(paragraphs), now)
+            )
+            conn.execute("DELETE FROM checks WHERE created_at <= ?", (now - self.max_age,))
+        return check_id
+
+    # Ambil pemeriksaan yang belum kedaluwarsa (yang lebih tua dari max_age baru
+    # dihapus saat save berikutnya, jadi umur tetap diperiksa di sini)
+    def get(self, check_id):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT config_key, paragraphs FROM checks WHERE id = ? AND created_at > ?",
+                (check_id, time.time() - self.max_age)
+            ).fetchone()
+        if row is None:
+            return None
+        return {'id': check_id, 'config_key': row[0], 'paragraphs': json.loads(row[1])}
@@ -0,0 +1,181 @@
+import hashlib
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+# Parser dokumen (docx, PyPDF2, textract) diimpor saat pertama dipakai agar
+# proses web cepat siap menerima request
+
+# Ukuran chunk saat menyalin upload dan membaca file teks
+CHUNK_SIZE = 1024 * 1024
+# PDF dengan jumlah halaman sebanyak ini atau lebih diekstrak paralel
+PDF_PARALLEL_MIN_PAGES = 32
+PDF_PAGES_PER_TASK = 16
+# Naikkan jika cara ekstraksi berubah agar cache teks lama tidak dipakai
+PARSER_VERSION = 'v1'
+
+_process_pool = None
+
+
+# Fungsi untuk mendapatkan process pool ekstraksi (dibuat saat pertama dipakai).
+# Memakai 'spawn' agar aman dipakai dari proses yang sudah punya banyak thread.
+def get_process_pool(max_workers=None):
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=multiprocessing.get_context('spawn')
+        )
+    return _process_pool
+
+
+# Fungsi untuk menyalin stream upload ke file sementara sambil menghitung SHA-256,
+# tanpa pernah memuat seluruh file ke memori
+def spool_upload(stream, folder, suffix=''):
+    digest = hashlib.sha256()
+    handle, path = tempfile.mkstemp(dir=folder, suffix=suffix)
+    try:
+        with os.fdopen(handle, 'wb') as f:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                f.write(chunk)
+    except Exception:
+        os.remove(path)
+        raise
+    return path, digest.hexdigest()
+
+
+# Fungsi worker: ekstrak teks halaman [start, end) dari PDF (dijalankan di proses lain)
+def _extract_pdf_pages(file_path, start, end):
+    import PyPDF2
+    with open(file_path, 'rb') as f:
+        pdf_reader = PyPDF2.PdfReader(f)
+        return [pdf_reader.pages[i].extract_text() or '' for i in range(start, end)]
+
+
+def _iter_pdf_pages(file_path, executor=None):
+    import PyPDF2
+    with open(file_path, 'rb') as f:
+        page_count = len(PyPDF2.PdfReader(f).pages)
+
+    if executor is None or page_count < PDF_PARALLEL_MIN_PAGES:
+        with open(file_path, 'rb') as f:
+            pdf_reader = PyPDF2.PdfReader(f)
+            for page in pdf_reader.pages:
+                yield page.extract_text() or ''
+        return
+
+    # Halaman dibagi per batch; executor.map menjaga urutan halaman
+    starts = list(range(0, page_count, PDF_PAGES_PER_TASK))
+    ends = [min(start + PDF_PAGES_PER_TASK, page_count) for start in starts]
+    for pages in executor.map(_extract_pdf_pages, [file_path] * len(starts), starts, ends):
+        yield from pages
+
+
+def _iter_txt_chunks(file_path):
+    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+# Fungsi generator untuk membaca dokumen per halaman. PDF menghasilkan teks per
+# halaman; DOCX (tanpa konsep halaman) per paragraf; TXT per chunk.
+def iter_pages(file_path, filename, executor=None):
+    if filename.endswith('.txt'):
+        yield from _iter_txt_chunks(file_path)
+    elif filename.endswith('.docx'):
+        import docx
+        doc = docx.Document(file_path)
+        for paragraph in doc.paragraphs:
+            if paragraph.text.strip():
+                yield paragraph.text
+    elif filename.endswith('.pdf'):
+        yield from _iter_pdf_pages(file_path, executor)
+    else:
+        # Fallback menggunakan textract
+        try:
+            import textract
+            yield textract.process(file_path).decode('utf-8', errors='ignore')
+        except Exception:
+            yield from _iter_txt_chunks(file_path)
+
+
+# Fungsi generator untuk membaca dokumen per paragraf (dipisah baris kosong).
+# Batas halaman PDF dan paragraf DOCX selalu menjadi batas paragraf; chunk TXT
+# disambung karena bisa terpotong di tengah paragraf. Hanya block baru yang
+# dipecah; potongan paragraf yang belum selesai disimpan sebagai daftar agar
+# file tanpa baris kosong tidak dipecah ulang dari awal di setiap chunk.
+def iter_paragraphs(file_path, filename, executor=None):
+    pending = []
+    carry = ''  # '\n' di akhir block sebelumnya, bisa menjadi awal '\n\n' di block berikutnya
+    for block in iter_pages(file_path, filename, executor):
+        pieces = (carry + (block if filename.endswith('.txt') else block + '\n\n')).split('\n\n')
+        for piece in pieces[:-1]:
+            pending.append(piece)
+            paragraph = ''.join(pending).strip()
+            pending = []
+            if paragraph:
+                yield paragraph
+        rest = pieces[-1]
+        carry = '\n' if rest.endswith('\n') else ''
+        pending.append(rest[:-1] if carry else rest)
+    paragraph = (''.join(pending) + carry).strip()
+    if paragraph:
+        yield paragraph
+
+
+# Fungsi untuk membaca seluruh teks dokumen (paragraf digabung dengan baris kosong)
+def read_file(file_path, filename, executor=None):
+    return '\n\n'.join(iter_paragraphs(file_path, filename, executor))
+
+
+# Cache teks hasil ekstraksi, disimpan per hash isi file sehingga unggahan ulang
+# file yang sama tidak perlu di-parse lagi
+class TextCache:
+    def __init__(self, folder, max_entries=5000):
+        self.folder = folder
+        self.max_entries = max_entries
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+
+    def _path(self, file_hash, extension):
+        return os.path.join(self.folder, f"{file_hash}-{extension}-{PARSER_VERSION}.txt")
+
+    def get(self, file_hash, extension):
+        path = self._path(file_hash, extension)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                text = f.read()
+        except FileNotFoundError:
+            return None
+        os.utime(path)  # Tandai baru dipakai agar tidak ikut terhapus saat pruning
+        return text
+
+    def put(self, file_hash, extension, text):
+        path = self._path(file_hash, extension)
+        handle, tmp_path = tempfile.mkstemp(dir=self.folder, suffix='.tmp')
+        with os.fdopen(handle, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)  # Atomik, aman jika beberapa worker menulis bersamaan
+        self._prune()
+
+    # Hapus entri tertua jika jumlah file melebihi batas
+    def _prune(self):
+        entries = [
+            os.path.join(self.folder, name) for name in os.listdir(self.folder)
+            if name.endswith('.txt')
+        ]
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort(key=os.path.getmtime)
+        for path in entries[:len(entries) - self.max_entries]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,380 @@
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import db
+
+# Interval polling event job milik worker lain (detik)
+REMOTE_POLL_INTERVAL = 0.5
+# Pesan error untuk job yang worker pemiliknya berhenti di tengah jalan
+STALE_JOB_ERROR = "Worker yang menjalankan pemeriksaan berhenti; silakan periksa ulang"
+
+
+# Error ketika antrean job sudah penuh (admission control)
+class QueueFull(Exception):
+    pass
+
+
+# Penyimpanan job di SQLite yang dibagi semua worker: status, ringkasan dan
+# seluruh event, sehingga job bisa dipantau dan dibatalkan dari worker mana pun.
+class JobStore:
+    def __init__(self, db_path):
+        self.db_path = db_path
+        folder = os.path.dirname(db_path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        with self._connect() as conn:
+            conn.executescript("""
+                PRAGMA journal_mode=WAL;
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    state TEXT NOT NULL,
+                    cancel_requested INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    finished_at REAL
+                );
+                CREATE TABLE IF NOT EXISTS job_events (
+                    job_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    event TEXT NOT NULL,
+                    data TEXT NOT NULL,
+                    PRIMARY KEY (job_id, seq)
+                );
+                CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, updated_at);
+            """)
+
+    def _connect(self):
+        return db.connect(self.db_path)
+
+    def create(self, job):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, state, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (job.id, job.status, json.dumps(job.state()), job.created_at, now)
+            )
+
+    # Simpan status terbaru job dan (opsional) satu event baru dalam satu transaksi.
+    # Job yang sudah ditutup (misalnya dinyatakan mati oleh fail_stale) tidak diubah lagi.
+    def update(self, job, event=None):
+        now = time.time()
+        with self._connect() as conn:
+            if conn.execute(
+                "UPDATE jobs SET status = ?, state = ?, updated_at = ?, finished_at = ? "
+                "WHERE id = ? AND finished_at IS NULL",
+                (job.status, json.dumps(job.state()), now, job.finished_at, job.id)
+            ).rowcount and event is not None:
+                conn.execute(
+                    "INSERT INTO job_events (job_id, seq, event, data) VALUES (?, ?, ?, ?)",
+                    (job.id, event['id'], event['event'], json.dumps(event['data']))
+                )
+
+    def load(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT status, state, cancel_requested, updated_at FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {'status': row[0], 'state': json.loads(row[1]), 'cancel_requested': bool(row[2]),
+                'updated_at': row[3]}
+
+    # Tutup job aktif yang tidak diperbarui selama stale_after detik (worker
+    # pemiliknya mati) sebagai 'failed', lengkap dengan event penutupnya, agar
+    # stream di worker lain berakhir. Mengembalikan True jika job ditutup.
+    def fail_stale(self, job_id, stale_after, error):
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT state FROM jobs WHERE id = ? AND status IN ('queued', 'running') "
+                "AND finished_at IS NULL AND updated_at <= ?",
+                (job_id, now - stale_after)
+            ).fetchone()
+            if row is None:
+                return False
+            state = json.loads(row[0])
+            state['error'] = error
+            seq = conn.execute(
+                "SELECT COALESCE(MAX(seq) + 1, 0) FROM job_events WHERE job_id = ?", (job_id,)
+            ).fetchone()[0]
+            conn.execute(
+                "INSERT INTO job_events (job_id, seq, event, data) VALUES (?, ?, ?, ?)",
+                (job_id, seq, 'failed', json.dumps({'error': error}))
+            )
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', state = ?, updated_at = ?, finished_at = ? WHERE id = ?",
+                (json.dumps(state), now, now, job_id)
+            )
+        return True
+
+    def events(self, job_id, start=0):
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT seq, event, data FROM job_events WHERE job_id = ? AND seq >= ? ORDER BY seq",
+                (job_id, start)
+            ).fetchall()
+        return [{'id': seq, 'event': event, 'data': json.loads(data)} for seq, event, data in rows]
+
+    def request_cancel(self, job_id):
+        with self._connect() as conn:
+            return conn.execute(
+                "UPDATE jobs SET cancel_requested = 1 WHERE id = ?", (job_id,)
+            ).rowcount > 0
+
+    def is_cancel_requested(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row[0])
+
+    # Jumlah job aktif di semua worker; job yang lama tidak diperbarui dianggap mati
+    def count_active(self, stale_after):
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'running') AND updated_at > ?",
+                (time.time() - stale_after,)
+            ).fetchone()[0]
+
+    def cleanup(self, retention):
+        with self._connect() as conn:
+            expired = "SELECT id FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?"
+            cutoff = time.time() - retention
+            conn.execute(f"DELETE FROM job_events WHERE job_id IN ({expired})", (cutoff,))
+            conn.execute("DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?", (cutoff,))
+
+
+# Satu job pemeriksaan. Setiap perubahan dicatat sebagai event berurutan agar
+# klien bisa mengikuti (dan menyambung ulang) stream dari indeks mana pun.
+class Job:
+    def __init__(self, store=None):
+        self.id = str(uuid.uuid4())
+        self.status = 'queued'
+        self.created_at = time.time()
+        self.finished_at = None
+        self.progress = {'done': 0, 'total': None}
+        self.summary = None
+        self.results = []
+        self.result = None
+        self.error = None
+        self.events = []
+        self._cancel_requested = False
+        self._store = store
+        self._condition = threading.Condition()
+
+    @property
+    def finished(self):
+        return self.status in ('completed', 'cancelled', 'failed')
+
+    # Pembatalan bisa diminta dari worker lain lewat store
+    @property
+    def cancel_requested(self):
+        if not self._cancel_requested and self._store is not None:
+            self._cancel_requested = self._store.is_cancel_requested(self.id)
+        return self._cancel_requested
+
+    @cancel_requested.setter
+    def cancel_requested(self, value):
+        self._cancel_requested = value
+        if value and self._store is not None:
+            self._store.request_cancel(self.id)
+
+    def set_status(self, status):
+        with self._condition:
+            self.status = status
+            if self._store is not None:
+                self._store.update(self)
+
+    def publish(self, event, data):
+        with self._condition:
+            entry = {'id': len(self.events), 'event': event, 'data': data}
+            self.events.append(entry)
+            if self._store is not None:
+                self._store.update(self, entry)
+            self._condition.notify_all()
+
+    # Tunggu event setelah indeks start; mengembalikan daftar event (bisa kosong saat timeout)
+    def wait_events(self, start, timeout):
+        with self._condition:
+            if start >= len(self.events) and not self.finished:
+                self._condition.wait(timeout)
+            return self.events[start:]
+
+    # Status akhir dan event terakhir ditulis bersamaan agar pembaca stream
+    # tidak melihat job selesai tanpa event penutupnya
+    def finish(self, status, event, data):
+        with self._condition:
+            self.status = status
+            self.finished_at = time.time()
+            self.publish(event, data)
+
+    # Bagian status yang disimpan di store (hasil per paragraf ada di event)
+    def state(self):
+        return {
+            'progress': self.progress,
+            'summary': self.summary,
+            'result': self.result,
+            'error': self.error
+        }
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'progress': self.progress,
+            'summary': self.summary,
+            'results': self.results,
+            'result': self.result,
+            'error': self.error
+        }
+
+
+# Tampilan baca-saja job yang sedang dijalankan worker lain, dibaca dari store.
+# Antarmukanya sama dengan Job untuk endpoint status dan stream. Job yang tidak
+# diperbarui selama stale_after detik dianggap gagal (worker pemiliknya mati).
+class RemoteJob:
+    def __init__(self, store, job_id, row, stale_after=None):
+        self.id = job_id
+        self.events = []
+        self._store = store
+        self._stale_after = stale_after
+        self._apply(row)
+        if self._is_stale(row):
+            self.refresh()
+
+    def _apply(self, row):
+        self.status = row['status']
+        self.cancel_requested = row['cancel_requested']
+        self.progress = row['state']['progress']
+        self.summary = row['state']['summary']
+        self.result = row['state']['result']
+        self.error = row['state']['error']
+
+    @property
+    def finished(self):
+        return self.status in ('completed', 'cancelled', 'failed')
+
+    def refresh(self):
+        row = self._store.load(self.id)
+        if row is not None and self._is_stale(row):
+            self._store.fail_stale(self.id, self._stale_after, STALE_JOB_ERROR)
+            row = self._store.load(self.id)
+        if row is not None:
+            self._apply(row)
+        self.events.extend(self._store.events(self.id, len(self.events)))
+
+    def _is_stale(self, row):
+        return (self._stale_after is not None and row['status'] in ('queued', 'running')
+                and row['updated_at'] <= time.time() - self._stale_after)
+
+    def wait_events(self, start, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            self.refresh()
+            if start < len(self.events) or self.finished or time.monotonic() >= deadline:
+                return self.events[start:]
+            time.sleep(min(REMOTE_POLL_INTERVAL, max(0, deadline - time.monotonic())))
+
+    def to_dict(self):
+        if not self.events:
+            self.refresh()
+        results = [
+            event['data']['result'] for event in self.events
+            if event['event'] == 'paragraph' and event['data']['result']['matches']
+        ]
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'progress': self.progress,
+            'summary': self.summary,
+            'results': results,
+            'result': self.result,
+            'error': self.error
+        }
+
+
+# Pengelola job: antrean worker latar belakang dengan batas job berjalan
+# bersamaan dan batas job yang menunggu. Dengan store, job terlihat oleh semua
+# worker dan batas antrean dihitung dari job aktif di semua worker.
+class JobManager:
+    def __init__(self, max_running=2, max_queued=20, retention=3600, store=None, stale_after=900):
+        self.max_running = max_running
+        self.max_queued = max_queued
+        self.retention = retention
+        self.store = store
+        self.stale_after = stale_after
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_running, thread_name_prefix='job')
+
+    # Daftarkan job baru; run(job) dijalankan di worker latar belakang
+    def submit(self, run):
+        with self._lock:
+            self._cleanup()
+            if self.store is not None:
+                active = self.store.count_active(self.stale_after)
+            else:
+                active = sum(1 for job in self._jobs.values() if not job.finished)
+            if active >= self.max_running + self.max_queued:
+                raise QueueFull("Antrean pemeriksaan penuh, coba lagi nanti")
+            job = Job(self.store)
+            if self.store is not None:
+                self.store.create(job)
+            self._jobs[job.id] = job
+
+        self._executor.submit(self._run, job, run)
+        return job
+
+    def _run(self, job, run):
+        with self._lock:
+            if job.finished:  # Dibatalkan saat masih di antrean
+                return
+            if job.cancel_requested:  # Dibatalkan dari worker lain saat masih di antrean
+                job.finish('cancelled', 'cancelled', {'progress': job.progress})
+                return
+            job.set_status('running')
+        try:
+            run(job)
+        except Exception as e:
+            job.error = str(e)
+            job.finish('failed', 'failed', {'error': str(e)})
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None and self.store is not None:
+            row = self.store.load(job_id)
+            if row is not None:
+                job = RemoteJob(self.store, job_id, row, stale_after=self.stale_after)
+        return job
+
+    def cancel(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                if job.finished:
+                    return job
+                job.cancel_requested = True
+                if job.status == 'queued':
+                    job.finish('cancelled', 'cancelled', {'progress': job.progress})
+                return job
+
+        # Job milik worker lain: tandai di store, worker pemiliknya yang menghentikan
+        if self.store is not None and self.store.request_cancel(job_id):
+            return self.get(job_id)
+        return None
+
+    # Buang job selesai yang lebih tua dari retention
+    def _cleanup(self):
+        now = time.time()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished and now - job.finished_at > self.retention
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+        if self.store is not None:
+            self.store.cleanup(self.retention)
@@ -0,0 +1,370 @@
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+
+import db
+
+# Batas bucket histogram latensi (detik)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape_label(value)}"' for name, value in labels) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# Counter Prometheus sederhana dengan label; aman dipakai dari banyak thread
+class Counter:
+    type = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] += amount
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._values)
+
+    @staticmethod
+    def merge(value, other):
+        return value + other
+
+    # values (opsional) adalah hasil snapshot yang sudah digabung dari semua proses
+    def samples(self, values=None):
+        values = self.snapshot() if values is None else values
+        for key, value in sorted(values.items()):
+            yield self.name, tuple(zip(self.labelnames, key)), value
+
+
+# Histogram Prometheus (bucket kumulatif, _sum dan _count)
+class Histogram:
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value)
+
+    def snapshot(self):
+        with self._lock:
+            return {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+
+    @staticmethod
+    def merge(value, other):
+        return [a + b for a, b in zip(value[0], other[0])], value[1] + other[1]
+
+    def samples(self, values=None):
+        values = self.snapshot() if values is None else values
+        for key, (counts, total) in sorted(values.items()):
+            labels = tuple(zip(self.labelnames, key))
+            for bound, count in zip(self.buckets, counts):
+                yield f"{self.name}_bucket", labels + (('le', _format_value(bound)),), count
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, counts[-1]
+
+
+# Snapshot metrik setiap proses disimpan di SQLite agar /metrics di worker mana
+# pun melaporkan jumlah dari semua worker. Baris proses yang sudah berhenti tetap
+# dihitung supaya counter tidak turun; clear() dipanggil sekali saat server mulai.
+class MetricsStore:
+    def __init__(self, db_path):
+        self.db_path = db_path
+        folder = os.path.dirname(db_path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        with self._connect() as conn:
+            conn.executescript("""
+                PRAGMA journal_mode=WAL;
+                CREATE TABLE IF NOT EXISTS metric_values (
+                    process TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    labels TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    PRIMARY KEY (process, name, labels)
+                );
+            """)
+
+    def _connect(self):
+        return db.connect(self.db_path)
+
+    # Simpan snapshot satu proses; snapshots adalah {nama metrik: {label: nilai}}
+    def write(self, process, snapshots):
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO metric_values (process, name, labels, value) VALUES (?, ?, ?, ?)",
+                [(process, name, json.dumps(key), json.dumps(value))
+                 for name, values in snapshots.items() for key, value in values.items()]
+            )
+
+    # Ambil snapshot semua proses sebagai {nama metrik: [(label, nilai), ...]}
+    def read(self):
+        with self._connect() as conn:
+            rows = conn.execute("SELECT name, labels, value FROM metric_values").fetchall()
+        values = defaultdict(list)
+        for name, key, value in rows:
+            values[name].append((tuple(json.loads(key)), json.loads(value)))
+        return values
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM metric_values")
+
+
+# Kumpulan metrik yang dirender dalam format teks Prometheus
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._store = None
+        self._flush_interval = None
+        self._process = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def counter(self, name, documentation, labelnames=()):
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    # Gabungkan metrik dari semua proses lewat store; snapshot proses ini ditulis
+    # setiap flush_interval detik oleh thread latar belakang
+    def share(self, store, flush_interval=5.0):
+        self._store = store
+        self._flush_interval = flush_interval
+
+    # Mulai thread flush di proses ini (sekali per proses, juga setelah fork)
+    def ensure_flusher(self):
+        if self._store is None or self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._process = f"{self._pid}-{uuid.uuid4().hex[:8]}"
+            threading.Thread(target=self._flush_loop, name='metrics-flush', daemon=True).start()
+            atexit.register(self.flush)
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self._flush_interval)
+            try:
+                self.flush()
+            except Exception:
+                logging.getLogger(__name__).exception('metrics_flush_failed')
+
+    def flush(self):
+        if self._store is None:
+            return
+        self.ensure_flusher()
+        self._store.write(self._process, {metric.name: metric.snapshot() for metric in self._metrics})
+
+    def render(self):
+        shared = None
+        if self._store is not None:
+            self.flush()
+            shared = self._store.read()
+
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            values = None
+            if shared is not None:
+                values = {}
+                for key, value in shared.get(metric.name, []):
+                    values[key] = metric.merge(values[key], value) if key in values else value
+            for name, labels, value in metric.samples(values):
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+HTTP_REQUESTS = REGISTRY.counter(
+    'plagiarism_http_requests_total', 'Jumlah request HTTP', ('endpoint', 'method', 'status')
+)
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    'plagiarism_http_request_duration_seconds', 'Latensi request HTTP', ('endpoint', 'method')
+)
+STAGE_SECONDS = REGISTRY.histogram(
+    'plagiarism_stage_duration_seconds', 'Durasi setiap tahap pipeline per request', ('stage',)
+)
+PAIRS = REGISTRY.counter(
+    'plagiarism_pairs_total', 'Pasangan paragraf menurut hasil penyaringan', ('outcome',)
+)
+CACHE_LOOKUPS = REGISTRY.counter(
+    'plagiarism_verdict_cache_lookups_total', 'Pencarian cache vonis LLM', ('result',)
+)
+LLM_CALLS = REGISTRY.counter(
+    'plagiarism_llm_calls_total', 'Panggilan /api/generate ke Ollama', ('kind', 'status')
+)
+LLM_CALL_SECONDS = REGISTRY.histogram(
+    'plagiarism_llm_call_duration_seconds', 'Latensi panggilan /api/generate', ('kind',)
+)
+LLM_TOKENS = REGISTRY.counter(
+    'plagiarism_llm_tokens_total', 'Token yang diproses Ollama', ('type',)
+)
+OLLAMA_SECONDS = REGISTRY.counter(
+    'plagiarism_ollama_reported_seconds_total', 'Durasi yang dilaporkan Ollama', ('phase',)
+)
+
+# Counter per request yang juga dijumlahkan ke metrik global saat request selesai
+REQUEST_COUNTER_METRICS = {
+    'pairs_considered': (PAIRS, {'outcome': 'considered'}),
+    'pairs_skipped_length': (PAIRS, {'outcome': 'skipped_length'}),
+    'pairs_llm': (PAIRS, {'outcome': 'llm'}),
+    'pairs_lexical': (PAIRS, {'outcome': 'lexical'}),
+    'pairs_llm_timeout': (PAIRS, {'outcome': 'llm_timeout'}),
+    'pairs_llm_failed': (PAIRS, {'outcome': 'llm_failed'}),
+    'cache_hits': (CACHE_LOOKUPS, {'result': 'hit'}),
+    'cache_misses': (CACHE_LOOKUPS, {'result': 'miss'})
+}
+
+
+# Pencatat waktu dan counter untuk satu request. Tahap yang sama boleh dimasuki
+# berkali-kali (durasinya dijumlahkan); counter boleh ditambah dari thread lain.
+class RequestTimings:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = defaultdict(float)
+        self.counters = defaultdict(int)
+        self._lock = threading.Lock()
+        self._finished = None
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage(name, time.perf_counter() - start)
+
+    def add_stage(self, name, seconds):
+        with self._lock:
+            self.stages[name] += seconds
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    # Tutup pencatatan dan kirim ke metrik global (hanya sekali)
+    def finish(self):
+        with self._lock:
+            if self._finished is not None:
+                return self.to_dict()
+            self._finished = time.perf_counter()
+            stages = dict(self.stages)
+            counters = dict(self.counters)
+        for name, seconds in stages.items():
+            STAGE_SECONDS.observe(seconds, stage=name)
+        for name, (metric, labels) in REQUEST_COUNTER_METRICS.items():
+            if counters.get(name):
+                metric.inc(counters[name], **labels)
+        return self.to_dict()
+
+    def to_dict(self):
+        with self._lock:
+            end = self._finished or time.perf_counter()
+            return {
+                'total_ms': round((end - self.started) * 1000, 2),
+                'stages_ms': {name: round(seconds * 1000, 2) for name, seconds in self.stages.items()},
+                'counters': {
+                    name: round(value, 2) if isinstance(value, float) else value
+                    for name, value in self.counters.items()
+                }
+            }
+
+
+# Fungsi untuk mencatat satu panggilan /api/generate. data adalah body JSON
+# respons Ollama (None jika gagal); durasi dari Ollama dalam nanodetik.
+def record_llm_call(kind, seconds, data=None, timings=None):
+    LLM_CALLS.inc(kind=kind, status='ok' if data is not None else 'error')
+    LLM_CALL_SECONDS.observe(seconds, kind=kind)
+    if timings is not None:
+        timings.count('llm_calls')
+        if data is None:
+            timings.count('llm_errors')
+    if data is None:
+        return
+
+    prompt_tokens = data.get('prompt_eval_count') or 0
+    completion_tokens = data.get('eval_count') or 0
+    LLM_TOKENS.inc(prompt_tokens, type='prompt')
+    LLM_TOKENS.inc(completion_tokens, type='completion')
+    for phase in ('total', 'load', 'prompt_eval', 'eval'):
+        duration = data.get(f"{phase}_duration")
+        if duration:
+            OLLAMA_SECONDS.inc(duration / 1e9, phase=phase)
+    if timings is not None:
+        timings.count('prompt_tokens', prompt_tokens)
+        timings.count('completion_tokens', completion_tokens)
+        timings.count('ollama_total_duration_ms', (data.get('total_duration') or 0) / 1e6)
+        timings.count('ollama_eval_duration_ms', (data.get('eval_duration') or 0) / 1e6)
+
+
+# Formatter log JSON satu baris per event. Field tambahan dikirim lewat
+# extra={'fields': {...}}.
+class JsonLogFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'event': record.getMessage()
+        }
+        entry.update(getattr(record, 'fields', {}))
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+# Fungsi untuk menyiapkan logger aplikasi dengan output JSON ke stderr
+def configure_logging(name, level='INFO'):
+    logger = logging.getLogger(name)
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(JsonLogFormatter())
+        logger.addHandler(handler)
+        logger.propagate = False
+    logger.setLevel(level)
+    return logger
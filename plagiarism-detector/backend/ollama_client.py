@@ -0,0 +1,88 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Status HTTP yang dianggap sementara dan layak dicoba ulang
+RETRY_STATUSES = {429, 502, 503, 504}
+
+
+# Error ketika batas waktu request (deadline) sudah habis sebelum panggilan selesai
+class DeadlineExceeded(Exception):
+    pass
+
+
+# Klien Ollama dengan session HTTP yang di-pool (keep-alive), timeout per panggilan,
+# retry dengan backoff untuk kegagalan sementara, dan executor terbatas untuk
+# menjalankan banyak analisis secara paralel.
+class OllamaClient:
+    def __init__(self, base_url, num_parallel=4, timeout=120, max_retries=3, backoff=0.5):
+        self.base_url = base_url
+        self.num_parallel = num_parallel
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.reset()
+
+    # Buat session HTTP dan executor baru. Dipanggil di proses worker setelah fork
+    # agar koneksi keep-alive dan thread milik proses induk tidak ikut dipakai.
+    def reset(self):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.num_parallel * 2)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        # Dipakai bersama oleh semua request agar total paralelisme ke server model
+        # tidak melebihi OLLAMA_NUM_PARALLEL
+        self._executor = ThreadPoolExecutor(max_workers=self.num_parallel, thread_name_prefix='ollama')
+
+    # Hitung timeout panggilan berikutnya dari timeout per panggilan dan sisa deadline
+    def _call_timeout(self, deadline):
+        if deadline is None:
+            return self.timeout
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded("Batas waktu analisis terlampaui")
+        return min(self.timeout, remaining)
+
+    def request(self, method, path, deadline=None, **kwargs):
+        attempt = 0
+        while True:
+            try:
+                response = self.session.request(
+                    method, f"{self.base_url}{path}", timeout=self._call_timeout(deadline), **kwargs
+                )
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    return response
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+
+            # Backoff eksponensial dengan jitter, tidak melewati deadline
+            delay = self.backoff * (2 ** attempt) * (0.5 + random.random() / 2)
+            if deadline is not None and time.monotonic() + delay >= deadline:
+                raise DeadlineExceeded("Batas waktu analisis terlampaui")
+            time.sleep(delay)
+            attempt += 1
+
+    def get(self, path, deadline=None, **kwargs):
+        return self.request('GET', path, deadline=deadline, **kwargs)
+
+    def post(self, path, deadline=None, **kwargs):
+        return self.request('POST', path, deadline=deadline, **kwargs)
+
+    # Jadwalkan func di executor bersama; hasil diambil dengan result()
+    def submit(self, func, *args, **kwargs):
+        return self._executor.submit(func, *args, **kwargs)
+
+    # Ambil hasil future paling lambat sampai deadline; jika belum selesai,
+    # future dibatalkan dan default dikembalikan
+    def result(self, future, deadline=None, default=None):
+        timeout = None if deadline is None else max(0, deadline - time.monotonic())
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeout:
+            future.cancel()
+            return default
@@ -0,0 +1,77 @@
+import json
+import os
+import threading
+import time
+
+import db
+
+
+# Penyimpanan state runtime (misalnya model aktif) di SQLite agar perubahan dari
+# satu worker terlihat oleh semua worker. Nilai yang sudah dibaca disimpan di
+# memori paling lama refresh_interval detik.
+class RuntimeState:
+    def __init__(self, db_path, refresh_interval=1.0):
+        self.db_path = db_path
+        self.refresh_interval = refresh_interval
+        self._cache = {}
+        self._lock = threading.Lock()
+        folder = os.path.dirname(db_path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        with self._connect() as conn:
+            conn.executescript("""
+                PRAGMA journal_mode=WAL;
+                CREATE TABLE IF NOT EXISTS runtime_state (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+            """)
+
+    def _connect(self):
+        return db.connect(self.db_path)
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and now - cached[0] < self.refresh_interval:
+                return cached[1] if cached[1] is not None else default
+
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM runtime_state WHERE key = ?", (key,)).fetchone()
+        value = json.loads(row[0]) if row is not None else None
+        with self._lock:
+            self._cache[key] = (now, value)
+        return value if value is not None else default
+
+    def set(self, key, value):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO runtime_state (key, value, updated_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time())
+            )
+        with self._lock:
+            self._cache[key] = (time.monotonic(), value)
+
+    def delete(self, key):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM runtime_state WHERE key = ?", (key,))
+        with self._lock:
+            self._cache.pop(key, None)
+
+    # Naikkan nilai angka secara atomik di semua worker; mengembalikan nilai baru
+    def increment(self, key):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO runtime_state (key, value, updated_at) VALUES (?, '1', ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = CAST(CAST(value AS INTEGER) + 1 AS TEXT), "
+                "updated_at = excluded.updated_at",
+                (key, time.time())
+            )
+            value = json.loads(conn.execute(
+                "SELECT value FROM runtime_state WHERE key = ?", (key,)
+            ).fetchone()[0])
+        with self._lock:
+            self._cache[key] = (time.monotonic(), value)
+        return value
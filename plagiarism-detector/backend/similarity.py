@@ -0,0 +1,60 @@
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+# Bobot skor kata terhadap skor n-gram karakter dalam kemiripan leksikal gabungan
+WORD_WEIGHT = 0.5
+CHAR_NGRAM_RANGE = (3, 5)
+
+
+# Fungsi untuk menghitung matriks cosine TF-IDF antara dua kumpulan teks sekaligus
+def _tfidf_cosine(vectorizer, queries, sources):
+    try:
+        matrix = vectorizer.fit_transform(queries + sources)
+    except ValueError:
+        # Kosakata kosong (misalnya hanya tanda baca): anggap tidak ada kemiripan
+        return np.zeros((len(queries), len(sources)), dtype=np.float32)
+
+    # TfidfVectorizer sudah menormalkan vektor (L2), jadi perkalian titik = cosine
+    query_matrix = matrix[:len(queries)]
+    source_matrix = matrix[len(queries):]
+    return (query_matrix @ source_matrix.T).toarray().astype(np.float32)
+
+
+# Fungsi untuk menghitung kemiripan leksikal semua pasangan paragraf dalam satu langkah
+def lexical_similarity_matrix(paragraphs, source_paragraphs, word_weight=WORD_WEIGHT):
+    if not paragraphs or not source_paragraphs:
+        return np.zeros((len(paragraphs), len(source_paragraphs)), dtype=np.float32)
+
+    word_similarity = _tfidf_cosine(
+        TfidfVectorizer(analyzer='word', sublinear_tf=True),
+        paragraphs, source_paragraphs
+    )
+    char_similarity = _tfidf_cosine(
+        TfidfVectorizer(analyzer='char_wb', ngram_range=CHAR_NGRAM_RANGE, sublinear_tf=True),
+        paragraphs, source_paragraphs
+    )
+
+    similarity = word_weight * word_similarity + (1 - word_weight) * char_similarity
+    return np.clip(similarity, 0.0, 1.0)
+
+
+# Fungsi untuk memilih pasangan yang masih ambigu dan perlu diteruskan ke LLM.
+# Pasangan di atas copy_threshold (jelas disalin) dan di bawah unrelated_threshold
+# (jelas tidak terkait) tidak pernah dikirim ke LLM.
+def select_llm_candidates(similarity, top_k, copy_threshold, unrelated_threshold, ambiguity_band):
+    undecided = (similarity >= unrelated_threshold) & (similarity < copy_threshold)
+
+    band_low, band_high = ambiguity_band
+    in_band = undecided & (similarity >= band_low) & (similarity < band_high)
+
+    top_candidates = np.zeros_like(undecided)
+    if top_k > 0 and similarity.size:
+        k = min(top_k, similarity.shape[1])
+        # Ambil indeks top-k per baris tanpa mengurutkan seluruh baris
+        masked = np.where(undecided, similarity, -1.0)
+        top_indices = np.argpartition(-masked, k - 1, axis=1)[:, :k]
+        rows = np.arange(similarity.shape[0])[:, None]
+        top_candidates[rows, top_indices] = True
+        top_candidates &= undecided
+
+    return in_band | top_candidates
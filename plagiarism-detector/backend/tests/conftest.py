@@ -0,0 +1,55 @@
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.fake_ollama import FakeOllama  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def fake_ollama():
+    fake = FakeOllama(latency=0.01)
+    fake.url = fake.start()
+    yield fake
+    fake.stop()
+
+
+# app membaca konfigurasi dari environment dan membuat folder uploads/corpus/cache
+# relatif terhadap cwd saat diimpor, jadi diimpor sekali di folder sementara
+@pytest.fixture(scope='session')
+def _app(fake_ollama, tmp_path_factory):
+    workdir = tmp_path_factory.mktemp('app')
+    previous_cwd = os.getcwd()
+    os.environ.update({
+        'OLLAMA_BASE_URL': fake_ollama.url,
+        'EMBEDDING_BACKEND': 'hashing',
+        'WARMUP_ENABLED': 'false'
+    })
+    os.chdir(workdir)
+    import app
+    yield app
+    os.chdir(previous_cwd)
+
+
+# Modul app dengan cache vonis kosong dan statistik fake Ollama yang direset
+@pytest.fixture
+def app_module(_app, fake_ollama, tmp_path):
+    from verdict_cache import VerdictCache
+    _app.verdict_cache = VerdictCache(
+        str(tmp_path / 'verdicts.db'),
+        max_memory_items=_app.CACHE_MEMORY_ITEMS,
+        max_disk_items=_app.CACHE_DISK_ITEMS,
+        ttl=_app.CACHE_TTL,
+        generation=_app.get_cache_generation
+    )
+    fake_ollama.reset_stats()
+    yield _app
+    fake_ollama.clear_failures()
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
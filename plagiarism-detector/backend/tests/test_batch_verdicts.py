@@ -0,0 +1,150 @@
+import json
+import socket
+import time
+
+import pytest
+
+from benchmarks.fake_ollama import jaccard_score
+
+TEXT = "Bank sentral menaikkan suku bunga acuan untuk menekan laju inflasi tahun ini."
+SOURCES = [
+    "Bank sentral menaikkan suku bunga untuk menahan inflasi yang tinggi.",
+    "Suku bunga acuan naik karena inflasi tahun ini melonjak.",
+    "Kenaikan harga pangan mendorong inflasi pada kuartal ketiga.",
+]
+
+
+@pytest.fixture
+def batch_mode(fake_ollama, monkeypatch):
+    def set_mode(mode):
+        monkeypatch.setattr(fake_ollama, 'batch_mode', mode)
+    return set_mode
+
+
+def expected_scores():
+    return [jaccard_score(TEXT, source) / 100 for source in SOURCES]
+
+
+def test_parse_batch_verdicts_keeps_only_valid_items(app_module):
+    response = json.dumps({'results': [
+        {'source_id': 1, 'score': 80, 'analysis': 'mirip'},
+        {'source_id': 1, 'score': 10, 'analysis': 'duplikat'},
+        {'source_id': 2, 'score': 140},
+        {'source_id': 9, 'score': 50},
+        {'source_id': '3', 'score': '25'},
+        {'score': 40},
+    ]})
+    verdicts = app_module.parse_batch_verdicts(response, {1, 2, 3})
+    assert verdicts == {
+        1: {'analysis': 'mirip', 'score': 0.8},
+        3: {'analysis': 'Tidak ada analisis yang dihasilkan oleh model.', 'score': 0.25},
+    }
+    with pytest.raises(ValueError):
+        app_module.parse_batch_verdicts('{"results": {}}', {1})
+
+
+def test_parse_single_verdict_falls_back_to_leading_number(app_module):
+    assert app_module.parse_single_verdict('{"score": 70, "analysis": "ok"}') == {'analysis': 'ok', 'score': 0.7}
+    assert app_module.parse_single_verdict('65 Teks cukup mirip') == {'analysis': 'Teks cukup mirip', 'score': 0.65}
+    assert app_module.parse_single_verdict('Skor tahun 2023 tidak jelas')['score'] == 0
+
+
+def test_valid_batch_uses_one_call_and_fills_cache(app_module, fake_ollama):
+    verdicts, calls = app_module.analyze_with_ollama(TEXT, SOURCES)
+    assert calls == 1
+    assert [v['score'] for v in verdicts] == expected_scores()
+    assert fake_ollama.stats()['batch_calls'] == 1
+
+    verdicts, calls = app_module.analyze_with_ollama(TEXT, SOURCES)
+    assert calls == 0
+    assert all(v['cache'] == 'memory' for v in verdicts)
+
+
+def test_invalid_batch_falls_back_to_single_pair_prompts(app_module, fake_ollama, batch_mode):
+    batch_mode('invalid')
+    verdicts, calls = app_module.analyze_with_ollama(TEXT, SOURCES)
+    assert calls == 1 + len(SOURCES)
+    assert [v['score'] for v in verdicts] == expected_scores()
+    assert all(v['analysis'] == 'Analisis sintetis.' for v in verdicts)
+    assert fake_ollama.stats()['batch_calls'] == 1
+    assert fake_ollama.stats()['generate_calls'] == 4
+
+
+def test_missing_batch_items_are_requested_individually(app_module, fake_ollama, batch_mode):
+    batch_mode('partial')
+    verdicts, calls = app_module.analyze_with_ollama(TEXT, SOURCES)
+    assert calls == 2
+    assert [v['score'] for v in verdicts] == expected_scores()
+    assert [v['analysis'] for v in verdicts] == ['Analisis sintetis (batch).'] * 2 + ['Analisis sintetis.']
+
+
+def test_expired_deadline_returns_timeout_verdicts(app_module, fake_ollama):
+    verdicts, _ = app_module.analyze_with_ollama(TEXT, SOURCES, deadline=0)
+    assert all(v['error'] == 'timeout' and 'batas waktu' in v['analysis'] for v in verdicts)
+    assert fake_ollama.stats()['generate_calls'] == 0
+
+
+def test_check_reports_paragraphs_in_document_order(app_module, fake_ollama, monkeypatch):
+    # Paragraf awal lebih panjang sehingga analisisnya selesai paling akhir
+    monkeypatch.setattr(fake_ollama, 'latency_per_token', 0.001)
+    paragraphs = [f"{TEXT} " + " ".join(f"tambahan{j}" for j in range(40 - 5 * i)) for i in range(6)]
+    params = app_module.parse_check_request({
+        'text': "\n\n".join(paragraphs), 'sources': {'Artikel': "\n\n".join(SOURCES)}
+    })
+    reported = []
+    response, completed = app_module.run_check(
+        params, on_paragraph=lambda result, summary, done, total: reported.append((result['paragraph_number'], done))
+    )
+    assert completed
+    assert response['pipeline']['pairs_llm'] > 0
+    assert fake_ollama.stats()['generate_calls'] > 0
+    assert reported == [(i + 1, i + 1) for i in range(len(paragraphs))]
+
+
+def test_check_falls_back_to_lexical_scores_when_deadline_passes(client, app_module, fake_ollama, monkeypatch):
+    monkeypatch.setattr(fake_ollama, 'latency', 1.0)
+    monkeypatch.setattr(app_module, 'OLLAMA_REQUEST_DEADLINE', 0.2)
+    response = client.post('/api/check-plagiarism', json={
+        'text': "\n\n".join(SOURCES), 'sources': {'Artikel': TEXT}, 'timings': True
+    })
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['pipeline']['pairs_llm'] > 0
+    assert data['timings']['total_ms'] < 900
+    assert data['pipeline']['llm_timeouts'] == data['pipeline']['pairs_llm']
+    assert data['pipeline']['llm_errors'] == 0
+    assert data['pipeline']['cache']['misses'] == 0
+    assert data['timings']['counters']['pairs_llm_timeout'] == data['pipeline']['pairs_llm']
+
+    # Pasangan yang tidak sempat dianalisis tetap dilaporkan dengan skor leksikalnya
+    matches = [match for result in data['results'] for match in result['matches']]
+    assert {match['tier'] for match in matches} == {'lexical_fallback'}
+    assert all(match['similarity'] == match['lexical_similarity'] for match in matches)
+
+
+def test_failed_llm_calls_fall_back_to_lexical_scores(client, fake_ollama):
+    fake_ollama.fail_next(100, status=500)
+    data = client.post('/api/check-plagiarism', json={
+        'text': "\n\n".join(SOURCES), 'sources': {'Artikel': TEXT}
+    }).get_json()
+    assert data['pipeline']['llm_errors'] == data['pipeline']['pairs_llm'] > 0
+    assert data['pipeline']['llm_timeouts'] == 0
+    assert {m['tier'] for r in data['results'] for m in r['matches']} == {'lexical_fallback'}
+
+
+def test_context_window_lookup_respects_request_deadline(app_module, monkeypatch):
+    from ollama_client import OllamaClient
+
+    # Server yang menerima koneksi tetapi tidak pernah menjawab /api/show
+    with socket.socket() as hanging:
+        hanging.bind(('127.0.0.1', 0))
+        hanging.listen(8)
+        url = f"http://127.0.0.1:{hanging.getsockname()[1]}"
+        monkeypatch.setattr(app_module, 'ollama_client', OllamaClient(url, timeout=30, backoff=0.05))
+        monkeypatch.setattr(app_module, 'model_context_windows', {})
+
+        start = time.monotonic()
+        verdicts, _ = app_module.analyze_with_ollama(TEXT, SOURCES, deadline=time.monotonic() + 0.3)
+        assert time.monotonic() - start < 1.5
+    assert all(v['error'] == 'timeout' for v in verdicts)
+    assert app_module.model_context_windows == {}
@@ -0,0 +1,73 @@
+from cohort import find_suspicious_pairs
+
+SHARED = [
+    "Perubahan iklim global menyebabkan kenaikan permukaan air laut yang mengancam kota pesisir di seluruh dunia.",
+    "Pemerintah perlu membangun tanggul dan merelokasi penduduk yang tinggal di daerah rawan banjir rob.",
+]
+ORIGINAL = [
+    "Kopi pertama kali ditemukan di Etiopia oleh seorang penggembala kambing yang melihat hewannya bersemangat.",
+    "Perdagangan rempah membawa bangsa Eropa berlayar jauh ke kepulauan Nusantara pada abad keenam belas.",
+    "Sistem tata surya terdiri atas matahari dan delapan planet yang mengorbit dalam lintasan elips.",
+]
+
+
+def split(paragraphs):
+    return list(enumerate(paragraphs))
+
+
+def test_detects_colluding_pair_and_ignores_original_work():
+    documents = [
+        ('andi.txt', split(SHARED + [ORIGINAL[0]])),
+        ('budi.txt', split([ORIGINAL[1]] + SHARED)),
+        ('citra.txt', split([ORIGINAL[2]])),
+    ]
+    pairs, stats = find_suspicious_pairs(documents, min_similarity=0.5)
+
+    assert stats['documents'] == 3
+    assert stats['paragraphs'] == 7
+    assert len(pairs) == 1
+    pair = pairs[0]
+    assert {pair['document_a'], pair['document_b']} == {'andi.txt', 'budi.txt'}
+    assert pair['matched_paragraphs'] == 2
+    assert pair['score'] > 60
+
+    # Bukti menunjuk paragraf yang sama dengan rentang teks yang disalin
+    matched = {(e['paragraph_a'], e['paragraph_b']) for e in pair['evidence']}
+    assert matched == {(1, 2), (2, 3)}
+    assert all(e['spans_a'] and e['spans_b'] for e in pair['evidence'])
+
+
+def test_paragraphs_within_one_document_are_not_paired():
+    documents = [
+        ('andi.txt', split(SHARED + SHARED)),
+        ('citra.txt', split(ORIGINAL)),
+    ]
+    pairs, stats = find_suspicious_pairs(documents)
+    assert pairs == []
+    assert stats['candidate_paragraph_pairs'] == 0
+
+
+def test_common_text_shared_by_many_documents_is_skipped():
+    documents = [(f"mahasiswa-{i}.txt", split([SHARED[0], ORIGINAL[i % 3] + f" Catatan {i}."])) for i in range(6)]
+    pairs, stats = find_suspicious_pairs(documents, max_bucket_documents=5)
+    assert stats['common_buckets_skipped'] > 0
+    assert all(pair['matched_paragraphs'] == 1 and pair['document_a'] != pair['document_b'] for pair in pairs)
+    assert not any(SHARED[0][:40] in e['text_a'] for pair in pairs for e in pair['evidence'])
+
+
+def test_cohort_endpoint_keeps_duplicate_names_apart(client):
+    text = "\n\n".join(SHARED)
+    response = client.post('/api/cohort-check', json={'documents': [
+        {'name': 'tugas.docx', 'text': text},
+        {'name': 'tugas.docx', 'text': text},
+        {'name': 'tugas.docx', 'text': "\n\n".join(ORIGINAL)},
+    ]})
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['stats']['documents'] == 3
+    assert [(p['document_a'], p['document_b']) for p in data['pairs']] == [('tugas.docx', 'tugas.docx (2)')]
+
+
+def test_cohort_endpoint_requires_two_documents(client):
+    response = client.post('/api/cohort-check', json={'documents': [{'name': 'a', 'text': SHARED[0]}]})
+    assert response.status_code == 400
@@ -0,0 +1,94 @@
+import pytest
+
+import corpus as corpus_module
+from corpus import SourceCorpus, index_fingerprints, overlap_spans
+
+ORIGINAL = ("Penelitian ini menunjukkan bahwa siswa yang belajar dengan metode aktif "
+            "mendapatkan nilai yang lebih tinggi pada bulan yang sama.")
+UNRELATED = ("Pemerintah mengumumkan bahwa harga beras naik pada bulan yang lalu dan "
+             "akan dievaluasi dengan segera oleh kementerian.")
+
+
+def span_texts(text, spans):
+    return [text[start:end] for start, end in spans]
+
+
+def test_overlap_spans_ignore_short_coincidental_runs():
+    assert overlap_spans(ORIGINAL, UNRELATED) == ([], [])
+
+
+def test_overlap_spans_are_aligned_and_snap_to_words():
+    copied = "Laporan terbaru: Siswa yang belajar dengan  metode aktif mendapatkan nilai yang lebih tinggi, kata peneliti."
+    text_spans, source_spans = overlap_spans(ORIGINAL, copied)
+    assert span_texts(ORIGINAL, text_spans) == [
+        "siswa yang belajar dengan metode aktif mendapatkan nilai yang lebih tinggi"
+    ]
+    # Rentang di sumber mengikuti teks aslinya (huruf besar dan spasi ganda)
+    assert span_texts(copied, source_spans) == [
+        "Siswa yang belajar dengan  metode aktif mendapatkan nilai yang lebih tinggi"
+    ]
+
+
+def test_overlap_spans_find_reordered_copies():
+    first = "Fotosintesis mengubah cahaya matahari menjadi energi kimia di dalam daun."
+    second = "Gunung berapi aktif mengeluarkan lava panas dan abu vulkanik ke udara."
+    text, source = f"{first} Lalu, {second}", f"{second} {first}"
+    text_spans, source_spans = overlap_spans(text, source)
+    assert span_texts(text, text_spans) == [first[:-1], second[:-1]]
+    # Di sumber kedua kalimat bersebelahan sehingga digabung menjadi satu rentang
+    assert span_texts(source, source_spans) == [source[:-1]]
+
+
+COPIED = ("Kurikulum merdeka memberi keleluasaan kepada guru untuk memilih perangkat ajar "
+          "yang sesuai dengan kebutuhan dan minat belajar peserta didik di kelas.")
+BOILERPLATE = ("Dokumen ini disusun sebagai salah satu syarat kelulusan program sarjana "
+               "pada fakultas keguruan dan ilmu pendidikan universitas negeri.")
+FILLER = ("Bab berikutnya membahas metodologi penelitian kualitatif yang dipakai, mulai dari "
+          "teknik wawancara mendalam, observasi partisipatif, sampai analisis tematik atas "
+          "transkrip yang dikumpulkan selama enam bulan di tiga sekolah menengah kejuruan.")
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    return SourceCorpus(str(tmp_path / 'corpus'))
+
+
+def fingerprint_counts(corpus):
+    with corpus._connect() as conn:
+        return dict(conn.execute("SELECT hash, paragraphs FROM fingerprint_counts").fetchall())
+
+
+def test_find_candidates_returns_copied_paragraph_only(corpus):
+    corpus.add_source('Buku', [(0, COPIED), (1, FILLER)])
+    corpus.add_source('Artikel', [(0, UNRELATED)])
+
+    text = "Menurut buku panduan, kurikulum merdeka memberi keleluasaan kepada guru untuk memilih perangkat ajar."
+    assert [(name, index) for name, index, _, _ in corpus.find_candidates([text])] == [('Buku', 0)]
+    assert corpus.find_candidates([ORIGINAL]) == []
+
+
+def test_fingerprint_counts_follow_added_and_deleted_sources(corpus):
+    first = corpus.add_source('Pertama', [(0, COPIED)])
+    second = corpus.add_source('Kedua', [(0, COPIED), (1, FILLER)])
+    fingerprints = index_fingerprints(COPIED)
+    counts = fingerprint_counts(corpus)
+    assert {h: counts[h] for h in fingerprints} == {h: 2 for h in fingerprints}
+
+    assert corpus.delete_source(first['id'])
+    counts = fingerprint_counts(corpus)
+    assert {h: counts[h] for h in fingerprints} == {h: 1 for h in fingerprints}
+    assert set(counts) == fingerprints | index_fingerprints(FILLER)
+
+    assert corpus.delete_source(second['id'])
+    assert fingerprint_counts(corpus) == {}
+
+
+def test_find_candidates_skips_boilerplate_fingerprints(corpus, monkeypatch):
+    for index in range(3):
+        corpus.add_source(f'Skripsi {index}', [(0, f"{BOILERPLATE} Judul skripsi nomor {index}.")])
+    text = f"{FILLER} {BOILERPLATE}"
+    assert len(corpus.find_candidates([text])) == 3
+
+    # Fingerprint yang muncul di lebih banyak paragraf dari batas tidak lagi menghasilkan kandidat
+    monkeypatch.setattr(corpus_module, 'MAX_FINGERPRINT_PARAGRAPHS', 2)
+    assert corpus.find_candidates([text]) == []
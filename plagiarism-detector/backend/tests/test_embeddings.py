@@ -0,0 +1,117 @@
+import threading
+import time
+
+import numpy as np
+
+from corpus import SourceCorpus
+from embeddings import HashingEmbedder, VectorStore, top_k_cosine
+
+PARAGRAPHS = [
+    "Fotosintesis mengubah cahaya matahari menjadi energi kimia di dalam daun.",
+    "Revolusi industri mengubah cara manusia bekerja dan tinggal di kota.",
+    "Gunung berapi aktif mengeluarkan lava panas dan abu vulkanik.",
+    "Bank sentral menaikkan suku bunga untuk menekan laju inflasi.",
+]
+
+
+def test_hashing_embedder_is_deterministic_and_normalized():
+    embedder = HashingEmbedder(dim=64)
+    first = embedder.embed(PARAGRAPHS)
+    second = HashingEmbedder(dim=64).embed(PARAGRAPHS)
+    assert first.shape == (4, 64)
+    assert np.array_equal(first, second)
+    assert np.allclose(np.linalg.norm(first, axis=1), 1.0, atol=1e-5)
+    assert embedder.embed([]).shape == (0, 64)
+
+
+def test_top_k_cosine_respects_row_mask():
+    matrix = np.eye(3, dtype=np.float32)
+    indices, scores = top_k_cosine(matrix[:1], matrix, 2, row_mask=np.array([False, True, True]))
+    assert 0 not in indices[0][np.isfinite(scores[0])]
+
+
+def test_vector_store_search_finds_paraphrase_and_filters_sources(tmp_path):
+    embedder = HashingEmbedder(dim=128)
+    store = VectorStore(str(tmp_path), 'vectors', embedder.dim)
+    store.append([1, 2, 3, 4], ['a', 'a', 'b', 'b'], embedder.embed(PARAGRAPHS))
+
+    query = embedder.embed(["Bank sentral menaikkan suku bunga demi menekan inflasi."])
+    assert store.search(query, k=1)[0][0][0] == 4
+    assert all(p in (1, 2) for p, _ in store.search(query, k=4, source_ids=['a'])[0])
+
+    store.delete_source('b')
+    assert store.paragraph_ids() == {1, 2}
+    assert all(p in (1, 2) for p, _ in store.search(query, k=4)[0])
+
+
+def test_append_missing_indexes_only_new_paragraphs(tmp_path):
+    corpus = SourceCorpus(str(tmp_path / 'corpus'))
+    embedder = HashingEmbedder(dim=64)
+    store = VectorStore(str(tmp_path / 'vectors'), 'vectors', embedder.dim)
+
+    corpus.add_source('pertama', list(enumerate(PARAGRAPHS[:2])))
+    assert store.append_missing(corpus.get_unindexed_paragraphs, embedder.embed) == 2
+    assert store.append_missing(corpus.get_unindexed_paragraphs, embedder.embed) == 0
+
+    corpus.add_source('kedua', list(enumerate(PARAGRAPHS[2:])))
+    assert store.append_missing(corpus.get_unindexed_paragraphs, embedder.embed) == 2
+    assert len(store.paragraph_ids()) == 4
+
+
+def test_concurrent_append_missing_does_not_duplicate_rows(tmp_path):
+    corpus = SourceCorpus(str(tmp_path / 'corpus'))
+    corpus.add_source('sumber', [(i, f"{PARAGRAPHS[i % 4]} Bagian {i}.") for i in range(40)])
+    embedder = HashingEmbedder(dim=64)
+
+    def slow_embed(texts):
+        time.sleep(0.01)
+        return embedder.embed(texts)
+
+    # Setiap thread memakai instance sendiri, seperti worker gunicorn yang berbeda
+    stores = [VectorStore(str(tmp_path / 'vectors'), 'vectors', embedder.dim) for _ in range(4)]
+    threads = [
+        threading.Thread(target=store.append_missing, args=(corpus.get_unindexed_paragraphs, slow_embed))
+        for store in stores
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    store = VectorStore(str(tmp_path / 'vectors'), 'vectors', embedder.dim)
+    with open(store.ids_path, encoding='utf-8') as f:
+        rows = [line.split('\t')[0] for line in f if line.strip()]
+    assert len(rows) == len(set(rows)) == 40
+
+
+def test_append_missing_stops_at_deadline(tmp_path):
+    corpus = SourceCorpus(str(tmp_path / 'corpus'))
+    corpus.add_source('sumber', list(enumerate(PARAGRAPHS)))
+    embedder = HashingEmbedder(dim=64)
+    store = VectorStore(str(tmp_path / 'vectors'), 'vectors', embedder.dim)
+
+    assert store.append_missing(corpus.get_unindexed_paragraphs, embedder.embed,
+                                deadline=time.monotonic() - 1) == 0
+    assert store.append_missing(corpus.get_unindexed_paragraphs, embedder.embed) == 4
+
+
+def test_deleted_sources_leave_semantic_search_in_every_worker(client, app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'SEMANTIC_TOP_K', 3)
+    copied = "\n\n".join(f"{paragraph} Salinan nomor {i}." for i, paragraph in enumerate(PARAGRAPHS[:3]))
+    kept = client.post('/api/sources', json={'name': 'tetap', 'text': "\n\n".join(PARAGRAPHS[1:])}).get_json()
+    deleted = [
+        client.post('/api/sources', json={'name': f'hapus-{i}', 'text': copied}).get_json()['source']['id']
+        for i in range(2)
+    ]
+
+    # Worker yang belum pernah membuka store (vector_stores kosong) menghapus sumber
+    monkeypatch.setattr(app_module, 'vector_stores', {})
+    for source_id in deleted:
+        assert client.delete(f'/api/sources/{source_id}').status_code == 200
+
+    data = client.post('/api/check-plagiarism', json={
+        'text': copied, 'mode': 'semantic', 'use_corpus': True
+    }).get_json()
+    assert data['pipeline']['pairs_semantic'] == 3 * 3
+    assert {match['source_id'] for result in data['results'] for match in result['matches']} == \
+        {kept['source']['id']}
@@ -0,0 +1,118 @@
+import time
+
+from history import CheckHistory, diff_paragraphs
+
+SOURCE = (
+    "Fotosintesis adalah proses tumbuhan hijau mengubah cahaya matahari menjadi energi kimia.\n\n"
+    "Revolusi industri dimulai di Inggris dan mengubah cara manusia bekerja di pabrik."
+)
+ORIGINAL = (
+    "Fotosintesis adalah proses tumbuhan hijau mengubah cahaya matahari menjadi energi kimia.\n\n"
+    "Paragraf pembuka ini ditulis sendiri oleh mahasiswa tanpa sumber apa pun.\n\n"
+    "Revolusi industri dimulai di Inggris dan mengubah cara manusia bekerja di pabrik."
+)
+# Revisi: paragraf baru di awal, paragraf kedua diganti, paragraf pertama hanya
+# berubah huruf besar sehingga hash normalnya sama tetapi teks persisnya berbeda
+REVISED = (
+    "Bagian pendahuluan baru yang ditambahkan pada revisi kedua dokumen ini.\n\n"
+    "FOTOSINTESIS adalah proses tumbuhan hijau mengubah cahaya matahari menjadi energi kimia.\n\n"
+    "Paragraf kedua ini sudah ditulis ulang total dengan kalimat yang berbeda jauh.\n\n"
+    "Revolusi industri dimulai di Inggris dan mengubah cara manusia bekerja di pabrik."
+)
+
+
+def test_diff_paragraphs_counts_and_maps_unchanged():
+    summary, unchanged = diff_paragraphs(['a', 'b', 'c', 'd'], ['x', 'a', 'b2', 'c', 'y', 'z', 'd'])
+    assert summary == {'added': 3, 'removed': 0, 'changed': 1, 'unchanged': 3}
+    assert unchanged == {1: 0, 3: 2, 6: 3}
+
+
+def test_diff_paragraphs_removed_and_empty():
+    summary, unchanged = diff_paragraphs(['a', 'b', 'c'], ['a'])
+    assert summary == {'added': 0, 'removed': 2, 'changed': 0, 'unchanged': 1}
+    assert unchanged == {0: 0}
+    assert diff_paragraphs([], [])[1] == {}
+
+
+def test_history_entries_expire_on_read(tmp_path):
+    history = CheckHistory(str(tmp_path / 'history.db'), max_age=0.2)
+    check_id = history.save('kunci', [{'hash': 'a', 'result': {}}])
+    assert history.get(check_id)['paragraphs'] == [{'hash': 'a', 'result': {}}]
+    time.sleep(0.3)
+    assert history.get(check_id) is None
+
+
+def test_recheck_reuses_unchanged_paragraphs(client):
+    first = client.post('/api/check-plagiarism', json={'text': ORIGINAL, 'sources': {'Buku': SOURCE}})
+    assert first.status_code == 200
+    first = first.get_json()
+
+    revised = client.post('/api/check-plagiarism', json={
+        'text': REVISED, 'sources': {'Buku': SOURCE}, 'previous_check_id': first['check_id']
+    }).get_json()
+    assert revised['diff']['unchanged'] == 2
+    assert revised['diff']['config_changed'] is False
+    assert revised['reuse']['paragraphs_reused'] == 2
+    assert revised['reuse']['paragraphs_analyzed'] == 2
+
+    by_number = {result['paragraph_number']: result for result in revised['results']}
+    old_by_number = {result['paragraph_number']: result for result in first['results']}
+
+    # Paragraf yang hanya berubah huruf besar: hasil lama dipakai, rentang karakter dikosongkan
+    case_changed = by_number[2]
+    assert case_changed['reused_from_paragraph'] == 1
+    assert case_changed['matches']
+    assert case_changed['paragraph_text'].startswith('FOTOSINTESIS')
+    assert [m['similarity'] for m in case_changed['matches']] == \
+        [m['similarity'] for m in old_by_number[1]['matches']]
+    assert all(m['paragraph_spans'] == [] for m in case_changed['matches'])
+
+    # Paragraf yang identik pindah posisi dan rentang karakternya tetap dipakai
+    moved = by_number[4]
+    assert moved['reused_from_paragraph'] == 3
+    assert moved['matches'] == old_by_number[3]['matches']
+
+    # Hasil akhir sama dengan pemeriksaan penuh tanpa pemakaian ulang
+    full = client.post('/api/check-plagiarism', json={'text': REVISED, 'sources': {'Buku': SOURCE}}).get_json()
+    assert revised['overall_score'] == full['overall_score']
+    assert [r['paragraph_number'] for r in revised['results']] == [r['paragraph_number'] for r in full['results']]
+
+
+def test_recheck_ignores_previous_check_with_different_sources(client):
+    first = client.post('/api/check-plagiarism', json={'text': ORIGINAL, 'sources': {'Buku': SOURCE}}).get_json()
+    revised = client.post('/api/check-plagiarism', json={
+        'text': ORIGINAL, 'sources': {'Buku lain': SOURCE}, 'previous_check_id': first['check_id']
+    }).get_json()
+    assert revised['diff']['config_changed'] is True
+    assert revised['reuse']['paragraphs_reused'] == 0
+
+
+def test_unknown_previous_check_is_rejected(client):
+    response = client.post('/api/check-plagiarism', json={
+        'text': ORIGINAL, 'sources': {'Buku': SOURCE}, 'previous_check_id': 'tidak-ada'
+    })
+    assert response.status_code == 400
+
+
+def test_paragraphs_with_failed_llm_verdicts_are_analyzed_again(client, app_module, fake_ollama, monkeypatch):
+    text = "Bank sentral menaikkan suku bunga acuan untuk menekan laju inflasi tahun ini."
+    source = "Bank sentral menaikkan suku bunga untuk menahan inflasi yang tinggi."
+    document = f"{text}\n\n{ORIGINAL}"
+    sources = {'Artikel': source, 'Buku': SOURCE}
+
+    with monkeypatch.context() as patch:
+        patch.setattr(fake_ollama, 'latency', 1.0)
+        patch.setattr(app_module, 'OLLAMA_REQUEST_DEADLINE', 0.2)
+        first = client.post('/api/check-plagiarism', json={'text': document, 'sources': sources}).get_json()
+    assert first['pipeline']['llm_timeouts'] > 0
+    assert first['results'][0]['llm_failures'] > 0
+
+    revised = client.post('/api/check-plagiarism', json={
+        'text': document, 'sources': sources, 'previous_check_id': first['check_id']
+    }).get_json()
+    assert revised['diff']['unchanged'] == 4
+    failed = sum(1 for result in first['results'] if result.get('llm_failures'))
+    assert revised['reuse']['paragraphs_analyzed'] == failed
+    assert revised['pipeline']['llm_timeouts'] == 0
+    assert revised['results'][0]['matches'][0]['tier'] == 'llm'
+    assert 'reused_from_paragraph' not in revised['results'][0]
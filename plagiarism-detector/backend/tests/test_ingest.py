@@ -0,0 +1,60 @@
+import random
+
+import pytest
+
+import ingest
+from ingest import iter_paragraphs, read_file
+
+
+# Implementasi sebelumnya yang memecah ulang seluruh buffer di setiap block;
+# dipakai sebagai acuan hasil yang benar
+def reference_paragraphs(blocks, txt):
+    buffer = ''
+    for block in blocks:
+        buffer += block if txt else block + '\n\n'
+        *complete, buffer = buffer.split('\n\n')
+        for paragraph in complete:
+            if paragraph.strip():
+                yield paragraph.strip()
+    if buffer.strip():
+        yield buffer.strip()
+
+
+def random_split(rng, text):
+    cuts = sorted(rng.sample(range(len(text) + 1), rng.randint(0, min(8, len(text) + 1))))
+    return [text[start:end] for start, end in zip([0] + cuts, cuts + [len(text)])]
+
+
+def paragraphs_of(monkeypatch, blocks, filename):
+    monkeypatch.setattr(ingest, 'iter_pages', lambda file_path, filename, executor=None: iter(blocks))
+    return list(iter_paragraphs('dokumen', filename))
+
+
+@pytest.mark.parametrize('filename', ['esai.txt', 'esai.pdf'])
+def test_iter_paragraphs_matches_reference_on_random_splits(monkeypatch, filename):
+    rng = random.Random(7)
+    txt = filename.endswith('.txt')
+    for _ in range(1500):
+        # Banyak baris baru berurutan agar '\n\n' sering terpotong di batas block
+        text = ''.join(rng.choice('ab \n\n\n') for _ in range(rng.randint(0, 40)))
+        blocks = random_split(rng, text)
+        expected = list(reference_paragraphs(blocks, txt))
+        assert paragraphs_of(monkeypatch, blocks, filename) == expected, blocks
+        if txt:
+            assert expected == [p.strip() for p in text.split('\n\n') if p.strip()]
+
+
+def test_blank_line_split_across_chunks_separates_paragraphs(monkeypatch):
+    assert paragraphs_of(monkeypatch, ['satu\n', '\ndua'], 'esai.txt') == ['satu', 'dua']
+    assert paragraphs_of(monkeypatch, ['satu\n', '\n', '\ndua\n'], 'esai.txt') == ['satu', 'dua']
+    assert paragraphs_of(monkeypatch, ['satu\n', 'dua\n', 'tiga'], 'esai.txt') == ['satu\ndua\ntiga']
+    # Batas halaman selalu menjadi batas paragraf
+    assert paragraphs_of(monkeypatch, ['satu\n', 'dua'], 'esai.pdf') == ['satu', 'dua']
+
+
+def test_read_file_streams_txt_in_small_chunks(tmp_path, monkeypatch):
+    paragraphs = [f"Paragraf {i} baris pertama\nbaris kedua" for i in range(50)]
+    path = tmp_path / 'esai.txt'
+    path.write_text('\n\n'.join(paragraphs) + '\n', encoding='utf-8')
+    monkeypatch.setattr(ingest, 'CHUNK_SIZE', 7)
+    assert read_file(str(path), 'esai.txt') == '\n\n'.join(paragraphs)
@@ -0,0 +1,169 @@
+import json
+import threading
+import time
+
+import pytest
+
+from jobs import Job, JobManager, JobStore, QueueFull, STALE_JOB_ERROR
+
+ORIGINAL = ("Penelitian ini menunjukkan bahwa siswa yang belajar dengan metode aktif "
+            "mendapatkan nilai yang lebih tinggi pada bulan yang sama.")
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / 'jobs.db'))
+
+
+# Buat job 'running' yang pemiliknya sudah mati: baris ada di store, tidak ada worker yang memperbaruinya
+def orphan_job(store, age):
+    job = Job(store)
+    store.create(job)
+    job.set_status('running')
+    job.publish('started', {'progress': job.progress})
+    with store._connect() as conn:
+        conn.execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (time.time() - age, job.id))
+    return job.id
+
+
+def test_stale_remote_job_is_reported_failed(store):
+    job_id = orphan_job(store, age=60)
+    manager = JobManager(store=store, stale_after=30)
+
+    job = manager.get(job_id)
+    assert job.finished
+    assert job.status == 'failed'
+    assert job.error == STALE_JOB_ERROR
+    assert [event['event'] for event in job.wait_events(0, timeout=0)] == ['started', 'failed']
+    assert store.count_active(30) == 0
+
+
+def test_recent_remote_job_keeps_running(store):
+    job_id = orphan_job(store, age=5)
+    job = JobManager(store=store, stale_after=30).get(job_id)
+    assert job.status == 'running'
+    assert [event['event'] for event in job.wait_events(0, timeout=0.1)] == ['started']
+
+
+def test_owner_cannot_reopen_job_closed_as_stale(store):
+    job = Job(store)
+    store.create(job)
+    job.set_status('running')
+    with store._connect() as conn:
+        conn.execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (time.time() - 60, job.id))
+    assert store.fail_stale(job.id, 30, STALE_JOB_ERROR)
+
+    # Worker pemilik yang ternyata masih hidup tidak menimpa status atau menambah event
+    job.publish('paragraph', {'result': {'matches': []}})
+    assert store.load(job.id)['status'] == 'failed'
+    assert [event['event'] for event in store.events(job.id)] == ['failed']
+
+
+def test_stream_of_dead_worker_job_ends_with_failed_event(client, app_module, monkeypatch):
+    monkeypatch.setattr(app_module.job_manager, 'stale_after', 30)
+    job_id = orphan_job(app_module.job_manager.store, age=60)
+
+    response = client.get(f'/api/jobs/{job_id}/events?format=ndjson')
+    events = [json.loads(line) for line in response.get_data(as_text=True).splitlines() if line.strip()]
+    assert [event['event'] for event in events] == ['started', 'failed']
+    assert events[-1]['data'] == {'error': STALE_JOB_ERROR}
+    assert client.get(f'/api/jobs/{job_id}').get_json()['status'] == 'failed'
+
+
+# Jalankan job yang menunggu sampai gate dibuka, lalu selesai sebagai 'completed'
+def blocking_run(gate, started=None):
+    def run(job):
+        job.set_status('running')
+        if started is not None:
+            started.set()
+        gate.wait(5)
+        job.finish('completed', 'completed', {})
+    return run
+
+
+def wait_finished(job, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not job.finished and time.monotonic() < deadline:
+        job.wait_events(len(job.events), timeout=0.05)
+    return job.finished
+
+
+@pytest.mark.parametrize('with_store', [False, True])
+def test_submit_rejects_jobs_beyond_running_and_queued_limits(store, with_store):
+    manager = JobManager(max_running=1, max_queued=1, store=store if with_store else None)
+    gate = threading.Event()
+    jobs = [manager.submit(blocking_run(gate)) for _ in range(2)]
+    with pytest.raises(QueueFull):
+        manager.submit(blocking_run(gate))
+
+    gate.set()
+    assert all(wait_finished(job) for job in jobs)
+    assert wait_finished(manager.submit(blocking_run(gate)))
+
+
+def test_active_jobs_of_other_workers_count_towards_the_limit(store):
+    gate = threading.Event()
+    JobManager(max_running=1, max_queued=0, store=store).submit(blocking_run(gate))
+    with pytest.raises(QueueFull):
+        JobManager(max_running=1, max_queued=0, store=store).submit(blocking_run(gate))
+    gate.set()
+
+
+def test_cancelled_queued_job_never_runs(store):
+    manager = JobManager(max_running=1, max_queued=1, store=store)
+    gate, started = threading.Event(), threading.Event()
+    ran = []
+    first = manager.submit(blocking_run(gate, started))
+    started.wait(5)
+    queued = manager.submit(lambda job: ran.append(job.id))
+
+    assert manager.cancel(queued.id).status == 'cancelled'
+    gate.set()
+    assert wait_finished(first)
+    assert ran == []
+    assert [event['event'] for event in store.events(queued.id)] == ['cancelled']
+
+
+def test_running_job_stops_when_cancelled_from_another_worker(store):
+    owner = JobManager(store=store)
+    started = threading.Event()
+
+    def run(job):
+        job.set_status('running')
+        started.set()
+        while not job.cancel_requested:
+            time.sleep(0.01)
+        job.finish('cancelled', 'cancelled', {})
+
+    job = owner.submit(run)
+    started.wait(5)
+    remote = JobManager(store=store).cancel(job.id)
+    assert remote.cancel_requested
+    assert wait_finished(job)
+    assert job.status == 'cancelled'
+    assert JobManager(store=store).get(job.id).status == 'cancelled'
+    assert JobManager(store=store).cancel('tidak-ada') is None
+
+
+def test_job_events_stream_and_resume(client):
+    text = f"{ORIGINAL}\n\n{ORIGINAL.upper()}"
+    response = client.post('/api/jobs', json={'text': text, 'sources': {'Sumber': ORIGINAL}})
+    assert response.status_code == 202
+    events_url = response.get_json()['events_url']
+
+    response = client.get(f'{events_url}?format=ndjson')
+    assert response.mimetype == 'application/x-ndjson'
+    events = [json.loads(line) for line in response.get_data(as_text=True).splitlines() if line.strip()]
+    assert [event['event'] for event in events] == ['started', 'paragraph', 'paragraph', 'completed']
+    assert [event['id'] for event in events] == [0, 1, 2, 3]
+
+    # Sambung ulang lewat ?from= atau Last-Event-ID hanya mengirim event sesudahnya
+    resumed = client.get(f'{events_url}?format=ndjson&from=2').get_data(as_text=True).splitlines()
+    assert [json.loads(line)['id'] for line in resumed if line.strip()] == [2, 3]
+    sse = client.get(events_url, headers={'Last-Event-ID': '2'}).get_data(as_text=True)
+    assert sse == f"id: 3\nevent: completed\ndata: {json.dumps(events[-1]['data'])}\n\n"
+
+    assert client.get(f'{events_url}?from=-1').status_code == 400
+    assert client.get(events_url, headers={'Last-Event-ID': 'abc'}).status_code == 400
+    assert client.get(f'{events_url}?format=xml').status_code == 400
+    assert client.get('/api/jobs/tidak-ada/events').status_code == 404
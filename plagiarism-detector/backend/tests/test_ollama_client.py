@@ -0,0 +1,111 @@
+import json
+import socket
+import time
+
+import pytest
+import requests
+
+from benchmarks.fake_ollama import FakeOllama
+from ollama_client import DeadlineExceeded, OllamaClient
+
+
+@pytest.fixture
+def fake():
+    fake = FakeOllama(latency=0.05, num_parallel=4)
+    fake.url = fake.start()
+    yield fake
+    fake.stop()
+
+
+def generate(client, prompt, deadline=None):
+    response = client.post('/api/generate', deadline=deadline, json={'model': 'llama3', 'prompt': prompt})
+    return response.json()['response']
+
+
+def unused_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def test_results_keep_submission_order_while_running_concurrently(fake):
+    client = OllamaClient(fake.url, num_parallel=4)
+    # Sumber ke-i berisi i kata tambahan, jadi skor Jaccard-nya 100 / (i + 1)
+    prompts = [
+        "TEKS 1 (Yang Dicek): inti\nTEKS 2 (Sumber): inti " + " ".join(f"kata{j}" for j in range(i)) + "\nFORMAT OUTPUT"
+        for i in range(8)
+    ]
+
+    start = time.monotonic()
+    futures = [client.submit(generate, client, prompt) for prompt in prompts]
+    results = [client.result(future) for future in futures]
+    elapsed = time.monotonic() - start
+
+    assert [json.loads(result)['score'] for result in results] == [round(100 / (i + 1)) for i in range(8)]
+    assert fake.stats()['generate_calls'] == 8
+    # 8 panggilan x 50 ms dengan 4 slot: sekitar 2 gelombang, jauh di bawah 400 ms berurutan
+    assert elapsed < 0.3
+
+
+def test_result_returns_default_when_deadline_passes(fake):
+    fake.latency = 0.5
+    client = OllamaClient(fake.url, num_parallel=1)
+    slow = client.submit(generate, client, 'lambat')
+    queued = client.submit(generate, client, 'antre')
+
+    start = time.monotonic()
+    assert client.result(slow, deadline=time.monotonic() + 0.1, default='habis') == 'habis'
+    assert time.monotonic() - start < 0.3
+    # Future yang belum mulai dibatalkan sehingga tidak memakai slot model
+    assert client.result(queued, deadline=time.monotonic(), default='habis') == 'habis'
+    assert queued.cancelled()
+
+
+def test_request_deadline_bounds_slow_calls(fake):
+    fake.latency = 1.0
+    client = OllamaClient(fake.url, timeout=30, backoff=0.05)
+
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        generate(client, 'lambat', deadline=time.monotonic() + 0.2)
+    assert time.monotonic() - start < 0.5
+
+    with pytest.raises(DeadlineExceeded):
+        generate(client, 'lambat', deadline=time.monotonic() - 1)
+
+
+def test_transient_statuses_are_retried(fake):
+    client = OllamaClient(fake.url, max_retries=3, backoff=0.01)
+    fake.fail_next(2, status=503)
+    assert generate(client, 'coba lagi')
+    assert fake.stats()['failed_calls'] == 2
+    assert fake.stats()['generate_calls'] == 1
+
+
+def test_retries_give_up_after_max_retries(fake):
+    client = OllamaClient(fake.url, max_retries=2, backoff=0.01)
+    fake.fail_next(5, status=502)
+    response = client.post('/api/generate', json={'model': 'llama3', 'prompt': 'gagal'})
+    assert response.status_code == 502
+    assert fake.stats()['failed_calls'] == 3
+
+
+def test_non_transient_status_is_not_retried(fake):
+    client = OllamaClient(fake.url, max_retries=3, backoff=0.01)
+    fake.fail_next(1, status=500)
+    assert client.post('/api/generate', json={'prompt': 'x'}).status_code == 500
+    assert fake.stats()['failed_calls'] == 1
+    assert fake.stats()['generate_calls'] == 0
+
+
+def test_connection_errors_are_retried_then_raised():
+    client = OllamaClient(f"http://127.0.0.1:{unused_port()}", max_retries=2, backoff=0.01)
+    with pytest.raises(requests.ConnectionError):
+        client.get('/api/tags')
+
+    # Backoff tidak menunggu melewati deadline
+    client = OllamaClient(client.base_url, max_retries=10, backoff=1.0)
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        client.get('/api/tags', deadline=time.monotonic() + 0.2)
+    assert time.monotonic() - start < 0.5
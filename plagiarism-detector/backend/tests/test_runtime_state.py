@@ -0,0 +1,22 @@
+from runtime_state import RuntimeState
+
+
+def test_delete_is_seen_by_other_workers(tmp_path):
+    path = str(tmp_path / 'runtime.db')
+    first = RuntimeState(path, refresh_interval=0)
+    second = RuntimeState(path, refresh_interval=0)
+    first.set('ollama_model', 'mistral')
+    assert second.get('ollama_model') == 'mistral'
+    first.delete('ollama_model')
+    assert second.get('ollama_model', 'llama3') == 'llama3'
+
+
+def test_explicit_ollama_model_replaces_saved_choice(app_module, monkeypatch):
+    app_module.runtime_state.set('ollama_model', 'model-lama')
+    monkeypatch.delenv('OLLAMA_MODEL', raising=False)
+    app_module.apply_configured_model()
+    assert app_module.get_active_model() == 'model-lama'
+
+    monkeypatch.setenv('OLLAMA_MODEL', app_module.OLLAMA_MODEL)
+    app_module.apply_configured_model()
+    assert app_module.get_active_model() == app_module.OLLAMA_MODEL
@@ -0,0 +1,48 @@
+import numpy as np
+
+from similarity import lexical_similarity_matrix, select_llm_candidates
+
+THRESHOLDS = dict(copy_threshold=0.85, unrelated_threshold=0.1, ambiguity_band=(0.3, 0.6))
+
+
+def test_clear_copies_and_unrelated_pairs_never_reach_llm():
+    similarity = np.array([[0.95, 0.05, 0.85, 0.09]], dtype=np.float32)
+    needs_llm = select_llm_candidates(similarity, top_k=4, **THRESHOLDS)
+    assert not needs_llm.any()
+
+
+def test_ambiguity_band_is_always_sent_to_llm():
+    similarity = np.array([[0.3, 0.45, 0.59, 0.6, 0.2]], dtype=np.float32)
+    needs_llm = select_llm_candidates(similarity, top_k=0, **THRESHOLDS)
+    assert needs_llm.tolist() == [[True, True, True, False, False]]
+
+
+def test_top_k_adds_best_undecided_pairs_outside_band():
+    similarity = np.array([
+        [0.2, 0.7, 0.15, 0.95, 0.4],
+        [0.05, 0.12, 0.11, 0.02, 0.01],
+    ], dtype=np.float32)
+    needs_llm = select_llm_candidates(similarity, top_k=2, **THRESHOLDS)
+    # Baris 0: 0.4 (band) + top-2 yang belum diputuskan (0.7, 0.4); 0.95 sudah jelas disalin
+    assert needs_llm[0].tolist() == [False, True, False, False, True]
+    # Baris 1: top-2 hanya dari pasangan di atas unrelated_threshold
+    assert needs_llm[1].tolist() == [False, True, True, False, False]
+
+
+def test_top_k_larger_than_sources_and_empty_matrix():
+    similarity = np.array([[0.2, 0.7]], dtype=np.float32)
+    assert select_llm_candidates(similarity, top_k=10, **THRESHOLDS).tolist() == [[True, True]]
+
+    empty = np.zeros((0, 3), dtype=np.float32)
+    assert select_llm_candidates(empty, top_k=2, **THRESHOLDS).shape == (0, 3)
+
+
+def test_lexical_similarity_matrix_shape_and_range():
+    paragraphs = ["kucing tidur di atas kasur empuk", "harga saham naik tajam hari ini"]
+    sources = ["kucing tidur di atas kasur empuk", "cuaca cerah sepanjang minggu", "!!!"]
+    similarity = lexical_similarity_matrix(paragraphs, sources)
+    assert similarity.shape == (2, 3)
+    assert similarity[0, 0] > 0.99
+    assert similarity[0, 0] > similarity[0, 1]
+    assert ((similarity >= 0) & (similarity <= 1)).all()
+    assert lexical_similarity_matrix([], sources).shape == (0, 3)
@@ -0,0 +1,91 @@
+import types
+
+import pytest
+
+import verdict_cache
+from verdict_cache import VerdictCache
+
+VERDICT = {'similarity_score': 80, 'is_plagiarism': True}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(verdict_cache, 'time', types.SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+def make_cache(tmp_path, **kwargs):
+    return VerdictCache(str(tmp_path / 'verdicts.db'), **kwargs)
+
+
+def disk_count(cache):
+    with cache._connect() as conn:
+        return conn.execute("SELECT COUNT(*) FROM verdicts").fetchone()[0]
+
+
+def test_get_checks_memory_then_disk(tmp_path):
+    cache = make_cache(tmp_path)
+    assert cache.get('llama3', 1, 'Teks', 'Sumber') == (None, 'miss')
+    cache.put('llama3', 1, 'Teks', 'Sumber', VERDICT)
+    # Kunci dinormalkan: huruf besar dan spasi tidak membuat entri baru
+    assert cache.get('llama3', 1, '  TEKS ', 'sumber') == (VERDICT, 'memory')
+
+    # Worker lain hanya punya SQLite; hasilnya lalu disimpan di LRU-nya
+    other = make_cache(tmp_path)
+    assert other.get('llama3', 1, 'Teks', 'Sumber') == (VERDICT, 'disk')
+    assert other.get('llama3', 1, 'Teks', 'Sumber') == (VERDICT, 'memory')
+    assert other.get('llama3', 2, 'Teks', 'Sumber') == (None, 'miss')
+    assert other.get_stats() == {'memory_hits': 1, 'disk_hits': 1, 'misses': 1, 'memory_items': 1}
+
+
+def test_entries_expire_after_ttl(tmp_path, clock):
+    cache = make_cache(tmp_path, ttl=60)
+    cache.put('llama3', 1, 'Teks', 'Sumber', VERDICT)
+    clock[0] += 59
+    assert cache.get('llama3', 1, 'Teks', 'Sumber')[1] == 'memory'
+    assert make_cache(tmp_path, ttl=60).get('llama3', 1, 'Teks', 'Sumber')[1] == 'disk'
+
+    clock[0] += 1
+    assert cache.get('llama3', 1, 'Teks', 'Sumber') == (None, 'miss')
+    assert cache.get_stats()['memory_items'] == 0
+    cache.evict()
+    assert disk_count(cache) == 0
+
+
+def test_memory_lru_and_disk_limit_evict_oldest(tmp_path, clock):
+    cache = make_cache(tmp_path, max_memory_items=2, max_disk_items=2)
+    for index in range(3):
+        clock[0] += 1
+        cache.put('llama3', 1, f'Teks {index}', 'Sumber', {'index': index})
+    assert cache.get_stats()['memory_items'] == 2
+    # Entri tertua sudah keluar dari LRU tetapi masih ada di disk sampai evict()
+    assert cache.get('llama3', 1, 'Teks 0', 'Sumber') == ({'index': 0}, 'disk')
+
+    cache.evict()
+    assert disk_count(cache) == 2
+    fresh = make_cache(tmp_path)
+    assert fresh.get('llama3', 1, 'Teks 0', 'Sumber') == (None, 'miss')
+    assert fresh.get('llama3', 1, 'Teks 2', 'Sumber') == ({'index': 2}, 'disk')
+
+
+def test_generation_bump_hides_old_verdicts_in_every_worker(tmp_path):
+    generations = {'llama3': 0}
+    first = make_cache(tmp_path, generation=generations.get)
+    second = make_cache(tmp_path, generation=generations.get)
+    first.put('llama3', 1, 'Teks', 'Sumber', VERDICT)
+    assert second.get('llama3', 1, 'Teks', 'Sumber')[1] == 'disk'
+
+    generations['llama3'] += 1
+    assert first.get('llama3', 1, 'Teks', 'Sumber') == (None, 'miss')
+    assert second.get('llama3', 1, 'Teks', 'Sumber') == (None, 'miss')
+
+
+def test_invalidate_model_removes_only_that_model(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put('llama3', 1, 'Teks', 'Sumber', VERDICT)
+    cache.put('mistral', 1, 'Teks', 'Sumber', VERDICT)
+    assert cache.invalidate_model('llama3') == 1
+    assert cache.get('llama3', 1, 'Teks', 'Sumber') == (None, 'miss')
+    assert cache.get('mistral', 1, 'Teks', 'Sumber') == (VERDICT, 'memory')
+    assert make_cache(tmp_path).get('mistral', 1, 'Teks', 'Sumber')[1] == 'disk'
@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import db
+
+
+# Fungsi normalisasi default: huruf kecil dan spasi dirapikan
+def _normalize(text):
+    return ' '.join(text.lower().split())
+
+
+def _digest(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+# Cache vonis LLM dua tingkat. Kunci dibentuk dari (nama model, generasi, versi
+# prompt, hash teks ternormalisasi, hash sumber ternormalisasi). Tingkat pertama
+# adalah LRU di memori proses, tingkat kedua SQLite di disk yang dibagi semua worker.
+# generation(model) (opsional) mengembalikan angka yang dinaikkan setiap kali vonis
+# model dibatalkan; karena ikut membentuk kunci, LRU di worker lain juga tidak
+# memakai vonis lama lagi.
+class VerdictCache:
+    def __init__(self, db_path, max_memory_items=10000, max_disk_items=500000,
+                 ttl=30 * 24 * 3600, normalize=_normalize, generation=None):
+        self.db_path = db_path
+        self.max_memory_items = max_memory_items
+        self.max_disk_items = max_disk_items
+        self.ttl = ttl
+        self.normalize = normalize
+        self.generation = generation
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._puts_since_trim = 0
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0}
+
+        folder = os.path.dirname(db_path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        with self._connect() as conn:
+            conn.executescript("""
+                PRAGMA journal_mode=WAL;
+                CREATE TABLE IF NOT EXISTS verdicts (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    verdict TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_verdicts_model ON verdicts (model);
+                CREATE INDEX IF NOT EXISTS idx_verdicts_created ON verdicts (created_at);
+            """)
+
+    def _connect(self):
+        return db.connect(self.db_path)
+
+    def make_key(self, model, prompt_version, text, source_text):
+        text_hash = _digest(self.normalize(text))
+        source_hash = _digest(self.normalize(source_text))
+        generation = self.generation(model) if self.generation is not None else 0
+        model_key = f"{model}\x00{generation}" if generation else model
+        return _digest(f"{model_key}\x00{prompt_version}\x00{text_hash}\x00{source_hash}")
+
+    # Ambil vonis dari cache. Mengembalikan (vonis, 'memory' | 'disk') atau (None, 'miss').
+    def get(self, model, prompt_version, text, source_text):
+        key = self.make_key(model, prompt_version, text, source_text)
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, entry_model, verdict = entry
+                if now - created_at < self.ttl:
+                    self._memory.move_to_end(key)
+                    self.stats['memory_hits'] += 1
+                    return verdict, 'memory'
+                del self._memory[key]
+
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT verdict, created_at FROM verdicts WHERE key = ? AND created_at > ?",
+                (key, now - self.ttl)
+            ).fetchone()
+
+        if row is None:
+            with self._lock:
+                self.stats['misses'] += 1
+            return None, 'miss'
+
+        verdict = json.loads(row[0])
+        with self._lock:
+            self._remember(key, (row[1], model, verdict))
+            self.stats['disk_hits'] += 1
+        return verdict, 'disk'
+
+    def put(self, model, prompt_version, text, source_text, verdict):
+        key = self.make_key(model, prompt_version, text, source_text)
+        now = time.time()
+        with self._lock:
+            self._remember(key, (now, model, verdict))
+            self._puts_since_trim += 1
+            trim = self._puts_since_trim >= 1000
+            if trim:
+                self._puts_since_trim = 0
+
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO verdicts (key, model, verdict, created_at) VALUES (?, ?, ?, ?)",
+                (key, model, json.dumps(verdict), now)
+            )
+        if trim:
+            self.evict()
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    # Hapus entri kedaluwarsa dan entri tertua jika melebihi batas ukuran disk
+    def evict(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM verdicts WHERE created_at <= ?", (time.time() - self.ttl,))
+            count = conn.execute("SELECT COUNT(*) FROM verdicts").fetchone()[0]
+            if count > self.max_disk_items:
+                conn.execute(
+                    "DELETE FROM verdicts WHERE key IN "
+                    "(SELECT key FROM verdicts ORDER BY created_at ASC LIMIT ?)",
+                    (count - self.max_disk_items,)
+                )
+
+    # Hapus semua vonis milik satu model (di memori proses ini dan di disk). Worker
+    # lain baru berhenti memakai vonis di LRU-nya jika generasi model juga dinaikkan.
+    def invalidate_model(self, model):
+        with self._lock:
+            for key in [k for k, (_, m, _) in self._memory.items() if m == model]:
+                del self._memory[key]
+        with self._connect() as conn:
+            return conn.execute("DELETE FROM verdicts WHERE model = ?", (model,)).rowcount
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['memory_items'] = len(self._memory)
+        return stats
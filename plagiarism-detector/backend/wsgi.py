@@ -0,0 +1,5 @@
+# Titik masuk WSGI untuk server produksi, misalnya:
+#   gunicorn -c gunicorn.conf.py wsgi:application
+from app import app
+
+application = app
@@ -1,7 +1,9 @@
-import React, { useState } from 'react';
+import React, { useRef, useState } from 'react';
 import axios from 'axios';
 import './App.css';
 
+const API_URL = 'http://127.0.0.1:5000';
+
 function App() {
   const [text, setText] = useState('');
   const [sources, setSources] = useState({});
@@ -11,6 +13,9 @@ function App() {
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState('');
   const [activeTab, setActiveTab] = useState('input');
+  const [progress, setProgress] = useState(null);
+  const [jobId, setJobId] = useState(null);
+  const eventSourceRef = useRef(null);
 
   const handleAddSource = () => {
     if (!sourceName.trim() || !sourceText.trim()) {
@@ -31,6 +36,15 @@ function App() {
     setSources(newSources);
   };
 
+  const closeStream = () => {
+    if (eventSourceRef.current) {
+      eventSourceRef.current.close();
+      eventSourceRef.current = null;
+    }
+    setJobId(null);
+    setLoading(false);
+  };
+
   const handleCheckPlagiarism = async () => {
     if (!text.trim()) {
       setError('Teks utama harus diisi!');
@@ -39,24 +53,83 @@ function App() {
 
     setLoading(true);
     setError('');
+    setResult(null);
+    setProgress(null);
     
     try {
-      const response = await axios.post('http://127.0.0.1:5000/api/check-plagiarism', {
+      // Pemeriksaan berjalan sebagai job; hasil per paragraf dikirim lewat stream
+      const response = await axios.post(`${API_URL}/api/jobs`, {
         text,
         sources
       });
-      
-      setResult(response.data);
-      setActiveTab('results');
+      setJobId(response.data.job_id);
+
+      const eventSource = new EventSource(`${API_URL}${response.data.events_url}`);
+      eventSourceRef.current = eventSource;
+      const partialResults = [];
+
+      eventSource.addEventListener('started', (event) => {
+        setProgress(JSON.parse(event.data).progress);
+      });
+
+      eventSource.addEventListener('paragraph', (event) => {
+        const data = JSON.parse(event.data);
+        if (data.result.matches.length > 0) {
+          partialResults.push(data.result);
+        }
+        setProgress(data.progress);
+        setResult({ ...data.summary, results: [...partialResults], partial: true });
+        setActiveTab('results');
+      });
+
+      eventSource.addEventListener('completed', (event) => {
+        setResult(JSON.parse(event.data));
+        setActiveTab('results');
+        closeStream();
+      });
+
+      eventSource.addEventListener('cancelled', () => {
+        setError('Pemeriksaan dibatalkan.');
+        closeStream();
+      });
+
+      eventSource.addEventListener('failed', (event) => {
+        setError(`Pemeriksaan gagal: ${JSON.parse(event.data).error}`);
+        closeStream();
+      });
+
+      // Saat koneksi putus sementara browser menyambung ulang sendiri (dengan
+      // Last-Event-ID); jika stream ditutup permanen (misalnya job sudah dihapus),
+      // hentikan pemeriksaan agar tampilan tidak terus menunggu
+      eventSource.onerror = () => {
+        if (eventSource.readyState === EventSource.CLOSED) {
+          setError('Koneksi ke hasil pemeriksaan terputus. Silakan periksa ulang.');
+          closeStream();
+        }
+      };
+    } catch (err) {
+      if (err.response && err.response.status === 429) {
+        setError('Server sedang sibuk. Coba lagi beberapa saat lagi.');
+      } else {
+        setError('Terjadi kesalahan. Pastikan backend server berjalan di port 5000.');
+      }
+      console.error(err);
+      setLoading(false);
+    }
+  };
+
+  const handleCancel = async () => {
+    if (!jobId) return;
+    try {
+      await axios.delete(`${API_URL}/api/jobs/${jobId}`);
     } catch (err) {
-      setError('Terjadi kesalahan. Pastikan backend server berjalan di port 5000.');
       console.error(err);
     }
-    
-    setLoading(false);
   };
 
   const handleClear = () => {
+    closeStream();
+    setProgress(null);
     setText('');
     setSources({});
     setResult(null);
@@ -72,7 +145,7 @@ function App() {
     formData.append('file', file);
 
     try {
-      const response = await axios.post('http://localhost:5000/api/upload', formData, {
+      const response = await axios.post(`${API_URL}/api/upload`, formData, {
         headers: {
           'Content-Type': 'multipart/form-data'
         }
@@ -207,6 +280,11 @@ function App() {
               </div>
               <div className="status">Status: {result.status}</div>
               <p>{result.details}</p>
+              {result.partial && progress && (
+                <p className="progress">
+                  Memeriksa paragraf {progress.done} dari {progress.total}...
+                </p>
+              )}
             </div>
 
             <div className="detailed-results">
@@ -248,8 +326,16 @@ function App() {
             disabled={loading || !text.trim()}
             className="check-btn"
           >
-            {loading ? 'Memeriksa...' : 'Periksa Plagiarisme'}
+            {loading
+              ? (progress && progress.total ? `Memeriksa... (${progress.done}/${progress.total})` : 'Memeriksa...')
+              : 'Periksa Plagiarisme'}
           </button>
+
+          {loading && jobId && (
+            <button onClick={handleCancel} className="clear-btn">
+              Batalkan
+            </button>
+          )}
           
           <button onClick={handleClear} className="clear-btn">
             Bersihkan Semua